@@ -0,0 +1,43 @@
+"""
+Backfill extracted design-spec text for existing buckets.
+
+Design PDFs uploaded before spec text was precomputed have no "spec-text/" sidecar,
+so their first inspection pays for a full PDF download and parse. This command
+extracts them ahead of time.
+
+Usage (from backend/):
+    python backfill_spec_text.py                  # every bucket
+    python backfill_spec_text.py --bucket <id>    # one or more project buckets
+    python backfill_spec_text.py --prune          # also delete sidecars of replaced PDFs
+"""
+
+import argparse
+import logging
+
+from services import minio_client, spec_service
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bucket", action="append", help="Project bucket to backfill (repeatable)")
+    parser.add_argument("--prune", action="store_true", help="Delete sidecars whose PDF version is gone")
+    args = parser.parse_args()
+
+    buckets = args.bucket or minio_client.list_buckets()
+    for bucket in buckets:
+        try:
+            stats = spec_service.backfill_bucket(bucket, prune=args.prune)
+        except Exception as exc:
+            logger.warning("[backfill] %s: failed: %s", bucket, exc)
+            continue
+        logger.info(
+            "[backfill] %s: %d extracted, %d already present, %d pruned",
+            bucket, stats["extracted"], stats["existing"], stats["pruned"],
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -14,5 +14,89 @@ class Settings(BaseSettings):
     MINIO_USE_SSL: bool = False
     DETECTION_WEBHOOK_SECRET: str
 
+    # Object storage backend (services/storage_backend.py): "minio", or "local" to keep
+    # buckets as directories under LOCAL_STORAGE_ROOT (single node, benchmarks, tests).
+    # Local presigned URLs are served by this API at PUBLIC_API_URL/storage/local/...
+    STORAGE_BACKEND: str = "minio"
+    LOCAL_STORAGE_ROOT: str = "data/storage"
+    PUBLIC_API_URL: str = "http://localhost:8000"
+
+    # SQLAlchemy connection pool (db/session.py). API requests and detection workers share it;
+    # a checkout waits up to DB_POOL_TIMEOUT_SECONDS before failing.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+
+    # Detection worker pool: number of concurrent inspections, and how often idle
+    # workers re-check the submissions queue when no upload has woken them.
+    DETECTION_WORKERS: int = 2
+    DETECTION_POLL_INTERVAL_SECONDS: float = 5.0
+    # Submissions claimed and loaded (image + spec text) ahead of the workers by a prefetch
+    # thread, so the model never waits on storage or PDF parsing. 0 = each worker loads its own.
+    DETECTION_PREFETCH_DEPTH: int = 2
+    # Failed inspections get their OWLv2 bounding boxes from these threads after the verdict
+    # is saved, so a submission never waits for the OWLv2 model to load or run.
+    DETECTION_ANNOTATION_WORKERS: int = 2
+    # Prepared images kept per submission while a retry may still need them (after an error,
+    # timeout, cancellation or failed annotation), so a retry skips the download and decode.
+    DETECTION_CHECKPOINT_MAX_BYTES: int = 256 * 1024 * 1024
+    DETECTION_CHECKPOINT_TTL_SECONDS: float = 3600
+    # Claimed submissions hold a lease (submissions.heartbeat_at) that the process running them
+    # renews every DETECTION_HEARTBEAT_SECONDS. Running rows whose lease is older than
+    # DETECTION_LEASE_SECONDS were left by a process that died and are re-queued by any replica.
+    DETECTION_HEARTBEAT_SECONDS: float = 15.0
+    DETECTION_LEASE_SECONDS: float = 60.0
+
+    # Ollama request image encoding: "png", "jpeg" or "passthrough" (see models/ollama_vlm.py)
+    OLLAMA_IMAGE_ENCODING: str = "passthrough"
+    OLLAMA_JPEG_QUALITY: int = 90
+    # Keep-alive connections to Ollama shared by the detection workers and the /detect route.
+    OLLAMA_MAX_CONNECTIONS: int = 8
+
+    # OWLv2 micro-batching: annotation requests from concurrent workers are gathered for
+    # up to OWLV2_BATCH_WAIT_MS (or OWLV2_BATCH_SIZE images) and run in one forward pass.
+    OWLV2_BATCH_SIZE: int = 4
+    OWLV2_BATCH_WAIT_MS: float = 50
+    # Speculative localization: run OWLv2 with a per-project FOD vocabulary (spec text + the
+    # last OWLV2_SPECULATIVE_HISTORY anomaly descriptions) while the VLM is still answering,
+    # then match its defects to those boxes. Failed inspections get their boxes sooner, at the
+    # cost of an OWLv2 pass on every inspection, passes included.
+    OWLV2_SPECULATIVE: bool = False
+    OWLV2_SPECULATIVE_MAX_QUERIES: int = 16
+    OWLV2_SPECULATIVE_HISTORY: int = 200
+
+    # POST /storage/images: files accepted per request, and MinIO uploads in flight at once.
+    UPLOAD_BATCH_MAX_FILES: int = 500
+    UPLOAD_BATCH_CONCURRENCY: int = 8
+
+    # Direct-to-MinIO uploads: lifetime of presigned PUT URLs. Completion tokens are
+    # signed with DETECTION_WEBHOOK_SECRET and stay valid for a day.
+    PRESIGNED_UPLOAD_EXPIRES_SECONDS: int = 900
+    # Presigned uploads that were never completed are deleted by a sweep in the purge service,
+    # run every UPLOAD_SWEEP_INTERVAL_SECONDS, once older than UPLOAD_ABANDONED_AFTER_SECONDS
+    # (longer than the day a completion token stays valid, so none can still be completed).
+    UPLOAD_SWEEP_INTERVAL_SECONDS: float = 3600
+    UPLOAD_ABANDONED_AFTER_SECONDS: int = 2 * 24 * 60 * 60
+
+    # Deleted projects' buckets are emptied in the background (services/purge_service.py):
+    # at most PROJECT_PURGE_WORKERS projects at once, PROJECT_PURGE_BATCH_SIZE objects
+    # per delete request (1000 is the S3 DeleteObjects maximum).
+    PROJECT_PURGE_WORKERS: int = 2
+    PROJECT_PURGE_BATCH_SIZE: int = 1000
+
+    # Read-through cache for project, membership and user lookups (services/lookup_cache.py).
+    # Writes made by this process invalidate immediately; other processes' after the TTL.
+    LOOKUP_CACHE_TTL_SECONDS: float = 30
+    LOOKUP_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Uploaded image bytes handed to the detection worker in memory (services/handoff_cache.py)
+    # so it need not download them again. Entries past the cap or TTL fall back to storage.
+    HANDOFF_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    HANDOFF_CACHE_TTL_SECONDS: float = 600
+
+    # Extracted design-spec text, cached per PDF version (bucket + ETag).
+    SPEC_TEXT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
 
 settings = Settings()  # ← this line must be here
\ No newline at end of file
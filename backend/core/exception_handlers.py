@@ -25,3 +25,4 @@ submission_not_found_handler = make_exception_handler(status.HTTP_404_NOT_FOUND)
 permission_denied_handler = make_exception_handler(status.HTTP_403_FORBIDDEN)
 conflict_error_handler = make_exception_handler(status.HTTP_409_CONFLICT)
 invalid_state_transition_handler = make_exception_handler(status.HTTP_400_BAD_REQUEST)
+invalid_cursor_handler = make_exception_handler(status.HTTP_400_BAD_REQUEST)
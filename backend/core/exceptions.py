@@ -36,6 +36,10 @@ class PermissionDenied(AppException):
     default_detail = "You do not have permission to perform this action"
 
 
+class InvalidUploadToken(PermissionDenied):
+    default_detail = "Invalid or expired upload token"
+
+
 # -------------------------
 # Conflict
 # -------------------------
@@ -47,6 +51,13 @@ class AlreadyMember(ConflictError):
     default_detail = "User is already a member of this project"
 
 
+# -------------------------
+# Validation
+# -------------------------
+class InvalidCursor(AppException):
+    default_detail = "Invalid pagination cursor"
+
+
 # -------------------------
 # State
 # -------------------------
@@ -0,0 +1,3 @@
+-- Annotated images move from the row (base64 TEXT) to object storage; the row keeps the key.
+-- annotated_image is dropped by 0003, after 0002 has uploaded its contents.
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS annotated_image_key VARCHAR;
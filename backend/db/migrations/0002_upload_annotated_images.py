@@ -0,0 +1,48 @@
+"""
+Backfill: upload the base64 annotated images still stored on submission rows
+to "{project_id}/annotated/{id}-0.png" and record the key (0 is the attempt of
+rows written before claims were counted, see 0008).
+"""
+
+import base64
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from services import minio_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+
+def upgrade(connection: Connection) -> None:
+    has_column = connection.execute(text(
+        "SELECT 1 FROM information_schema.columns"
+        " WHERE table_name = 'submissions' AND column_name = 'annotated_image'"
+    )).first()
+    if has_column is None:
+        return
+    uploaded = 0
+    while True:
+        rows = connection.execute(text(
+            "SELECT id, project_id, annotated_image FROM submissions"
+            " WHERE annotated_image IS NOT NULL AND annotated_image_key IS NULL"
+            " ORDER BY id LIMIT :limit"
+        ), {"limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        for submission_id, project_id, annotated_image in rows:
+            object_name = minio_client.upload_file(
+                bucket=str(project_id),
+                object_name=f"annotated/{submission_id}-0.png",
+                file_data=base64.b64decode(annotated_image),
+                content_type="image/png",
+            )
+            connection.execute(
+                text("UPDATE submissions SET annotated_image_key = :key WHERE id = :id"),
+                {"key": f"{project_id}/{object_name}", "id": submission_id},
+            )
+        uploaded += len(rows)
+    logger.info("[migrate] Uploaded %d annotated images", uploaded)
@@ -0,0 +1 @@
+ALTER TABLE submissions DROP COLUMN IF EXISTS annotated_image;
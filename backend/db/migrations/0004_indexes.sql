@@ -0,0 +1,12 @@
+-- Secondary indexes for the service-layer queries (see the end of db/schema.sql).
+-- On a large live database, create them beforehand with CREATE INDEX CONCURRENTLY
+-- (outside a transaction); IF NOT EXISTS then makes this migration a no-op.
+CREATE INDEX IF NOT EXISTS ix_projects_live_created_at ON projects (created_at) WHERE deleted_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_project_members_project_role ON project_members (project_id, role);
+CREATE INDEX IF NOT EXISTS ix_project_members_user_id ON project_members (user_id);
+CREATE INDEX IF NOT EXISTS ix_submissions_project_submitted ON submissions (project_id, submitted_at, id);
+CREATE INDEX IF NOT EXISTS ix_submissions_project_status_submitted ON submissions (project_id, status, submitted_at, id);
+CREATE INDEX IF NOT EXISTS ix_submissions_project_pass_fail_submitted ON submissions (project_id, pass_fail, submitted_at, id);
+CREATE INDEX IF NOT EXISTS ix_submissions_active ON submissions (status, submitted_at) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS ix_submissions_submitted_by_user_id ON submissions (submitted_by_user_id);
+CREATE INDEX IF NOT EXISTS ix_anomalies_submission_created ON anomalies (submission_id, created_at);
@@ -0,0 +1,13 @@
+-- Bounding boxes are drawn in a separate stage after the verdict is saved.
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS annotation_status VARCHAR;
+ALTER TABLE submissions DROP CONSTRAINT IF EXISTS submissions_annotation_status_check;
+ALTER TABLE submissions ADD CONSTRAINT submissions_annotation_status_check
+    CHECK (annotation_status IS NULL OR annotation_status IN ('pending', 'complete', 'skipped', 'failed'));
+
+-- Backfill: verdicts written before this stage existed were annotated inline, so
+-- they are finished: complete when an annotated image was stored, skipped otherwise.
+UPDATE submissions
+SET annotation_status = CASE WHEN annotated_image_key IS NOT NULL THEN 'complete' ELSE 'skipped' END
+WHERE annotation_status IS NULL AND status IN ('complete', 'failed');
+
+CREATE INDEX IF NOT EXISTS ix_submissions_annotation_pending ON submissions (submitted_at) WHERE annotation_status = 'pending';
@@ -0,0 +1,4 @@
+-- Queued and running submissions can be cancelled.
+ALTER TABLE submissions DROP CONSTRAINT IF EXISTS submissions_status_check;
+ALTER TABLE submissions ADD CONSTRAINT submissions_status_check
+    CHECK (status IN ('queued', 'running', 'complete', 'failed', 'error', 'timeout', 'cancelled'));
@@ -0,0 +1,3 @@
+-- Lease of a running submission, renewed by the worker that claimed it.
+-- Existing running rows keep NULL and are re-queued by the next worker pool to start.
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
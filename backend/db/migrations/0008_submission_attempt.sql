@@ -0,0 +1,2 @@
+-- Claims so far; results and annotations of an earlier claim are discarded after a retry.
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS attempt INT NOT NULL DEFAULT 0;
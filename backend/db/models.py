@@ -6,6 +6,7 @@ from sqlalchemy import (
     CheckConstraint,
     Double,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -85,6 +86,10 @@ class Project(Base):
     deleted_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
     detector_version: Mapped[str | None] = mapped_column(String)
 
+    __table_args__ = (
+        Index("ix_projects_live_created_at", "created_at", postgresql_where=text("deleted_at IS NULL")),
+    )
+
     # Relationships
     created_by_user: Mapped["User | None"] = relationship(
         back_populates="created_projects",
@@ -124,6 +129,8 @@ class ProjectMember(Base):
 
     __table_args__ = (
         CheckConstraint("role IN ('owner', 'editor', 'viewer')", name="project_members_role_check"),
+        Index("ix_project_members_project_role", "project_id", "role"),
+        Index("ix_project_members_user_id", "user_id"),
     )
 
     # Relationships
@@ -160,11 +167,17 @@ class Submission(Base):
     pass_fail: Mapped[str] = mapped_column(String, nullable=False)
     anomaly_count: Mapped[int | None] = mapped_column(Integer)
     error_message: Mapped[str | None] = mapped_column(Text)
-    annotated_image: Mapped[str | None] = mapped_column(Text)
+    annotated_image_key: Mapped[str | None] = mapped_column(String)  # e.g. "{project_id}/annotated/{id}-{attempt}.png"
+    # Bounding-box stage, after the verdict: pending | complete | skipped | failed (NULL until a verdict).
+    annotation_status: Mapped[str | None] = mapped_column(String)
+    # Lease of the worker process running the submission, renewed while it runs (NULL until claimed).
+    heartbeat_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # Claims so far; results and annotations of an earlier claim (before a retry) are discarded.
+    attempt: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
 
     __table_args__ = (
         CheckConstraint(
-            "status IN ('queued', 'running', 'complete', 'failed', 'error', 'timeout')",
+            "status IN ('queued', 'running', 'complete', 'failed', 'error', 'timeout', 'cancelled')",
             name="submissions_status_check",
         ),
         CheckConstraint(
@@ -175,6 +188,25 @@ class Submission(Base):
             "anomaly_count >= 0",
             name="submissions_anomaly_count_check",
         ),
+        CheckConstraint(
+            "annotation_status IS NULL OR annotation_status IN ('pending', 'complete', 'skipped', 'failed')",
+            name="submissions_annotation_status_check",
+        ),
+        Index("ix_submissions_project_submitted", "project_id", "submitted_at", "id"),
+        Index("ix_submissions_project_status_submitted", "project_id", "status", "submitted_at", "id"),
+        Index("ix_submissions_project_pass_fail_submitted", "project_id", "pass_fail", "submitted_at", "id"),
+        Index(
+            "ix_submissions_active",
+            "status",
+            "submitted_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index(
+            "ix_submissions_annotation_pending",
+            "submitted_at",
+            postgresql_where=text("annotation_status = 'pending'"),
+        ),
+        Index("ix_submissions_submitted_by_user_id", "submitted_by_user_id"),
     )
 
     # Relationships
@@ -219,6 +251,7 @@ class Anomaly(Base):
             "confidence IS NULL OR (confidence >= 0 AND confidence <= 1)",
             name="anomalies_confidence_check",
         ),
+        Index("ix_anomalies_submission_created", "submission_id", "created_at"),
     )
 
     # Relationships
@@ -60,7 +60,10 @@ CREATE TABLE submissions (
     pass_fail VARCHAR NOT NULL,
     anomaly_count INT,
     error_message TEXT,
-    annotated_image TEXT,
+    annotated_image_key VARCHAR,
+    annotation_status VARCHAR,
+    heartbeat_at TIMESTAMPTZ,
+    attempt INT NOT NULL DEFAULT 0,
 
     CONSTRAINT fk_submissions_project
         FOREIGN KEY (project_id)
@@ -73,13 +76,16 @@ CREATE TABLE submissions (
         ON DELETE RESTRICT,
 
     CONSTRAINT submissions_status_check
-        CHECK (status IN ('queued', 'running', 'complete', 'failed', 'error', 'timeout')),
+        CHECK (status IN ('queued', 'running', 'complete', 'failed', 'error', 'timeout', 'cancelled')),
 
     CONSTRAINT submissions_pass_fail_check
         CHECK (pass_fail IN ('pass', 'fail', 'unknown')),
 
     CONSTRAINT submissions_anomaly_count_check
-        CHECK (anomaly_count >= 0)
+        CHECK (anomaly_count >= 0),
+
+    CONSTRAINT submissions_annotation_status_check
+        CHECK (annotation_status IS NULL OR annotation_status IN ('pending', 'complete', 'skipped', 'failed'))
 );
 
 -- anomalies (depends on submissions)
@@ -104,4 +110,43 @@ CREATE TABLE anomalies (
         CHECK (confidence IS NULL OR (confidence >= 0 AND confidence <= 1))
 );
 
+-- indexes (keep in sync with __table_args__ in db/models.py)
+
+-- list_projects: live projects, newest first
+CREATE INDEX ix_projects_live_created_at ON projects (created_at) WHERE deleted_at IS NULL;
+
+-- owner lookup (transfer_ownership); user_id for memberships of a user and ON DELETE CASCADE
+CREATE INDEX ix_project_members_project_role ON project_members (project_id, role);
+CREATE INDEX ix_project_members_user_id ON project_members (user_id);
+
+-- list_submissions_for_project: keyset pages on (submitted_at, id), optionally filtered
+CREATE INDEX ix_submissions_project_submitted ON submissions (project_id, submitted_at, id);
+CREATE INDEX ix_submissions_project_status_submitted ON submissions (project_id, status, submitted_at, id);
+CREATE INDEX ix_submissions_project_pass_fail_submitted ON submissions (project_id, pass_fail, submitted_at, id);
+-- detection queue: claim oldest queued, re-queue running on startup
+CREATE INDEX ix_submissions_active ON submissions (status, submitted_at) WHERE status IN ('queued', 'running');
+-- annotation queue: failed inspections still waiting for bounding boxes (resumed on startup)
+CREATE INDEX ix_submissions_annotation_pending ON submissions (submitted_at) WHERE annotation_status = 'pending';
+-- ON DELETE RESTRICT check when a user is deleted
+CREATE INDEX ix_submissions_submitted_by_user_id ON submissions (submitted_by_user_id);
+
+-- list_anomalies_for_submission, ON DELETE CASCADE from submissions
+CREATE INDEX ix_anomalies_submission_created ON anomalies (submission_id, created_at);
+
+-- versioned migrations (db/migrations, applied by migrate.py); this schema already includes them all
+CREATE TABLE schema_migrations (
+    version VARCHAR PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO schema_migrations (version) VALUES
+    ('0001_annotated_image_key'),
+    ('0002_upload_annotated_images'),
+    ('0003_drop_annotated_image'),
+    ('0004_indexes'),
+    ('0005_annotation_status'),
+    ('0006_cancelled_status'),
+    ('0007_heartbeat_at'),
+    ('0008_submission_attempt');
+
 COMMIT;
\ No newline at end of file
@@ -3,7 +3,13 @@ from sqlalchemy.orm import sessionmaker, Session
 
 from core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -12,4 +18,19 @@ def get_db() -> Session:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def pool_stats() -> dict[str, int | float]:
+    """Connection pool utilization: checked_out / (pool_size + max_overflow)."""
+    pool = engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # negative until pool_size connections exist
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
@@ -0,0 +1,91 @@
+"""
+Ollama image wire-encoding benchmark
+
+Compares the OLLAMA_IMAGE_ENCODING modes (png, jpeg, passthrough) on the same prepared
+images: encode time, base64 payload size and, with --detect, whether the VLM reaches
+the same verdict and defect count as the lossless PNG baseline.
+
+Usage (from backend/):
+    python evaluation/benchmark_image_encoding.py
+    python evaluation/benchmark_image_encoding.py --images ../data/FOD_pictures/*.png --jpeg-quality 85 --detect
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.ollama_vlm import IMAGE_ENCODINGS, OllamaVLM
+from utils.image_prep import prepare_image
+
+DEFAULT_IMAGES = sorted((Path(__file__).parent.parent.parent / "data" / "FOD_pictures").glob("*.*"))
+
+
+def _time_encode(vlm: OllamaVLM, image, source: bytes, repeat: int) -> tuple[float, int]:
+    """Return (median encode ms, base64 payload bytes)."""
+    timings = []
+    payload = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = vlm._image_to_base64(image, source)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", nargs="+", type=Path, default=DEFAULT_IMAGES)
+    parser.add_argument("--model", type=str, default=None, help="Ollama model (default: OLLAMA_VLM_MODEL)")
+    parser.add_argument("--jpeg-quality", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5, help="Encode repetitions per image and mode")
+    parser.add_argument("--detect", action="store_true", help="Also run detection and compare against PNG")
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    models = {
+        mode: OllamaVLM(model_name=args.model, image_encoding=mode, jpeg_quality=args.jpeg_quality)
+        for mode in IMAGE_ENCODINGS
+    }
+
+    lines = [f"{'image':40} {'mode':12} {'encode ms':>10} {'payload KB':>11} {'verdict':>8} {'defects':>8} {'agrees':>7}"]
+    agreement = {mode: 0 for mode in IMAGE_ENCODINGS}
+
+    for image_path in args.images:
+        source = image_path.read_bytes()
+        image = prepare_image(source)
+        baseline = None
+
+        for mode, vlm in models.items():
+            encode_ms, payload_bytes = _time_encode(vlm, image, source, args.repeat)
+            verdict, defects, agrees = "-", "-", "-"
+            if args.detect:
+                result = vlm.detect_fod(image, source_bytes=source)
+                verdict, defects = result.pass_fail, len(result.defects or [])
+                if baseline is None:  # png runs first
+                    baseline = (verdict, defects)
+                same = (verdict, defects) == baseline
+                agreement[mode] += same
+                agrees = "yes" if same else "no"
+            lines.append(
+                f"{image_path.name[:40]:40} {mode:12} {encode_ms:10.1f} {payload_bytes / 1024:11.1f} "
+                f"{verdict:>8} {defects!s:>8} {agrees:>7}"
+            )
+
+    if args.detect:
+        lines.append("")
+        for mode, count in agreement.items():
+            lines.append(f"{mode}: {count}/{len(args.images)} images agree with png")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
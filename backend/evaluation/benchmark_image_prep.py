@@ -0,0 +1,117 @@
+"""
+Image preparation benchmark
+
+Compares utils/image_prep.prepare_image (JPEG draft decoding, reduce + LANCZOS) with the
+previous full decode -> RGB -> LANCZOS path on the same files: median decode time and
+peak RSS. Each (image, mode) runs in a fresh subprocess, so the peak RSS of the two
+modes differs only by what the decode itself allocated (interpreter, Pillow and the
+file bytes are the same in both).
+
+Without --images, a synthetic 24 MP camera-sized JPEG (about 25 MB) is generated.
+
+Usage (from backend/):
+    python evaluation/benchmark_image_prep.py
+    python evaluation/benchmark_image_prep.py --images ~/photos/*.jpg ../data/FOD_pictures/*.png --repeat 5
+"""
+
+import argparse
+import io
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from utils.image_prep import MAX_DIMENSION, prepare_image
+
+MODES = ("full-decode", "prepare_image")
+
+
+def _full_decode(data: bytes) -> Image.Image:
+    """The implementation prepare_image replaced."""
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    w, h = image.size
+    if max(w, h) > MAX_DIMENSION:
+        ratio = min(MAX_DIMENSION / w, MAX_DIMENSION / h)
+        image = image.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
+    return image
+
+
+def _synthetic_jpeg(path: Path) -> None:
+    noise = Image.effect_noise((6000, 4000), 64)
+    image = Image.merge("RGB", (noise, noise.rotate(180), noise.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    image.save(path, format="JPEG", quality=95)
+
+
+def _run_worker(mode: str, image_path: Path, repeat: int) -> None:
+    """Subprocess entry point: print {"ms": median ms, "peak_rss_mb": process peak RSS} as JSON."""
+    data = image_path.read_bytes()
+    prepare = prepare_image if mode == "prepare_image" else _full_decode
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        prepare(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(json.dumps({"ms": statistics.median(timings), "peak_rss_mb": peak_kb / 1024}))
+
+
+def _measure(mode: str, image_path: Path, repeat: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--repeat", str(repeat), "--images", str(image_path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", nargs="+", type=Path, default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="Decodes per image and mode")
+    parser.add_argument("--worker", choices=MODES, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=str, default=None)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args.worker, args.images[0], args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = args.images
+        if not images:
+            images = [Path(tmp) / "synthetic_6000x4000.jpg"]
+            _synthetic_jpeg(images[0])
+
+        lines = [f"{'image':40} {'MB':>6} {'mode':14} {'decode ms':>10} {'peak RSS MB':>12}"]
+        for image_path in images:
+            size_mb = image_path.stat().st_size / (1024 * 1024)
+            results = {mode: _measure(mode, image_path, args.repeat) for mode in MODES}
+            for mode, result in results.items():
+                lines.append(
+                    f"{image_path.name[:40]:40} {size_mb:6.1f} {mode:14} {result['ms']:10.1f} {result['peak_rss_mb']:12.1f}"
+                )
+            old, new = results["full-decode"], results["prepare_image"]
+            lines.append(
+                f"{'':40} {'':6} {'saving':14} {old['ms'] / new['ms']:9.1f}x "
+                f"{old['peak_rss_mb'] - new['peak_rss_mb']:+11.1f}"
+            )
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+        print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
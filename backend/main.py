@@ -19,6 +19,7 @@ from routers.users import router as users_router
 from routers.submissions import router as submissions_router
 from routers.anomalies import router as anomalies_router
 from routers.project_members import router as project_members_router
+from routers.metrics import router as metrics_router
 
 from core import exceptions
 from core.exception_handlers import (
@@ -30,9 +31,13 @@ from core.exception_handlers import (
     permission_denied_handler,
     conflict_error_handler,
     invalid_state_transition_handler,
+    invalid_cursor_handler,
 )
+from models.ollama_vlm import close_models
 from models.owlv2 import preload_owlv2
 from seed_data import run_seed_minio_only
+from services.detection_service import start_detection_workers, stop_detection_workers
+from services.purge_service import start_purge_workers, stop_purge_workers
 
 logging.basicConfig(level=logging.INFO)
 
@@ -51,7 +56,12 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 async def lifespan(app: FastAPI):
     run_seed_minio_only()
     threading.Thread(target=preload_owlv2, daemon=True).start()
+    start_detection_workers()
+    start_purge_workers()
     yield
+    stop_purge_workers()
+    stop_detection_workers()
+    await close_models()
 
 
 app = FastAPI(
@@ -84,6 +94,7 @@ app.include_router(submissions_router)
 app.include_router(anomalies_router)
 app.include_router(storage_router)
 app.include_router(detect_router)
+app.include_router(metrics_router)
 
 # Register global exception handlers
 app.add_exception_handler(exceptions.ProjectNotFound, project_not_found_handler)
@@ -94,6 +105,7 @@ app.add_exception_handler(exceptions.SubmissionNotFound, submission_not_found_ha
 app.add_exception_handler(exceptions.PermissionDenied, permission_denied_handler)
 app.add_exception_handler(exceptions.ConflictError, conflict_error_handler)
 app.add_exception_handler(exceptions.InvalidStateTransition, invalid_state_transition_handler)
+app.add_exception_handler(exceptions.InvalidCursor, invalid_cursor_handler)
 
 
 @app.get("/")
@@ -0,0 +1,92 @@
+"""
+Apply the versioned schema migrations in db/migrations/ to an existing database.
+
+Databases created from db/schema.sql are already at the latest version: schema.sql
+records every migration in schema_migrations. Databases created before that table
+existed are migrated from the first version; each migration also runs against a
+schema that already has its change (IF NOT EXISTS, or a check first).
+
+Each migration runs in its own transaction and is then recorded in schema_migrations.
+"NNNN_name.sql" files are executed as they are; "NNNN_name.py" files define
+upgrade(connection), for backfills SQL cannot do (e.g. moving data to object storage).
+
+Usage (from backend/):
+    python migrate.py           # apply pending migrations
+    python migrate.py --list    # show applied and pending versions
+"""
+
+import argparse
+import importlib.util
+import logging
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from db.session import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "db" / "migrations"
+_MIGRATION_FILE = re.compile(r"^\d{4}_\w+\.(sql|py)$")
+
+
+def migrations() -> list[Path]:
+    """Migration files in the order they apply (by their numeric prefix)."""
+    return sorted(path for path in MIGRATIONS_DIR.iterdir() if _MIGRATION_FILE.match(path.name))
+
+
+def applied_versions(connection: Connection) -> set[str]:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR PRIMARY KEY,"
+        " applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW())"
+    ))
+    return set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def _run(connection: Connection, path: Path) -> None:
+    if path.suffix == ".sql":
+        connection.exec_driver_sql(path.read_text())
+        return
+    spec = importlib.util.spec_from_file_location(f"migration_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(connection)
+
+
+def upgrade(engine: Engine) -> list[str]:
+    """Apply every pending migration, oldest first. Returns the versions applied."""
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    applied = []
+    for path in migrations():
+        if path.stem in done:
+            continue
+        logger.info("[migrate] Applying %s", path.name)
+        with engine.begin() as connection:
+            _run(connection, path)
+            connection.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": path.stem})
+        applied.append(path.stem)
+    return applied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--list", action="store_true", help="Show applied and pending versions, apply nothing")
+    args = parser.parse_args()
+
+    if args.list:
+        with engine.begin() as connection:
+            done = applied_versions(connection)
+        for path in migrations():
+            logger.info("[migrate] %s %s", "applied" if path.stem in done else "pending", path.stem)
+        return
+    applied = upgrade(engine)
+    logger.info("[migrate] %d migration(s) applied", len(applied))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
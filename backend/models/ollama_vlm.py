@@ -3,20 +3,44 @@ Ollama-based VLM for FOD Detection
 Uses Qwen2.5-VL by default (ollama pull qwen2.5vl or qwen2.5vl:7b).
 """
 
+import asyncio
 import base64
 import io
+import json
 import os
 import re
+import threading
 import time
-from typing import Optional
+from typing import AsyncIterator, Optional
+
+import httpx
 import requests
-from PIL import Image
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from PIL import ExifTags, Image
 
+from core.config import settings
 from schemas.detection import DetectionResponse, DefectSchema
 
 # Default: Qwen2.5-VL 7B. Override with env OLLAMA_VLM_MODEL (e.g. qwen2.5vl:72b).
 DEFAULT_MODEL = os.environ.get("OLLAMA_VLM_MODEL", "qwen2.5vl:7b")
 
+# How images are encoded for the Ollama request body (OLLAMA_IMAGE_ENCODING):
+#   "png"         lossless re-encode of the prepared image (slowest, largest payload)
+#   "jpeg"        re-encode at OLLAMA_JPEG_QUALITY
+#   "passthrough" send the uploaded file's bytes untouched when the prepared image is
+#                 pixel-identical to them (no resize / mode change); otherwise JPEG
+IMAGE_ENCODINGS = ("png", "jpeg", "passthrough")
+
+# Generation can take minutes on CPU; connecting should not.
+OLLAMA_TIMEOUT_SECONDS = 300
+OLLAMA_CONNECT_TIMEOUT_SECONDS = 10
+
+
+class DetectionCancelled(Exception):
+    """detect_fod() was cancelled; its Ollama request was closed before the answer completed."""
+
+
 def _parse_pass_fail(response: str) -> str:
     """Extract pass/fail from response. Expects 'RESULT: PASS' or 'RESULT: FAIL'."""
     lower = response.lower().strip()
@@ -101,37 +125,81 @@ def _append_continuation(entries: list[dict], line: str) -> None:
         entries[-1]["description"] += f" — {extra}"
 
 
-def _parse_defects_from_response(response: str) -> list[DefectSchema]:
-    """Parse VLM response into defects."""
-    entries: list[dict] = []
-    current_severity: Optional[str] = None
-    defect_index = 0
+class IncrementalDefectParser:
+    """
+    Line-oriented defect parser that accepts VLM output in arbitrary chunks.
+
+    feed() returns each defect as soon as its bullet line is complete (the newline has
+    arrived); finish() flushes a final line without a trailing newline. Bullets are only
+    recognised under the "FOD DETECTED:" header, and metadata lines are skipped.
+    """
+
+    def __init__(self):
+        self.entries: list[dict] = []
+        self._current_severity: Optional[str] = None
+        self._buffer = ""
 
-    for line in response.splitlines():
+    def feed(self, text: str) -> list[DefectSchema]:
+        self._buffer += text
+        lines = self._buffer.splitlines(keepends=True)
+        self._buffer = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        return [defect for line in lines if (defect := self._parse_line(line.rstrip("\r\n")))]
+
+    def finish(self) -> list[DefectSchema]:
+        line, self._buffer = self._buffer, ""
+        defect = self._parse_line(line) if line else None
+        return [defect] if defect else []
+
+    @property
+    def defects(self) -> list[DefectSchema]:
+        return [DefectSchema(id=e["id"], severity=e["severity"], description=e["description"]) for e in self.entries]
+
+    def _parse_line(self, line: str) -> Optional[DefectSchema]:
         if severity := _severity_from_line(line):
-            current_severity = severity
+            self._current_severity = severity
 
         stripped = line.lower().strip()
-        if entries and _is_continuation_line(stripped):
-            continue
+        if self.entries and _is_continuation_line(stripped):
+            return None
 
         bullet_match = re.match(r"^[\s]*[•\-*]\s*(.+)", line)
-        if bullet_match and current_severity:
-            entry = _parse_one_bullet(bullet_match[1].strip(), current_severity, defect_index)
+        if bullet_match and self._current_severity:
+            entry = _parse_one_bullet(bullet_match[1].strip(), self._current_severity, len(self.entries))
             if entry:
-                entries.append(entry)
-                defect_index += 1
+                self.entries.append(entry)
+                return DefectSchema(id=entry["id"], severity=entry["severity"], description=entry["description"])
+        return None
+
 
-    defects = [
-        DefectSchema(id=e["id"], severity=e["severity"], description=e["description"])
-        for e in entries
-    ]
+def _parse_defects_from_response(response: str) -> list[DefectSchema]:
+    """Parse VLM response into defects."""
+    parser = IncrementalDefectParser()
+    parser.feed(response)
+    parser.finish()
+
+    defects = parser.defects
     fallback = _fallback_defect(response)
     if not defects and fallback:
         defects.append(fallback)
     return defects
 
 
+def _is_unmodified(image: Image.Image, source_bytes: bytes) -> bool:
+    """
+    True if source_bytes is a PNG/JPEG with the same size and mode as image (header parse only).
+    An EXIF orientation means preparation rotated or flipped the pixels, even when the size matches.
+    """
+    try:
+        with Image.open(io.BytesIO(source_bytes)) as source:
+            return (
+                source.format in ("PNG", "JPEG")
+                and source.size == image.size
+                and source.mode == image.mode
+                and source.getexif().get(ExifTags.Base.Orientation, 1) == 1
+            )
+    except Exception:
+        return False
+
 
 def get_mock_detection_response() -> DetectionResponse:
     """Return a mock detection result when Ollama is unavailable (e.g. not running or timeout)."""
@@ -166,15 +234,48 @@ class OllamaVLM:
     def __init__(
         self,
         model_name: Optional[str] = None,
-        ollama_host: str = "http://localhost:11434"
+        ollama_host: str = "http://localhost:11434",
+        image_encoding: Optional[str] = None,
+        jpeg_quality: Optional[int] = None,
     ):
         self.model_name = model_name if model_name is not None else DEFAULT_MODEL
         self.ollama_host = ollama_host
+        self.image_encoding = image_encoding if image_encoding is not None else settings.OLLAMA_IMAGE_ENCODING
+        if self.image_encoding not in IMAGE_ENCODINGS:
+            raise ValueError(f"Unknown image encoding {self.image_encoding!r}; expected one of {IMAGE_ENCODINGS}")
+        self.jpeg_quality = jpeg_quality if jpeg_quality is not None else settings.OLLAMA_JPEG_QUALITY
         self.is_loaded = False
 
+        # Both clients keep connections alive across requests: the session serves the
+        # detection worker threads, the async client serves the /detect route.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=settings.OLLAMA_MAX_CONNECTIONS)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.ollama_host,
+                timeout=httpx.Timeout(OLLAMA_TIMEOUT_SECONDS, connect=OLLAMA_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                ),
+            )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on application shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self._session.close()
+
     def load_model(self) -> bool:
         try:
-            response = requests.get(f"{self.ollama_host}/api/tags", timeout=10)
+            response = self._session.get(f"{self.ollama_host}/api/tags", timeout=OLLAMA_CONNECT_TIMEOUT_SECONDS)
             if response.status_code == 200:
                 self.is_loaded = True
                 return True
@@ -182,50 +283,232 @@ class OllamaVLM:
         except requests.exceptions.ConnectionError:
             return False
 
-    def detect_fod(self, image: Image.Image, prompt: Optional[str] = None, spec_text: Optional[str] = None) -> DetectionResponse:
+    async def aload_model(self) -> bool:
+        try:
+            response = await self._get_async_client().get("/api/tags", timeout=OLLAMA_CONNECT_TIMEOUT_SECONDS)
+        except httpx.ConnectError:
+            return False
+        if response.status_code == 200:
+            self.is_loaded = True
+            return True
+        return False
+
+    def detect_fod(
+        self,
+        image: Image.Image,
+        prompt: Optional[str] = None,
+        spec_text: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> DetectionResponse:
         """
         Analyze an image for quality / defect detection using the configured VLM.
 
         Args:
-            image: PIL Image to analyze (converted to base64 PNG).
+            image: PIL Image to analyze (base64-encoded according to image_encoding).
             prompt: Custom full prompt for the VLM. If None, a generic prompt is built from spec_text or default.
             spec_text: Optional specification text (e.g. from design PDFs). When provided, the model is asked
                        to inspect the image according to this specification. Ignored if prompt is set.
+            source_bytes: Original file bytes the image was decoded from; sent as-is in "passthrough"
+                          mode when the image was not resized or converted.
+            cancel: When given, the answer is streamed and the request is closed as soon as the
+                    event is set (Ollama stops generating for a closed connection).
 
         Returns:
             DetectionResponse containing the model's response, model name, and inference time.
+
+        Raises:
+            DetectionCancelled: cancel was set before the answer completed.
         """
         if not self.is_loaded:
             self.load_model()
 
-        if prompt is None:
-            if spec_text and spec_text.strip():
-                prompt = self._build_spec_prompt(spec_text.strip())
-            else:
-                prompt = self._default_generic_prompt()
+        prompt = self._resolve_prompt(prompt, spec_text)
+        image_base64 = self._image_to_base64(image, source_bytes)
 
-        image_base64 = self._image_to_base64(image)
+        start_time = time.time()
 
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "images": [image_base64],
-            "stream": False
-        }
+        if cancel is not None:
+            status_code, raw_response = self._generate_cancellable(prompt, image_base64, cancel)
+        else:
+            response = self._session.post(
+                f"{self.ollama_host}/api/generate",
+                json=self._generate_payload(prompt, image_base64, stream=False),
+                timeout=(OLLAMA_CONNECT_TIMEOUT_SECONDS, OLLAMA_TIMEOUT_SECONDS),
+            )
+            status_code = response.status_code
+            raw_response = response.json().get("response", "") if status_code == 200 else None
 
-        start_time = time.time()
+        inference_time = (time.time() - start_time) * 1000
+        return self._build_detection_response(status_code, raw_response, prompt, inference_time)
 
-        response = requests.post(
+    def _generate_cancellable(
+        self,
+        prompt: str,
+        image_base64: str,
+        cancel: threading.Event,
+    ) -> tuple[int, Optional[str]]:
+        """
+        Streaming /api/generate on the pooled session, checking cancel between tokens.
+        Returns (status_code, response text or None). Like the non-streaming request, the whole
+        answer must arrive within OLLAMA_TIMEOUT_SECONDS; requests.exceptions.Timeout otherwise.
+        """
+        if cancel.is_set():
+            raise DetectionCancelled()
+        deadline = time.monotonic() + OLLAMA_TIMEOUT_SECONDS
+        tokens: list[str] = []
+        # Leaving the block before the body is consumed closes the connection instead of pooling it.
+        with self._session.post(
             f"{self.ollama_host}/api/generate",
-            json=payload,
-            timeout=300
-        )
+            json=self._generate_payload(prompt, image_base64, stream=True),
+            timeout=(OLLAMA_CONNECT_TIMEOUT_SECONDS, OLLAMA_TIMEOUT_SECONDS),
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                return response.status_code, None
+            try:
+                for line in response.iter_lines():
+                    if cancel.is_set():
+                        raise DetectionCancelled()
+                    if time.monotonic() > deadline:
+                        raise requests.exceptions.Timeout(
+                            f"No complete answer from Ollama within {OLLAMA_TIMEOUT_SECONDS} s"
+                        )
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    tokens.append(chunk.get("response", ""))
+            except requests.exceptions.ConnectionError as exc:
+                # requests reports a read timeout while streaming the body as a ConnectionError.
+                if exc.args and isinstance(exc.args[0], ReadTimeoutError):
+                    raise requests.exceptions.ReadTimeout(exc.args[0]) from exc
+                raise
+        if cancel.is_set():
+            raise DetectionCancelled()
+        return 200, "".join(tokens)
+
+    async def adetect_fod(
+        self,
+        image: Image.Image,
+        prompt: Optional[str] = None,
+        spec_text: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+        stream: bool = False,
+    ) -> DetectionResponse:
+        """
+        Async variant of detect_fod over the pooled httpx client; does not block the event loop.
+
+        With stream=True the response is read token by token ("stream": true) and assembled,
+        so the read timeout applies between tokens rather than to the whole generation.
+        Raises httpx.ConnectError / httpx.TimeoutException when Ollama is unreachable.
+        """
+        if not self.is_loaded:
+            await self.aload_model()
+
+        prompt = self._resolve_prompt(prompt, spec_text)
+        image_base64 = await asyncio.to_thread(self._image_to_base64, image, source_bytes)
+
+        start_time = time.time()
+
+        if stream:
+            try:
+                raw_response = "".join([token async for token in self.astream_generate(prompt, image_base64)])
+                status_code = 200
+            except httpx.HTTPStatusError as exc:
+                raw_response, status_code = None, exc.response.status_code
+        else:
+            response = await self._get_async_client().post(
+                "/api/generate",
+                json=self._generate_payload(prompt, image_base64, stream=False),
+            )
+            status_code = response.status_code
+            raw_response = response.json().get("response", "") if status_code == 200 else None
 
         inference_time = (time.time() - start_time) * 1000
+        return self._build_detection_response(status_code, raw_response, prompt, inference_time)
 
-        if response.status_code == 200:
-            raw_response = response.json().get("response", "")
-            print(raw_response)
+    async def astream_generate(self, prompt: str, image_base64: str) -> AsyncIterator[str]:
+        """
+        Yield response tokens from /api/generate with "stream": true as they arrive.
+        Raises httpx.HTTPStatusError on a non-200 status and RuntimeError if Ollama reports an error.
+        """
+        payload = self._generate_payload(prompt, image_base64, stream=True)
+        async with self._get_async_client().stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                token = chunk.get("response", "")
+                if token:
+                    yield token
+                if chunk.get("done"):
+                    break
+
+    async def astream_detect_fod(
+        self,
+        image: Image.Image,
+        prompt: Optional[str] = None,
+        spec_text: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> AsyncIterator[tuple[str, object]]:
+        """
+        Streaming detection. Yields ("token", str) for every generated chunk, ("defect", DefectSchema)
+        as soon as a defect bullet line is complete, and finally ("result", DetectionResponse)
+        parsed from the full text exactly as detect_fod would.
+        Raises httpx.ConnectError / httpx.TimeoutException when Ollama is unreachable.
+        """
+        if not self.is_loaded:
+            await self.aload_model()
+
+        prompt = self._resolve_prompt(prompt, spec_text)
+        image_base64 = await asyncio.to_thread(self._image_to_base64, image, source_bytes)
+        parser = IncrementalDefectParser()
+        tokens: list[str] = []
+        status_code = 200
+
+        start_time = time.time()
+        try:
+            async for token in self.astream_generate(prompt, image_base64):
+                tokens.append(token)
+                yield "token", token
+                for defect in parser.feed(token):
+                    yield "defect", defect
+            for defect in parser.finish():
+                yield "defect", defect
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+        inference_time = (time.time() - start_time) * 1000
+
+        raw_response = "".join(tokens) if status_code == 200 else None
+        yield "result", self._build_detection_response(status_code, raw_response, prompt, inference_time)
+
+    def _resolve_prompt(self, prompt: Optional[str], spec_text: Optional[str]) -> str:
+        if prompt is not None:
+            return prompt
+        return self.get_prompt_for_spec(spec_text)
+
+    def _generate_payload(self, prompt: str, image_base64: str, stream: bool) -> dict:
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "images": [image_base64],
+            "stream": stream,
+        }
+
+    def _build_detection_response(
+        self,
+        status_code: int,
+        raw_response: Optional[str],
+        prompt: str,
+        inference_time: float,
+    ) -> DetectionResponse:
+        if status_code == 200:
+            raw_response = raw_response or ""
             pass_fail = _parse_pass_fail(raw_response)
             defects = _parse_defects_from_response(raw_response)
             if pass_fail == "fail" and not defects:
@@ -246,7 +529,7 @@ class OllamaVLM:
                 prompt_used=prompt,
             )
         else:
-            error = f"Error: {response.status_code}"
+            error = f"Error: {status_code}"
             return DetectionResponse(
                 response=error,
                 model=self.model_name,
@@ -305,10 +588,20 @@ class OllamaVLM:
             + self._format_rules()
         )
 
-    def _image_to_base64(self, image: Image.Image) -> str:
+    def _image_to_base64(self, image: Image.Image, source_bytes: Optional[bytes] = None) -> str:
+        return base64.b64encode(self._encode_image(image, source_bytes)).decode("utf-8")
+
+    def _encode_image(self, image: Image.Image, source_bytes: Optional[bytes] = None) -> bytes:
+        """Return the image bytes to send to Ollama according to self.image_encoding."""
+        if self.image_encoding == "passthrough" and source_bytes and _is_unmodified(image, source_bytes):
+            return source_bytes
+
         buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+        if self.image_encoding == "png":
+            image.save(buffer, format="PNG")
+        else:
+            image.convert("RGB").save(buffer, format="JPEG", quality=self.jpeg_quality)
+        return buffer.getvalue()
 
     def get_prompt_for_spec(self, spec_text: str | None) -> str:
         """Return the full prompt (generic + spec) that would be sent to the VLM for the given spec text."""
@@ -325,3 +618,9 @@ def get_model(model_name: Optional[str] = None) -> OllamaVLM:
     if name not in _instances:
         _instances[name] = OllamaVLM(model_name=name)
     return _instances[name]
+
+
+async def close_models() -> None:
+    """Close the pooled Ollama connections of every cached model."""
+    for model in _instances.values():
+        await model.aclose()
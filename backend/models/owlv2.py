@@ -8,12 +8,19 @@ Model: google/owlv2-base-patch16-ensemble (~600 MB, downloaded on first use)
 import base64
 import io
 import logging
+import queue
 import re
 import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from typing import Optional
 
 from PIL import Image, ImageDraw
 
+from core.config import settings
+
 logger = logging.getLogger(__name__)
 
 # Set by default so callers proceed immediately when no pre-load was scheduled.
@@ -67,6 +74,42 @@ class OWLv2Detector:
         self._model.eval()
         logger.info("OWLv2 model loaded on %s.", self._device)
 
+    def detect_batch(
+        self,
+        images: list[Image.Image],
+        queries_per_image: list[list[str]],
+        threshold: float = 0.1,
+    ) -> list[dict[int, tuple[float, list]]]:
+        """
+        Run one forward pass over several images, each with its own text queries.
+
+        The processor pads every image's query list to the longest one; boxes matched
+        to padding queries are dropped. For each image, only the highest-confidence
+        box per query above threshold is kept.
+
+        Returns:
+            One {query_index: (score, [x1, y1, x2, y2])} dict per image.
+        """
+        import torch
+
+        self._load()
+
+        inputs = self._processor(text=queries_per_image, images=images, return_tensors="pt", truncation=True)
+        inputs = {k: v.to(self._device) for k, v in inputs.items()}
+        with torch.no_grad():
+            outputs = self._model(**inputs)
+
+        target_sizes = torch.tensor([image.size[::-1] for image in images], device=self._device)  # (H, W)
+        results = self._processor.image_processor.post_process_object_detection(
+            outputs=outputs,
+            threshold=threshold,
+            target_sizes=target_sizes,
+        )
+        return [
+            _best_box_per_query(result, len(queries))
+            for result, queries in zip(results, queries_per_image)
+        ]
+
     def annotate(
         self,
         image: Image.Image,
@@ -89,50 +132,146 @@ class OWLv2Detector:
         Returns:
             Annotated PIL Image. Returns original image unchanged if no detections.
         """
-        import torch
-
-        self._load()
         if not queries:
             return image
+        best = self.detect_batch([image], [queries], threshold)[0]
+        return draw_boxes(image, best, severity_map)
 
-        severity_map = severity_map or {}
 
-        inputs = self._processor(text=[queries], images=image, return_tensors="pt", truncation=True)
-        inputs = {k: v.to(self._device) for k, v in inputs.items()}
-        with torch.no_grad():
-            outputs = self._model(**inputs)
+def _best_box_per_query(result: dict, num_queries: int) -> dict[int, tuple[float, list]]:
+    """Keep the top-scoring box per query to reduce noise; ignore padding queries."""
+    best: dict[int, tuple[float, list]] = {}
+    for box, score, label_idx in zip(result["boxes"].tolist(), result["scores"].tolist(), result["labels"].tolist()):
+        if label_idx >= num_queries:
+            continue
+        if label_idx not in best or score > best[label_idx][0]:
+            best[label_idx] = (score, box)
+    return best
 
-        target_sizes = torch.tensor([image.size[::-1]], device=self._device)  # (H, W)
-        results = self._processor.image_processor.post_process_object_detection(
-            outputs=outputs,
-            threshold=threshold,
-            target_sizes=target_sizes,
-        )[0]
 
-        boxes = results["boxes"].tolist()
-        scores = results["scores"].tolist()
-        labels = results["labels"].tolist()
+def draw_boxes(
+    image: Image.Image,
+    best: dict[int, tuple[float, list]],
+    severity_map: dict[int, str] | None = None,
+) -> Image.Image:
+    """Draw one box per query on a copy of the image. Returns the original if there are none."""
+    if not best:
+        return image
 
-        if not boxes:
-            return image
+    severity_map = severity_map or {}
+    annotated = image.copy().convert("RGB")
+    draw = ImageDraw.Draw(annotated)
+
+    for label_idx, (score, box) in best.items():
+        x1, y1, x2, y2 = box
+        sev = severity_map.get(label_idx, "")
+        color = _SEVERITY_COLORS.get(sev, _DEFAULT_COLOR)
+
+        draw.rectangle([x1, y1, x2, y2], outline=color, width=3)
+
+    return annotated
+
+
+# ── Micro-batching ────────────────────────────────────────────────────────────
 
-        # Keep only the top-scoring box per query to reduce noise
-        best: dict[int, tuple[float, list]] = {}
-        for box, score, label_idx in zip(boxes, scores, labels):
-            if label_idx not in best or score > best[label_idx][0]:
-                best[label_idx] = (score, box)
+@dataclass
+class _DetectionRequest:
+    image: Image.Image
+    queries: list[str]
+    threshold: float
+    future: Future = field(default_factory=Future)
 
-        annotated = image.copy().convert("RGB")
-        draw = ImageDraw.Draw(annotated)
 
-        for label_idx, (score, box) in best.items():
-            x1, y1, x2, y2 = box
-            sev = severity_map.get(label_idx, "")
-            color = _SEVERITY_COLORS.get(sev, _DEFAULT_COLOR)
+class OWLv2BatchAnnotator:
+    """
+    Gathers annotate()/detect() calls from concurrent detection workers into batched forward passes.
 
-            draw.rectangle([x1, y1, x2, y2], outline=color, width=3)
+    The first request waits up to max_wait_ms for others to arrive; up to max_batch_size
+    images then go through OWLv2 together and each caller gets back its own result.
+    With max_batch_size <= 1, calls go straight to the detector.
+    """
 
-        return annotated
+    def __init__(self, detector: OWLv2Detector, max_batch_size: int, max_wait_ms: float):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._requests: queue.Queue[_DetectionRequest] = queue.Queue()
+        self._dispatcher: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def annotate(
+        self,
+        image: Image.Image,
+        queries: list[str],
+        severity_map: dict[int, str] | None = None,
+        threshold: float = 0.1,
+    ) -> Image.Image:
+        """Same contract as OWLv2Detector.annotate; blocks until this image's batch has run."""
+        if not queries:
+            return image
+        if self.max_batch_size <= 1:
+            return self.detector.annotate(image, queries, severity_map, threshold)
+        return draw_boxes(image, self.detect(image, queries, threshold), severity_map)
+
+    def detect(
+        self,
+        image: Image.Image,
+        queries: list[str],
+        threshold: float = 0.1,
+    ) -> dict[int, tuple[float, list]]:
+        """Best box per query ({query_index: (score, box)}) without drawing; batched like annotate."""
+        if not queries:
+            return {}
+        if self.max_batch_size <= 1:
+            return self.detector.detect_batch([image], [queries], threshold)[0]
+
+        request = _DetectionRequest(image, queries, threshold)
+        self._ensure_dispatcher()
+        self._requests.put(request)
+        return request.future.result()
+
+    def _ensure_dispatcher(self) -> None:
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_forever, name="owlv2-batcher", daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch_forever(self) -> None:
+        while True:
+            self._run_batch(self._collect_batch())
+
+    def _collect_batch(self) -> list[_DetectionRequest]:
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batch(self, batch: list[_DetectionRequest]) -> None:
+        # post_process_object_detection takes one threshold, so group by it (normally one group)
+        by_threshold: dict[float, list[_DetectionRequest]] = {}
+        for request in batch:
+            by_threshold.setdefault(request.threshold, []).append(request)
+
+        for threshold, requests in by_threshold.items():
+            try:
+                results = self.detector.detect_batch(
+                    [r.image for r in requests],
+                    [r.queries for r in requests],
+                    threshold,
+                )
+            except Exception as exc:
+                for request in requests:
+                    request.future.set_exception(exc)
+                continue
+            for request, best in zip(requests, results):
+                request.future.set_result(best)
 
 
 def image_to_base64(image: Image.Image) -> str:
@@ -222,6 +361,76 @@ def build_queries_and_severity_map(
     return queries, severity_map
 
 
+# ── Speculative localization ──────────────────────────────────────────────────
+
+# Common FOD objects; those a project's spec mentions join its speculative vocabulary.
+FOD_BASE_VOCABULARY: tuple[str, ...] = (
+    "bolt", "screw", "nut", "washer", "rivet", "pin", "fastener", "wrench", "screwdriver",
+    "pliers", "hammer", "tool", "rag", "cloth", "glove", "wire", "safety wire", "cable tie",
+    "tape", "rock", "stone", "metal fragment", "plastic fragment", "paper", "bottle", "cap",
+)
+# Always searched, so an object outside the vocabulary still has a generic box to match.
+FOD_FALLBACK_QUERIES: tuple[str, ...] = ("foreign object", "debris", "tool")
+
+
+def _query_tokens(text: str) -> list[str]:
+    """Lower-case alphabetic words with a plural "s" dropped ("Bolts" -> "bolt")."""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in re.findall(r"[a-z]+", text.lower())
+    ]
+
+
+def build_fod_vocabulary(
+    spec_text: str | None,
+    past_descriptions: list[str],
+    max_terms: int,
+) -> list[str]:
+    """
+    OWLv2 queries to run before the VLM has answered: the project's most frequent past
+    defect queries, base FOD objects its spec mentions, then the generic fallbacks.
+    """
+    past = Counter(
+        query.lower() for query in (_defect_to_query(d) for d in past_descriptions if d) if query
+    )
+    spec_tokens = " ".join(_query_tokens(spec_text or ""))
+    in_spec = [term for term in FOD_BASE_VOCABULARY if re.search(rf"\b{re.escape(term)}\b", spec_tokens)]
+
+    vocabulary: list[str] = []
+    for term in [q for q, _ in past.most_common()] + in_spec + list(FOD_FALLBACK_QUERIES):
+        if term not in vocabulary:
+            vocabulary.append(term)
+    # Keep room for the fallbacks when the project vocabulary is long.
+    head = [t for t in vocabulary if t not in FOD_FALLBACK_QUERIES][: max(max_terms - len(FOD_FALLBACK_QUERIES), 0)]
+    return (head + list(FOD_FALLBACK_QUERIES))[:max_terms]
+
+
+_MATCH_STOPWORDS = frozenset({"a", "an", "the", "on", "in", "at", "of", "near", "by", "to", "from", "with", "and", "or"})
+
+
+def match_queries_to_vocabulary(queries: list[str], vocabulary: list[str]) -> dict[int, int]:
+    """
+    Map each VLM-derived query index to the vocabulary term describing the same object:
+    the term sharing the most words with it (ties go to the shorter, more generic term).
+    Queries sharing no word with any term are left out.
+    """
+    vocab_tokens = [set(_query_tokens(term)) - _MATCH_STOPWORDS for term in vocabulary]
+    matches: dict[int, int] = {}
+    for query_index, query in enumerate(queries):
+        tokens = set(_query_tokens(query)) - _MATCH_STOPWORDS
+        best: tuple[int, int, int] | None = None  # (shared words, -term length, vocabulary index)
+        for vocab_index, term_tokens in enumerate(vocab_tokens):
+            shared = len(tokens & term_tokens)
+            if shared == 0:
+                continue
+            candidate = (shared, -len(term_tokens), vocab_index)
+            if best is None or candidate[:2] > best[:2]:
+                best = candidate
+        if best is not None:
+            matches[query_index] = best[2]
+    return matches
+
+
 _detector: Optional[OWLv2Detector] = None
 
 
@@ -232,6 +441,21 @@ def get_owlv2_detector() -> OWLv2Detector:
     return _detector
 
 
+_annotator: Optional[OWLv2BatchAnnotator] = None
+
+
+def get_owlv2_annotator() -> OWLv2BatchAnnotator:
+    """Shared micro-batching front end to the OWLv2 detector (OWLV2_BATCH_SIZE / OWLV2_BATCH_WAIT_MS)."""
+    global _annotator
+    if _annotator is None:
+        _annotator = OWLv2BatchAnnotator(
+            get_owlv2_detector(),
+            max_batch_size=settings.OWLV2_BATCH_SIZE,
+            max_wait_ms=settings.OWLV2_BATCH_WAIT_MS,
+        )
+    return _annotator
+
+
 def preload_owlv2() -> None:
     """Load OWLv2 at startup in a background thread.
 
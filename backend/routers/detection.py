@@ -1,20 +1,22 @@
 """
 Detection routes: sync API for running detection (frontend).
 """
-import io
 import logging
 from typing import Annotated
 
-import requests
+import httpx
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from PIL import Image
 
 from models.ollama_vlm import get_model, get_mock_detection_response
-from models.owlv2 import get_owlv2_detector, build_queries_and_severity_map, image_to_base64
+from models.owlv2 import get_owlv2_annotator, build_queries_and_severity_map, image_to_base64
 from schemas.detection import DetectionResponse
-from services import minio_client
+from services import spec_service
 from utils.file_validation import MAX_IMAGE_UPLOAD_BYTES, is_image
-from utils.pdf_extract import extract_text_from_pdf
+from utils.image_prep import prepare_image
+from utils.sse import SSE_HEADERS, format_sse
 
 logger = logging.getLogger(__name__)
 
@@ -28,24 +30,11 @@ detect_router = APIRouter(
 # Synchronous detection (run VLM for frontend)
 # -------------------------
 def _load_spec_text_for_project(project_id: str) -> str:
-    """Fetch design docs from MinIO for the project; extract text from PDFs and concatenate."""
-    bucket = project_id
+    """Return the project's design-spec text (cached per PDF version), or "" if unavailable."""
     try:
-        object_names = minio_client.list_objects(bucket=bucket, prefix="designs/")
+        return spec_service.load_spec_text(project_id) or ""
     except Exception:
         return ""
-    parts = []
-    for object_name in object_names:
-        if not object_name.lower().endswith(".pdf"):
-            continue
-        try:
-            data = minio_client.get_file(bucket=bucket, object_name=object_name)
-            text = extract_text_from_pdf(data)
-            if text.strip():
-                parts.append(text.strip())
-        except Exception:
-            continue
-    return "\n\n---\n\n".join(parts) if parts else ""
 
 
 @detect_router.get("/prompt")
@@ -61,22 +50,34 @@ def get_inspection_prompt(project_id: str | None = None):
 
 
 def _prepare_image(contents: bytes) -> Image.Image:
-    """Open, normalise to RGB, and downscale to 1024 px max dimension."""
+    """Decode, orient and downscale an upload (see utils/image_prep.py); 400 if it is not an image."""
     try:
-        image = Image.open(io.BytesIO(contents))
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        max_size = 1024
-        w, h = image.size
-        if w > max_size or h > max_size:
-            ratio = min(max_size / w, max_size / h)
-            image = image.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-        return image
+        return prepare_image(contents)
     except Exception:
         logger.exception("Could not process image")
         raise HTTPException(status_code=400, detail="Could not process image")
 
 
+async def _read_image_upload(file: UploadFile) -> bytes:
+    """Read an uploaded image, enforcing content type, size limit and PNG/JPEG magic bytes."""
+    if not file or not file.filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+
+    content_type = file.content_type or ""
+    if not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    contents = await file.read()
+    if len(contents) > MAX_IMAGE_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size is {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB",
+        )
+    if not is_image(contents):
+        raise HTTPException(status_code=400, detail="File content is not a valid PNG or JPEG image")
+    return contents
+
+
 def _annotate_with_owlv2(result: DetectionResponse, image: Image.Image) -> None:
     """Attempt OWLv2 bounding-box annotation in-place; silently skips on failure."""
     if not result.defects:
@@ -84,7 +85,7 @@ def _annotate_with_owlv2(result: DetectionResponse, image: Image.Image) -> None:
     try:
         queries, severity_map = build_queries_and_severity_map(result.defects)
         if queries:
-            annotated = get_owlv2_detector().annotate(image, queries, severity_map)
+            annotated = get_owlv2_annotator().annotate(image, queries, severity_map)
             result.annotated_image = image_to_base64(annotated)
     except Exception:
         logger.exception("OWLv2 annotation failed — returning result without bounding boxes")
@@ -107,32 +108,62 @@ async def detect_fod(
     If project_id is provided, design spec PDFs for that project are read from storage
     and their content is used as the inspection specification for the VLM.
     """
-    if not file or not file.filename:
-        raise HTTPException(status_code=400, detail="No file uploaded")
-
-    content_type = file.content_type or ""
-    if not content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
-
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB",
-        )
-    if not is_image(contents):
-        raise HTTPException(status_code=400, detail="File content is not a valid PNG or JPEG image")
-
-    image = _prepare_image(contents)
-    spec_text = _load_spec_text_for_project(project_id) if project_id else ""
+    contents = await _read_image_upload(file)
+    # Decoding, storage reads and OWLv2 are blocking; the VLM call itself is async.
+    image = await run_in_threadpool(_prepare_image, contents)
+    spec_text = await run_in_threadpool(_load_spec_text_for_project, project_id) if project_id else ""
 
     try:
-        result = get_model().detect_fod(image, None, spec_text or None)
-    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        result = await get_model().adetect_fod(image, None, spec_text or None, source_bytes=contents)
+    except (httpx.ConnectError, httpx.TimeoutException):
         return get_mock_detection_response()
     except Exception:
         logger.exception("Detection failed")
         raise HTTPException(status_code=500, detail="Detection failed")
 
-    _annotate_with_owlv2(result, image)
-    return result
\ No newline at end of file
+    await run_in_threadpool(_annotate_with_owlv2, result, image)
+    return result
+
+
+@detect_router.post(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"},
+        400: {"description": "No file uploaded, invalid content type, file too large, or invalid image content"},
+    },
+)
+async def detect_fod_stream(
+    file: Annotated[UploadFile, File(description="Image file to analyze")],
+    project_id: Annotated[str | None, Form(description="Optional project ID for design-spec context")] = None,
+):
+    """
+    Streaming variant of POST /detect using Server-Sent Events:
+      - "token":  {"text": ...} for each chunk generated by the VLM
+      - "defect": a DefectSchema as soon as its bullet line is complete
+      - "result": the final DetectionResponse (same as POST /detect, including annotated_image)
+      - "error":  {"detail": ...} if detection fails after the stream started
+    """
+    contents = await _read_image_upload(file)
+    image = await run_in_threadpool(_prepare_image, contents)
+    spec_text = await run_in_threadpool(_load_spec_text_for_project, project_id) if project_id else ""
+
+    async def events():
+        try:
+            async for kind, payload in get_model().astream_detect_fod(
+                image, None, spec_text or None, source_bytes=contents
+            ):
+                if kind == "token":
+                    yield format_sse("token", {"text": payload})
+                elif kind == "defect":
+                    yield format_sse("defect", payload)
+                else:
+                    await run_in_threadpool(_annotate_with_owlv2, payload, image)
+                    yield format_sse("result", payload)
+        except (httpx.ConnectError, httpx.TimeoutException):
+            yield format_sse("result", get_mock_detection_response())
+        except Exception:
+            logger.exception("Streaming detection failed")
+            yield format_sse("error", {"detail": "Detection failed"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
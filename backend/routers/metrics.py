@@ -0,0 +1,50 @@
+from fastapi import APIRouter
+
+from db.session import pool_stats
+from services import detection_service, handoff_cache, lookup_cache, purge_service
+
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+)
+
+
+# -------------------------
+# Database connection pool
+# -------------------------
+@router.get("/db-pool")
+def get_db_pool_metrics():
+    return pool_stats()
+
+
+# -------------------------
+# Project / member / user lookup cache
+# -------------------------
+@router.get("/lookup-cache")
+def get_lookup_cache_metrics():
+    return lookup_cache.stats()
+
+
+# -------------------------
+# Detection pipeline
+# -------------------------
+@router.get("/detection-pipeline")
+def get_detection_pipeline_metrics():
+    return detection_service.pipeline_stats()
+
+
+# -------------------------
+# Upload-to-worker image handoff
+# -------------------------
+@router.get("/handoff-cache")
+def get_handoff_cache_metrics():
+    return handoff_cache.stats()
+
+
+# -------------------------
+# Background project purges
+# -------------------------
+@router.get("/project-purges")
+def get_project_purge_metrics():
+    return purge_service.stats()
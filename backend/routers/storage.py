@@ -1,12 +1,18 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, UploadFile, File, Query, status
+from fastapi import APIRouter, Depends, Request, UploadFile, File, Query, status
 from sqlalchemy.orm import Session
 
 from db.session import get_db
 from schemas.projects import UploadResponse
-from schemas.storage import ImageUploadResponse
+from schemas.storage import (
+    BatchImageUploadResponse,
+    ImageUploadCompleteRequest,
+    ImageUploadResponse,
+    PresignedImageUploadRequest,
+    PresignedImageUploadResponse,
+)
 from services import storage_service
 
 
@@ -42,6 +48,70 @@ async def upload_image(
     )
 
 
+# -------------------------
+# Batch Upload Images (one submission per stored file, queued together)
+# -------------------------
+@router.post(
+    "/images",
+    response_model=BatchImageUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_images(
+    project_id: UUID = Query(..., description="Project to associate the images with"),
+    user_id: UUID = Query(..., description="User submitting the images"),
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+):
+    """Per-file results are returned in upload order; check `failed` for rejected files."""
+    return await storage_service.upload_images(
+        db=db,
+        project_id=project_id,
+        user_id=user_id,
+        files=files,
+        allowed_types=ALLOWED_IMAGE_TYPES,
+    )
+
+
+# -------------------------
+# Direct Upload: presigned PUT URLs for images
+# -------------------------
+@router.post(
+    "/images/presign",
+    response_model=PresignedImageUploadResponse,
+)
+def presign_image_uploads(
+    payload: PresignedImageUploadRequest,
+    project_id: UUID = Query(..., description="Project to associate the images with"),
+    user_id: UUID = Query(..., description="User submitting the images"),
+    db: Session = Depends(get_db),
+):
+    """Clients PUT each image to its `upload_url`, then call `/storage/images/complete` with its token."""
+    return storage_service.presign_image_uploads(
+        db=db,
+        project_id=project_id,
+        user_id=user_id,
+        filenames=payload.filenames,
+    )
+
+
+# -------------------------
+# Direct Upload: completion (creates submission + triggers detection)
+# -------------------------
+@router.post(
+    "/images/complete",
+    response_model=ImageUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def complete_image_upload(
+    payload: ImageUploadCompleteRequest,
+    db: Session = Depends(get_db),
+):
+    return storage_service.complete_image_upload(
+        db=db,
+        completion_token=payload.completion_token,
+    )
+
+
 # -------------------------
 # Upload Design File
 # -------------------------
@@ -90,6 +160,28 @@ def list_designs(
     return storage_service.list_design_filenames(project_id)
 
 
+# -------------------------
+# Local storage backend: targets of its presigned URLs
+# -------------------------
+@router.get("/local/{bucket}/{object_name:path}", include_in_schema=False)
+def get_local_object(
+    bucket: str,
+    object_name: str,
+    token: str = Query(...),
+):
+    return storage_service.local_object_response(bucket, object_name, token)
+
+
+@router.put("/local/{bucket}/{object_name:path}", include_in_schema=False, status_code=status.HTTP_200_OK)
+async def put_local_object(
+    bucket: str,
+    object_name: str,
+    request: Request,
+    token: str = Query(...),
+):
+    await storage_service.store_local_object(bucket, object_name, token, request)
+
+
 # -------------------------
 # Get Design Presigned URL
 # -------------------------
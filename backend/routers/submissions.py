@@ -1,7 +1,9 @@
+import asyncio
 from uuid import UUID
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from db.session import get_db
@@ -9,8 +11,10 @@ from schemas.submissions import (
     SubmissionCreate,
     SubmissionUpdate,
     SubmissionRead,
+    SubmissionSummary,
 )
-from services import submission_service
+from services import project_service, submission_events, submission_service
+from utils.sse import SSE_HEADERS, format_sse
 
 
 router = APIRouter(
@@ -18,6 +22,10 @@ router = APIRouter(
     tags=["Submissions"],
 )
 
+# Comment sent on idle event streams so proxies keep the connection open
+# and disconnected clients are noticed.
+EVENTS_HEARTBEAT_SECONDS = 15
+
 
 # -------------------------
 # Create Submission
@@ -42,19 +50,73 @@ def create_submission(
 # -------------------------
 # List Submissions for Project
 # -------------------------
-@router.get("", response_model=List[SubmissionRead])
+@router.get("", response_model=List[SubmissionSummary])
 def list_submissions(
     project_id: UUID,
+    response: Response,
     status: str | None = None,
     pass_fail: str | None = None,
+    limit: int = Query(
+        submission_service.DEFAULT_PAGE_SIZE,
+        ge=1,
+        le=submission_service.MAX_PAGE_SIZE,
+    ),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db),
 ):
-    return submission_service.list_submissions_for_project(
+    """
+    One page of submissions, newest first. When more exist, the X-Next-Cursor
+    response header holds the cursor for the next page.
+    """
+    submissions, next_cursor = submission_service.list_submissions_for_project(
         db=db,
         project_id=project_id,
         status=status,
         pass_fail=pass_fail,
+        limit=limit,
+        cursor=cursor,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return submissions
+
+
+# -------------------------
+# Submission Status Events (SSE)
+# Declared before /{submission_id} so "events" is not parsed as an ID.
+# -------------------------
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events stream"}},
+)
+async def stream_submission_events(
+    project_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Push submission state changes for one project as "submission" events
+    ({submission_id, status, pass_fail, anomaly_count, error_message}) instead of polling the list.
+    """
+    project_service.get_project(db, project_id)
+    db.close()  # do not hold a pooled connection for the lifetime of the stream
+    subscription = submission_events.subscribe(project_id)
+
+    async def events():
+        try:
+            yield format_sse("ready", {"project_id": str(project_id)})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse("submission", event)
+        finally:
+            submission_events.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 # -------------------------
@@ -123,17 +185,17 @@ def retry_submission(
     )
 
 
-# # -------------------------
-# # Cancel Submission
-# # -------------------------
-# @router.post("/{submission_id}/cancel", response_model=SubmissionRead)
-# def cancel_submission(
-#     project_id: UUID,
-#     submission_id: UUID,
-#     db: Session = Depends(get_db),
-# ):
-#     return submission_service.cancel_submission(
-#         db=db,
-#         project_id=project_id,
-#         submission_id=submission_id,
-#     )
\ No newline at end of file
+# -------------------------
+# Cancel Submission
+# -------------------------
+@router.post("/{submission_id}/cancel", response_model=SubmissionRead)
+def cancel_submission(
+    project_id: UUID,
+    submission_id: UUID,
+    db: Session = Depends(get_db),
+):
+    return submission_service.cancel_submission(
+        db=db,
+        project_id=project_id,
+        submission_id=submission_id,
+    )
@@ -14,6 +14,14 @@ class SubmissionStatus(str, Enum):
     failed = "failed"
     error = "error"
     timeout = "timeout"
+    cancelled = "cancelled"
+
+
+class AnnotationStatus(str, Enum):
+    pending = "pending"
+    complete = "complete"
+    skipped = "skipped"
+    failed = "failed"
 
 
 class SubmissionPassFail(str, Enum):
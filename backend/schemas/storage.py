@@ -1,5 +1,5 @@
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PresignedUrlResponse(BaseModel):
@@ -15,4 +15,41 @@ class UploadResponseBase(BaseModel):
 
 
 class ImageUploadResponse(UploadResponseBase):
-    submission_id: uuid.UUID
\ No newline at end of file
+    submission_id: uuid.UUID
+
+
+class PresignedImageUploadRequest(BaseModel):
+    filenames: list[str] = Field(..., min_length=1)
+
+
+class PresignedImageUpload(BaseModel):
+    """PUT the image to upload_url, then POST completion_token to /storage/images/complete."""
+    filename: str
+    object_key: str
+    upload_url: str
+    completion_token: str
+    expires_in: int
+
+
+class PresignedImageUploadResponse(BaseModel):
+    project_id: uuid.UUID
+    uploads: list[PresignedImageUpload]
+
+
+class ImageUploadCompleteRequest(BaseModel):
+    completion_token: str
+
+
+class BatchImageUploadResult(BaseModel):
+    """Outcome for one file of a batch upload: object_key/submission_id on success, error otherwise."""
+    filename: str
+    object_key: str | None = None
+    submission_id: uuid.UUID | None = None
+    error: str | None = None
+
+
+class BatchImageUploadResponse(BaseModel):
+    project_id: uuid.UUID
+    uploaded: int
+    failed: int
+    results: list[BatchImageUploadResult]
\ No newline at end of file
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
-from .enums import SubmissionStatus, SubmissionPassFail
+from .enums import AnnotationStatus, SubmissionStatus, SubmissionPassFail
 
 
 class SubmissionBase(BaseModel):
@@ -18,7 +18,20 @@ class SubmissionUpdate(BaseModel):
     pass_fail: SubmissionPassFail | None = None
     anomaly_count: int | None = None
     error_message: str | None = None
-    annotated_image: str | None = None
+
+
+class SubmissionSummary(SubmissionBase):
+    """List item: the columns loaded by the paginated listing (no error_message)."""
+    id: uuid.UUID
+    submitted_by_user_id: uuid.UUID
+    submitted_at: datetime
+    status: SubmissionStatus
+    pass_fail: SubmissionPassFail
+    anomaly_count: int | None
+    annotated_image_key: str | None
+    annotation_status: AnnotationStatus | None
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SubmissionRead(SubmissionBase):
@@ -29,6 +42,7 @@ class SubmissionRead(SubmissionBase):
     pass_fail: SubmissionPassFail
     anomaly_count: int | None
     error_message: str | None
-    annotated_image: str | None
+    annotated_image_key: str | None  # object key; fetch via GET /storage/image/{key}
+    annotation_status: AnnotationStatus | None  # bounding boxes arrive after the verdict
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -12,13 +12,13 @@ import logging
 import uuid
 from pathlib import Path
 
-from PIL import Image
 from sqlalchemy.orm import Session
 
 from db.models import Project, Submission, Anomaly
 from db.session import SessionLocal
 from models.ollama_vlm import get_model
 from services import minio_client
+from utils.image_prep import prepare_image
 from utils.pdf_extract import extract_text_from_pdf
 
 logger = logging.getLogger(__name__)
@@ -218,6 +218,7 @@ def _apply_detection_success(db: Session, submission: Submission, result) -> Non
     submission.status = "complete"
     submission.pass_fail = result.pass_fail
     submission.anomaly_count = 0
+    submission.annotation_status = "skipped"  # the seed analysis draws no bounding boxes
     if result.pass_fail == "fail":
         db.add(Anomaly(
             id=uuid.uuid4(),
@@ -258,13 +259,7 @@ def _run_seed_analysis(db: Session) -> None:
     if not submission:
         return
     try:
-        image = Image.open(SEED_IMAGE_PATH).convert("RGB")
-        w, h = image.size
-        if max(w, h) > 1024:
-            ratio = min(1024 / w, 1024 / h)
-            image = image.resize(
-                (int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS
-            )
+        image = prepare_image(SEED_IMAGE_PATH.read_bytes())
         spec = _load_seed_spec_text()
         result = get_model().detect_fod(image, None, spec)
         _apply_detection_success(db, submission, result)
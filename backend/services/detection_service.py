@@ -1,45 +1,104 @@
 import io
 import logging
+import queue
 import threading
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
 
 import requests
 
 from PIL import Image
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
+from core.config import settings
 from db.models import Submission, Anomaly
 from db.session import SessionLocal
-from models.ollama_vlm import get_model
-from models.owlv2 import get_owlv2_detector, build_queries_and_severity_map, image_to_base64, wait_for_owlv2
-from services import minio_client
-from utils.pdf_extract import extract_text_from_pdf
+from models.ollama_vlm import DetectionCancelled, get_model
+from models.owlv2 import (
+    build_fod_vocabulary,
+    build_queries_and_severity_map,
+    draw_boxes,
+    get_owlv2_annotator,
+    match_queries_to_vocabulary,
+    wait_for_owlv2,
+)
+from schemas.detection import DefectSchema
+from schemas.enums import AnnotationStatus, SubmissionStatus
+from services import handoff_cache, minio_client, spec_service, submission_events
+from utils.cache import LRUCache
+from utils.file_validation import MAX_IMAGE_UPLOAD_BYTES
+from utils.image_prep import prepare_image
 
 logger = logging.getLogger(__name__)
 
-def _load_image_from_minio(bucket: str, object_name: str) -> Image.Image:
-    data = minio_client.get_file(bucket=bucket, object_name=object_name)
-    image = Image.open(io.BytesIO(data)).convert("RGB")
-    w, h = image.size
-    if max(w, h) > 1024:
-        ratio = min(1024 / w, 1024 / h)
-        image = image.resize((int(w * ratio), int(h * ratio)), Image.Resampling.LANCZOS)
-    return image
+# Annotated images are stored in the project bucket next to the source images.
+ANNOTATED_PREFIX = "annotated/"
 
+# Worker pool state. Claiming threads sleep on _wakeup between jobs; trigger_detection()
+# notifies it so new uploads are picked up without waiting for the poll interval.
+_wakeup = threading.Condition()
+_stop = threading.Event()
+_workers: list[threading.Thread] = []
 
-def _load_spec_text(bucket: str) -> str | None:
-    spec_parts = []
-    for obj_name in minio_client.list_objects(bucket=bucket, prefix="designs/"):
-        if not obj_name.lower().endswith(".pdf"):
-            continue
-        try:
-            data = minio_client.get_file(bucket=bucket, object_name=obj_name)
-            text = extract_text_from_pdf(data)
-            if text.strip():
-                spec_parts.append(text.strip())
-        except Exception:
-            pass
-    return "\n\n---\n\n".join(spec_parts) if spec_parts else None
+# Pipelined mode (DETECTION_PREFETCH_DEPTH > 0): the prefetch thread claims jobs and
+# loads their inputs into _prepared; inference workers take from it.
+_prepared: "queue.Queue[_PreparedJob]" = queue.Queue()
+
+# Annotation stage: failed inspections whose verdict is saved, waiting for OWLv2 boxes.
+# The annotation_status = 'pending' rows are the durable copy; they are reloaded on startup.
+_annotations: "queue.Queue[_AnnotationJob]" = queue.Queue()
+
+# Cancellation: one event per submission this process has claimed, set by cancel_detection().
+_cancel_events: dict[uuid.UUID, threading.Event] = {}
+_cancel_lock = threading.Lock()
+
+# Speculative OWLv2 (OWLV2_SPECULATIVE): per-project vocabularies, refreshed every few
+# minutes so new anomalies and spec uploads are picked up, and the threads running them.
+_vocabulary_cache = LRUCache(max_size=1024, ttl_seconds=300)
+_speculation_pool: ThreadPoolExecutor | None = None
+_speculation_pool_lock = threading.Lock()
+
+
+def _load_image_from_minio(
+    bucket: str,
+    object_name: str,
+    submission_id: uuid.UUID | None = None,
+) -> tuple[Image.Image, memoryview]:
+    """
+    Return the prepared (RGB, <=1024 px) image and a view of the original object bytes.
+    Bytes the upload handed off for submission_id are used when present; storage is read otherwise.
+    The stored size is checked before reading: a presigned PUT URL stays valid after its upload
+    was completed, so the object may have been replaced by one over the upload limit.
+    """
+    handed_off = handoff_cache.take(submission_id) if submission_id is not None else None
+    if handed_off is not None:
+        data = memoryview(handed_off)
+    else:
+        size = minio_client.get_size_if_exists(bucket, object_name)
+        if size is not None and size > MAX_IMAGE_UPLOAD_BYTES:
+            raise ValueError(f"Stored image is {size} bytes, over the {MAX_IMAGE_UPLOAD_BYTES} byte upload limit")
+        data = minio_client.get_file_view(bucket=bucket, object_name=object_name)
+    return prepare_image(data), data
+
+
+def _store_annotated_image(bucket: str, submission_id: uuid.UUID, attempt: int, image: Image.Image) -> str:
+    """
+    Upload an annotated image as PNG and return its object key ("{bucket}/annotated/{id}-{attempt}.png").
+    Each attempt gets its own object, so a late annotation never replaces a retry's.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    object_name = f"{ANNOTATED_PREFIX}{submission_id}-{attempt}.png"
+    minio_client.upload_file(
+        bucket=bucket,
+        object_name=object_name,
+        file_data=buffer.getvalue(),
+        content_type="image/png",
+    )
+    return f"{bucket}/{object_name}"
 
 
 def _build_anomalies(db: Session, submission: Submission, result) -> int:
@@ -70,71 +129,755 @@ def _build_anomalies(db: Session, submission: Submission, result) -> int:
 
 def _mark_failed(db: Session, submission_id: uuid.UUID, exc: Exception) -> None:
     try:
-        submission = db.get(Submission, submission_id)
-        if submission:
+        # Locked: a concurrent cancel_submission() either commits first (and is seen) or waits.
+        submission = db.get(Submission, submission_id, with_for_update=True)
+        if submission and submission.status != SubmissionStatus.cancelled:
             submission.status = "error"
             submission.error_message = str(exc)[:500]
             db.commit()
+            submission_events.publish_submission(submission)
     except Exception:
         db.rollback()
 
 
 def _mark_timeout(db: Session, submission_id: uuid.UUID) -> None:
     try:
-        submission = db.get(Submission, submission_id)
-        if submission:
+        submission = db.get(Submission, submission_id, with_for_update=True)
+        if submission and submission.status != SubmissionStatus.cancelled:
             submission.status = "timeout"
             submission.error_message = "Detection timed out with no response from the model."
             db.commit()
+            submission_events.publish_submission(submission)
     except Exception:
         db.rollback()
 
 
-def _run_detection(submission_id: uuid.UUID, project_id: uuid.UUID, image_object_key: str) -> None:
-    """Background worker: runs VLM detection and writes results to DB."""
+def _save_result(
+    submission_id: uuid.UUID,
+    project_id: uuid.UUID,
+    result,
+    annotation_status: AnnotationStatus,
+    attempt: int = 0,
+) -> bool:
+    """
+    Short transaction: write the verdict, its anomalies and where the annotation stage starts.
+    False if the submission was deleted, cancelled or claimed again (retried) during detection.
+    """
     db: Session = SessionLocal()
     try:
-        submission = db.get(Submission, submission_id)
+        # Locked so a cancel committed concurrently is never overwritten (see _mark_failed).
+        submission = db.get(Submission, submission_id, with_for_update=True)
         if not submission:
-            logger.warning("[detection] Submission %s not found", submission_id)
-            return
+            logger.warning("[detection] Submission %s was deleted during detection", submission_id)
+            return False
+        if submission.status == SubmissionStatus.cancelled:
+            logger.info("[detection] Submission %s was cancelled during detection — discarding result", submission_id)
+            return False
+        if submission.attempt != attempt:
+            logger.info("[detection] Submission %s was retried during detection — discarding result", submission_id)
+            return False
 
-        submission.status = "running"
+        final_status = "complete" if result.pass_fail == "pass" else "failed"
+        anomaly_count = _build_anomalies(db, submission, result) if result.pass_fail == "fail" else 0
+        submission.status = final_status
+        submission.pass_fail = result.pass_fail
+        submission.annotated_image_key = None
+        submission.annotation_status = annotation_status
+        submission.anomaly_count = anomaly_count
         db.commit()
+    finally:
+        db.close()
+    submission_events.publish(
+        project_id, submission_id, final_status, result.pass_fail, anomaly_count,
+        annotation_status=annotation_status,
+    )
+    return True
+
+
+def _record_error(submission_id: uuid.UUID, exc: Exception) -> None:
+    """Mark a submission timeout/error in its own session."""
+    db: Session = SessionLocal()
+    try:
+        if isinstance(exc, requests.exceptions.Timeout):
+            _mark_timeout(db, submission_id)
+        else:
+            _mark_failed(db, submission_id, exc)
+    finally:
+        db.close()
+
+
+@dataclass
+class _Checkpoint:
+    """Output of a submission's fetch stage, kept so a retry can skip it."""
+    image: Image.Image
+    image_bytes: bytes  # a copy, never a view of a memory-mapped object
+
+
+def _checkpoint_size(checkpoint: _Checkpoint) -> int:
+    image = checkpoint.image
+    return image.width * image.height * len(image.getbands()) + len(checkpoint.image_bytes)
+
+
+# Retry checkpoints, by submission id: stored when the image is prepared, dropped once the
+# submission has nothing left to retry (verdict without boxes to draw, or boxes drawn).
+_checkpoints = LRUCache(
+    max_size=settings.DETECTION_CHECKPOINT_MAX_BYTES,
+    sizeof=_checkpoint_size,
+    ttl_seconds=settings.DETECTION_CHECKPOINT_TTL_SECONDS,
+)
+
+
+@dataclass
+class _PreparedJob:
+    """A claimed submission with its inputs loaded, waiting for the inference stage."""
+    submission_id: uuid.UUID
+    project_id: uuid.UUID
+    image_object_key: str
+    image: Image.Image
+    image_bytes: memoryview
+    spec_text: str | None
+    vocabulary: list[str] = field(default_factory=list)
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    attempt: int = 0
+
+
+@dataclass
+class _AnnotationJob:
+    """A failed inspection whose verdict is saved, waiting for OWLv2 bounding boxes."""
+    submission_id: uuid.UUID
+    project_id: uuid.UUID
+    image_object_key: str
+    defects: list | None = None  # None: rebuilt from the submission's anomalies
+    image: Image.Image | None = None  # None: loaded from storage
+    vocabulary: list[str] = field(default_factory=list)
+    speculation: Future | None = None
+    attempt: int = 0  # the claim whose verdict the boxes belong to
+
+
+def _project_vocabulary(project_id: uuid.UUID, spec_text: str | None) -> list[str]:
+    """Speculative OWLv2 queries for a project: its spec's FOD terms and recent anomaly descriptions."""
+    key = (project_id, hash(spec_text))
+    vocabulary = _vocabulary_cache.get(key)
+    if vocabulary is not None:
+        return vocabulary
+
+    db: Session = SessionLocal()
+    try:
+        descriptions = [
+            description
+            for (description,) in db.query(Anomaly.description)
+            .join(Submission, Anomaly.submission_id == Submission.id)
+            .filter(Submission.project_id == project_id, Anomaly.description.isnot(None))
+            .order_by(Anomaly.created_at.desc())
+            .limit(settings.OWLV2_SPECULATIVE_HISTORY)
+        ]
+    finally:
+        db.close()
+    vocabulary = build_fod_vocabulary(spec_text, descriptions, settings.OWLV2_SPECULATIVE_MAX_QUERIES)
+    _vocabulary_cache.put(key, vocabulary)
+    return vocabulary
+
+
+def _get_speculation_pool() -> ThreadPoolExecutor:
+    global _speculation_pool
+    with _speculation_pool_lock:
+        if _speculation_pool is None:
+            _speculation_pool = ThreadPoolExecutor(
+                max_workers=settings.DETECTION_WORKERS,
+                thread_name_prefix="owlv2-speculative",
+            )
+        return _speculation_pool
+
+
+def _speculative_detect(image: Image.Image, vocabulary: list[str]) -> dict[int, tuple[float, list]]:
+    wait_for_owlv2()
+    return get_owlv2_annotator().detect(image, vocabulary)
+
+
+def _start_speculation(job: _PreparedJob) -> Future | None:
+    """Start OWLv2 on the job's vocabulary so it runs while the VLM answers (OWLV2_SPECULATIVE)."""
+    if not settings.OWLV2_SPECULATIVE or not job.vocabulary:
+        return None
+    return _get_speculation_pool().submit(_speculative_detect, job.image, job.vocabulary)
+
+
+def _annotate_from_speculation(job: _AnnotationJob, speculation: Future) -> Image.Image | None:
+    """
+    Draw the VLM's defects using the speculative boxes of matching vocabulary terms.
+    Defects without a matching box are localized with a regular (smaller) OWLv2 pass.
+    """
+    queries, severity_map = build_queries_and_severity_map(job.defects)
+    if not queries:
+        speculation.cancel()
+        return None
+
+    try:
+        speculative = speculation.result()
+    except Exception:
+        logger.exception("[detection] Speculative OWLv2 failed for submission %s", job.submission_id)
+        speculative = {}
+
+    best: dict[int, tuple[float, list]] = {}
+    for query_index, vocab_index in match_queries_to_vocabulary(queries, job.vocabulary).items():
+        if vocab_index in speculative:
+            best[query_index] = speculative[vocab_index]
+
+    missing = [index for index in range(len(queries)) if index not in best]
+    if missing:
+        wait_for_owlv2()
+        found = get_owlv2_annotator().detect(job.image, [queries[index] for index in missing])
+        for local_index, box in found.items():
+            best[missing[local_index]] = box
+
+    return draw_boxes(job.image, best, severity_map)
+
+
+def _track(submission_id: uuid.UUID) -> threading.Event:
+    """
+    Start tracking a new claim of the submission with a fresh cancel event. A cancelled
+    run of it may still be finishing; its (set) event is replaced, not reused.
+    """
+    cancelled = threading.Event()
+    with _cancel_lock:
+        _cancel_events[submission_id] = cancelled
+    return cancelled
+
+
+def _tracked(submission_id: uuid.UUID) -> threading.Event:
+    """The cancel event of the submission's current claim (tracked now if it has none)."""
+    with _cancel_lock:
+        cancelled = _cancel_events.get(submission_id)
+    return cancelled if cancelled is not None else _track(submission_id)
+
+
+def _untrack(submission_id: uuid.UUID, cancelled: threading.Event) -> None:
+    """Stop tracking a run, unless a later claim of the same submission has replaced it."""
+    with _cancel_lock:
+        if _cancel_events.get(submission_id) is cancelled:
+            del _cancel_events[submission_id]
+
+
+def cancel_detection(submission_id: uuid.UUID) -> bool:
+    """
+    Abort this process's detection of a submission already marked cancelled in the database:
+    its Ollama request is closed at the next token and no result or bounding boxes are written.
+    False if no worker here holds it (still queued, or claimed by another process, whose
+    result write then sees the cancelled status and discards it).
+    """
+    with _cancel_lock:
+        cancelled = _cancel_events.get(submission_id)
+    if cancelled is None:
+        return False
+    cancelled.set()
+    return True
+
+
+def _record_failure(submission_id: uuid.UUID, exc: Exception) -> None:
+    if isinstance(exc, requests.exceptions.Timeout):
+        logger.warning("[detection] Submission %s timed out", submission_id)
+    else:
+        logger.warning("[detection] Submission %s failed: %s", submission_id, exc)
+    _record_error(submission_id, exc)
+
+
+def _prepare_job(
+    submission_id: uuid.UUID,
+    project_id: uuid.UUID,
+    image_object_key: str,
+    attempt: int = 0,
+) -> _PreparedJob | None:
+    """
+    Fetch stage (I/O and decoding): load the image and the project's spec text.
+    The submission was marked running by its claim, which also started tracking it.
+    Returns None when it was cancelled since, or loading failed (the error is recorded).
+    """
+    cancelled = _tracked(submission_id)
+    try:
+        if cancelled.is_set():
+            logger.info("[detection] Submission %s was cancelled before it started", submission_id)
+            _untrack(submission_id, cancelled)
+            return None
 
         bucket = str(project_id)
         object_name = image_object_key.split("/", 1)[1]  # strip "{project_id}/" prefix
 
-        image = _load_image_from_minio(bucket, object_name)
-        spec_text = _load_spec_text(bucket)
-        result = get_model().detect_fod(image, None, spec_text)
+        checkpoint = _checkpoints.get(submission_id)
+        if checkpoint is not None:
+            image, image_bytes = checkpoint.image, checkpoint.image_bytes
+        else:
+            image, image_bytes = _load_image_from_minio(bucket, object_name, submission_id)
+            # The checkpoint can outlive the job by up to its TTL: it holds a copy, not a view that
+            # keeps the local backend's memory map open (Windows cannot delete a mapped file).
+            _checkpoints.put(submission_id, _Checkpoint(image, bytes(image_bytes)))
+        spec_text = spec_service.load_spec_text(bucket)  # cached per spec version
+        vocabulary: list[str] = []
+        if settings.OWLV2_SPECULATIVE:
+            try:
+                vocabulary = _project_vocabulary(project_id, spec_text)
+            except Exception:
+                logger.exception("[detection] Could not build OWLv2 vocabulary for project %s", project_id)
+        return _PreparedJob(
+            submission_id, project_id, image_object_key, image, image_bytes, spec_text, vocabulary, cancelled,
+            attempt,
+        )
+    except Exception as exc:
+        _untrack(submission_id, cancelled)
+        _record_failure(submission_id, exc)
+        return None
 
-        annotated_image: str | None = None
-        if result.pass_fail == "fail" and result.defects:
+
+def _infer(job: _PreparedJob) -> None:
+    """
+    Inference stage: VLM, then the verdict write. The submission is complete/failed as
+    soon as the VLM answers; failures with defects are queued for the annotation stage.
+    """
+    submission_id = job.submission_id
+    speculation: Future | None = None
+    try:
+        if job.cancelled.is_set():
+            raise DetectionCancelled()
+        speculation = _start_speculation(job)
+        result = get_model().detect_fod(
+            job.image, None, job.spec_text, source_bytes=job.image_bytes, cancel=job.cancelled,
+        )
+
+        needs_boxes = result.pass_fail == "fail" and bool(result.defects)
+        annotation_status = AnnotationStatus.pending if needs_boxes else AnnotationStatus.skipped
+        if _save_result(submission_id, job.project_id, result, annotation_status, job.attempt) and needs_boxes:
+            _annotations.put(_AnnotationJob(
+                submission_id, job.project_id, job.image_object_key,
+                defects=result.defects, image=job.image, vocabulary=job.vocabulary, speculation=speculation,
+                attempt=job.attempt,
+            ))
+            speculation = None  # the annotation stage collects it
+        elif not needs_boxes:
+            _checkpoints.pop(submission_id)
+        logger.info("[detection] Submission %s complete — %s", submission_id, result.pass_fail.upper())
+    except DetectionCancelled:
+        logger.info("[detection] Submission %s cancelled", submission_id)
+    except Exception as exc:
+        _record_failure(submission_id, exc)
+    finally:
+        _untrack(submission_id, job.cancelled)
+        if speculation is not None:
+            speculation.cancel()  # no-op once it has run; drops it if still waiting for a thread
+
+
+def _load_annotation_inputs(job: _AnnotationJob) -> None:
+    """Fill in the defects and image of a job reloaded from the database."""
+    if job.defects is None:
+        db: Session = SessionLocal()
+        try:
+            job.defects = [
+                DefectSchema(id=label, severity=severity or "fod", description=description or "")
+                for label, severity, description in db.query(Anomaly.label, Anomaly.severity, Anomaly.description)
+                .filter(Anomaly.submission_id == job.submission_id)
+                .order_by(Anomaly.created_at.asc())
+            ]
+        finally:
+            db.close()
+    if job.image is None:
+        checkpoint = _checkpoints.get(job.submission_id)
+        if checkpoint is not None:
+            job.image = checkpoint.image
+        else:
+            bucket, object_name = job.image_object_key.split("/", 1)
+            job.image, _ = _load_image_from_minio(bucket, object_name)
+
+
+def _save_annotation(
+    job: _AnnotationJob,
+    annotated: Image.Image | None,
+    status: AnnotationStatus,
+) -> AnnotationStatus | None:
+    """
+    Short transaction: store and attach the annotation, unless the submission was deleted or
+    re-run meanwhile. The row stays locked while the image is uploaded, so a retry cannot
+    start between the check and the attach. Returns the status written, or None if discarded.
+    """
+    db: Session = SessionLocal()
+    try:
+        submission = db.get(Submission, job.submission_id, with_for_update=True)
+        if (
+            submission is None
+            or submission.annotation_status != AnnotationStatus.pending
+            or submission.attempt != job.attempt
+        ):
+            db.rollback()
+            logger.info("[detection] Submission %s changed during annotation — discarding boxes", job.submission_id)
+            return None
+        annotated_image_key = None
+        if annotated is not None:
             try:
-                wait_for_owlv2()
-                queries, severity_map = build_queries_and_severity_map(result.defects)
-                if queries:
-                    annotated = get_owlv2_detector().annotate(image, queries, severity_map)
-                    annotated_image = image_to_base64(annotated)
+                annotated_image_key = _store_annotated_image(
+                    str(job.project_id), job.submission_id, job.attempt, annotated,
+                )
             except Exception:
-                logger.exception("[detection] OWLv2 annotation failed for submission %s — skipping bounding boxes", submission_id)
+                logger.exception("[detection] Could not store annotation of submission %s", job.submission_id)
+                status = AnnotationStatus.failed
+        submission.annotated_image_key = annotated_image_key
+        submission.annotation_status = status
+        db.commit()
+        submission_events.publish_submission(submission)
+        return status
+    except Exception:
+        db.rollback()
+        logger.exception("[detection] Could not save annotation of submission %s", job.submission_id)
+        return None
+    finally:
+        db.close()
 
-        submission.status = "complete" if result.pass_fail == "pass" else "failed"
-        submission.pass_fail = result.pass_fail
-        submission.annotated_image = annotated_image
-        submission.anomaly_count = _build_anomalies(db, submission, result) if result.pass_fail == "fail" else 0
+
+def _annotate(job: _AnnotationJob) -> None:
+    """Annotation stage: OWLv2 boxes for a failed inspection's defects, stored next to its image."""
+    annotated: Image.Image | None = None
+    try:
+        _load_annotation_inputs(job)
+        if job.speculation is not None:
+            annotated = _annotate_from_speculation(job, job.speculation)
+        else:
+            queries, severity_map = build_queries_and_severity_map(job.defects)
+            if queries:
+                wait_for_owlv2()
+                annotated = get_owlv2_annotator().annotate(job.image, queries, severity_map)
+        status = AnnotationStatus.complete if annotated is not None else AnnotationStatus.skipped
+    except Exception:
+        logger.exception("[detection] OWLv2 annotation failed for submission %s", job.submission_id)
+        status = AnnotationStatus.failed
+    finally:
+        if job.speculation is not None:
+            job.speculation.cancel()
+    if _save_annotation(job, annotated, status) in (AnnotationStatus.complete, AnnotationStatus.skipped):
+        _checkpoints.pop(job.submission_id)
+
+
+def _run_detection(
+    submission_id: uuid.UUID,
+    project_id: uuid.UUID,
+    image_object_key: str,
+    attempt: int = 0,
+) -> None:
+    """
+    Background worker: runs VLM detection and writes results to DB.
+
+    No database connection is held while the model runs (30-90 s): the
+    submission is claimed (marked running) in one short transaction and the
+    results are written in another, so busy workers cannot starve the API's connection pool.
+    This is both stages back to back; the pipelined workers run them on separate threads.
+    Bounding boxes are drawn later by the annotation workers.
+    """
+    job = _prepare_job(submission_id, project_id, image_object_key, attempt)
+    if job is not None:
+        _infer(job)
+
+
+# -------------------------
+# Queue + worker pool
+# -------------------------
+
+def _claim_next_submission() -> tuple[uuid.UUID, uuid.UUID, str, int] | None:
+    """Move the oldest queued submission to running and return its job arguments.
+
+    The submissions table is the queue: SKIP LOCKED lets several workers claim
+    concurrently without ever handing out the same row twice. Only queued rows
+    are claimed, so a submission cancelled while queued is never started. The
+    claim starts the row's lease, which _lease_loop() renews while it runs.
+    """
+    db: Session = SessionLocal()
+    try:
+        submission = (
+            db.query(Submission)
+            .filter(Submission.status == SubmissionStatus.queued)
+            .order_by(Submission.submitted_at.asc())
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not submission:
+            db.rollback()
+            return None
+
+        submission.attempt += 1
+        job = (submission.id, submission.project_id, submission.image_id, submission.attempt)
+        submission.status = SubmissionStatus.running
+        submission.heartbeat_at = func.now()
+        # Tracked before the commit, so a cancel that sees the row running always finds the event.
+        cancelled = _track(submission.id)
+        try:
+            db.commit()
+        except Exception:
+            _untrack(submission.id, cancelled)
+            raise
+        submission_events.publish(job[1], job[0], SubmissionStatus.running)
+        return job
+    finally:
+        db.close()
+
+
+def _requeue_interrupted_submissions() -> int:
+    """
+    Return running submissions whose lease has lapsed to the queue: the process that
+    claimed them died. Rows other live processes are running keep a fresh lease.
+    """
+    db: Session = SessionLocal()
+    try:
+        count = (
+            db.query(Submission)
+            .filter(
+                Submission.status == SubmissionStatus.running,
+                or_(
+                    Submission.heartbeat_at.is_(None),
+                    Submission.heartbeat_at < func.now() - timedelta(seconds=settings.DETECTION_LEASE_SECONDS),
+                ),
+            )
+            .update({Submission.status: SubmissionStatus.queued}, synchronize_session=False)
+        )
         db.commit()
-        logger.info("[detection] Submission %s complete — %s", submission_id, result.pass_fail.upper())
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
-    except requests.exceptions.Timeout:
-        logger.warning("[detection] Submission %s timed out", submission_id)
-        _mark_timeout(db, submission_id)
-    except Exception as exc:
-        logger.warning("[detection] Submission %s failed: %s", submission_id, exc)
-        _mark_failed(db, submission_id, exc)
+
+def _renew_leases() -> int:
+    """Extend the lease of every submission this process has claimed and not finished."""
+    with _cancel_lock:
+        submission_ids = list(_cancel_events)
+    if not submission_ids:
+        return 0
+
+    db: Session = SessionLocal()
+    try:
+        count = (
+            db.query(Submission)
+            .filter(Submission.id.in_(submission_ids), Submission.status == SubmissionStatus.running)
+            .update({Submission.heartbeat_at: func.now()}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _lease_loop() -> None:
+    """Renew this process's leases and re-queue lapsed ones every DETECTION_HEARTBEAT_SECONDS."""
+    while not _stop.wait(timeout=settings.DETECTION_HEARTBEAT_SECONDS):
+        try:
+            _renew_leases()
+            requeued = _requeue_interrupted_submissions()
+        except Exception:
+            logger.exception("[detection] Could not renew submission leases")
+            continue
+        if requeued:
+            logger.info("[detection] Re-queued %d submission(s) with a lapsed lease", requeued)
+            with _wakeup:
+                _wakeup.notify(requeued)
+
+
+def _claim_or_wait() -> tuple[uuid.UUID, uuid.UUID, str, int] | None:
+    """Claim the next queued submission, or sleep until woken / the poll interval. None if nothing was claimed."""
+    try:
+        job = _claim_next_submission()
+    except Exception:
+        logger.exception("[detection] Could not claim next submission")
+        job = None
+
+    if job is None:
+        with _wakeup:
+            _wakeup.wait(timeout=settings.DETECTION_POLL_INTERVAL_SECONDS)
+    return job
+
+
+def _worker_loop() -> None:
+    """Serial mode: claim and run queued submissions until stop_detection_workers() is called."""
+    while not _stop.is_set():
+        job = _claim_or_wait()
+        if job is not None:
+            _run_detection(*job)
+
+
+def _prefetch_loop() -> None:
+    """
+    Pipelined mode, fetch stage: keep up to DETECTION_PREFETCH_DEPTH claimed submissions
+    loaded (image fetched and prepared, spec text read) ahead of the inference workers.
+    """
+    while not _stop.is_set():
+        if _prepared.qsize() >= settings.DETECTION_PREFETCH_DEPTH:
+            # Inference workers notify when they take a job.
+            with _wakeup:
+                _wakeup.wait(timeout=settings.DETECTION_POLL_INTERVAL_SECONDS)
+            continue
+        job = _claim_or_wait()
+        if job is not None:
+            prepared = _prepare_job(*job)
+            if prepared is not None:
+                _prepared.put(prepared)
+
+
+def _inference_loop() -> None:
+    """Pipelined mode, inference stage: run prefetched jobs through the models."""
+    while not _stop.is_set():
+        try:
+            job = _prepared.get(timeout=settings.DETECTION_POLL_INTERVAL_SECONDS)
+        except queue.Empty:
+            continue
+        with _wakeup:
+            _wakeup.notify_all()  # a prefetch slot is free
+        _infer(job)
+
+
+def _annotation_loop() -> None:
+    """Annotation stage: draw bounding boxes for failed inspections after their verdict is saved."""
+    while not _stop.is_set():
+        try:
+            job = _annotations.get(timeout=settings.DETECTION_POLL_INTERVAL_SECONDS)
+        except queue.Empty:
+            continue
+        _annotate(job)
+
+
+def _resume_pending_annotations() -> int:
+    """Queue the annotation of every submission still waiting for bounding boxes (on startup)."""
+    db: Session = SessionLocal()
+    try:
+        rows = (
+            db.query(Submission.id, Submission.project_id, Submission.image_id, Submission.attempt)
+            .filter(Submission.annotation_status == AnnotationStatus.pending)
+            .order_by(Submission.submitted_at.asc())
+            .all()
+        )
     finally:
         db.close()
+    for submission_id, project_id, image_id, attempt in rows:
+        _annotations.put(_AnnotationJob(submission_id, project_id, image_id, attempt=attempt))
+    return len(rows)
+
+
+def retry_annotation(submission_id: uuid.UUID, project_id: uuid.UUID, image_object_key: str, attempt: int) -> None:
+    """
+    Re-run only the annotation stage of a submission whose verdict (of claim attempt) stands.
+    The caller has already set its annotation_status back to pending.
+    """
+    _annotations.put(_AnnotationJob(submission_id, project_id, image_object_key, attempt=attempt))
+    logger.info("[detection] Queued annotation retry for submission %s", submission_id)
+
+
+def _drop_queued_annotations() -> int:
+    """Forget annotations no worker has started (on stop); their rows stay pending for the next start."""
+    dropped = 0
+    while True:
+        try:
+            job = _annotations.get_nowait()
+        except queue.Empty:
+            return dropped
+        if job.speculation is not None:
+            job.speculation.cancel()
+        dropped += 1
+
+
+def _requeue_prefetched() -> int:
+    """Return prefetched jobs no worker has started to the queue (on stop)."""
+    submission_ids = []
+    while True:
+        try:
+            job = _prepared.get_nowait()
+        except queue.Empty:
+            break
+        submission_ids.append(job.submission_id)
+        _untrack(job.submission_id, job.cancelled)
+    if not submission_ids:
+        return 0
+
+    db: Session = SessionLocal()
+    try:
+        count = (
+            db.query(Submission)
+            .filter(Submission.id.in_(submission_ids), Submission.status == SubmissionStatus.running)
+            .update({Submission.status: SubmissionStatus.queued}, synchronize_session=False)
+        )
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _start_thread(target, name: str) -> None:
+    worker = threading.Thread(target=target, name=name, daemon=True)
+    worker.start()
+    _workers.append(worker)
+
+
+def start_detection_workers() -> None:
+    """
+    Start the bounded detection worker pool (DETECTION_WORKERS inference threads, plus
+    one prefetch thread when DETECTION_PREFETCH_DEPTH > 0) and DETECTION_ANNOTATION_WORKERS
+    annotation threads, plus the lease thread. Submissions whose worker process died are
+    re-queued first and pending annotations reloaded, so no work is lost.
+    """
+    if _workers:
+        return
+    _stop.clear()
+
+    try:
+        requeued = _requeue_interrupted_submissions()
+        if requeued:
+            logger.info("[detection] Re-queued %d interrupted submission(s)", requeued)
+    except Exception as exc:
+        logger.warning("[detection] Could not re-queue interrupted submissions: %s", exc)
+
+    try:
+        resumed = _resume_pending_annotations()
+        if resumed:
+            logger.info("[detection] Resuming %d pending annotation(s)", resumed)
+    except Exception as exc:
+        logger.warning("[detection] Could not load pending annotations: %s", exc)
+
+    if settings.DETECTION_PREFETCH_DEPTH > 0:
+        _start_thread(_prefetch_loop, "detection-prefetch")
+        for index in range(settings.DETECTION_WORKERS):
+            _start_thread(_inference_loop, f"detection-worker-{index}")
+    else:
+        for index in range(settings.DETECTION_WORKERS):
+            _start_thread(_worker_loop, f"detection-worker-{index}")
+    for index in range(settings.DETECTION_ANNOTATION_WORKERS):
+        _start_thread(_annotation_loop, f"detection-annotator-{index}")
+    _start_thread(_lease_loop, "detection-lease")
+    logger.info("[detection] Started %d detection thread(s)", len(_workers))
+
+
+def stop_detection_workers(timeout: float = 5.0) -> None:
+    """Signal workers to exit after their current job and wait briefly for them."""
+    _stop.set()
+    with _wakeup:
+        _wakeup.notify_all()
+    for worker in _workers:
+        worker.join(timeout=timeout)
+    _workers.clear()
+    _drop_queued_annotations()
+    try:
+        requeued = _requeue_prefetched()
+        if requeued:
+            logger.info("[detection] Re-queued %d prefetched submission(s)", requeued)
+    except Exception as exc:
+        logger.warning("[detection] Could not re-queue prefetched submissions: %s", exc)
+
+
+def pipeline_stats() -> dict[str, int]:
+    return {
+        "threads": len(_workers),
+        "prefetch_depth": settings.DETECTION_PREFETCH_DEPTH,
+        "prefetched": _prepared.qsize(),
+        "annotations_queued": _annotations.qsize(),
+        "checkpoints": len(_checkpoints),
+        "checkpoint_bytes": _checkpoints.size,
+    }
 
 
 def trigger_detection(
@@ -144,13 +887,24 @@ def trigger_detection(
 ) -> None:
     """
     Entry point for the FOD detection pipeline.
-    Called automatically when a new image is uploaded.
-    Runs detection in a background thread so the upload response returns immediately.
+    Called automatically when a new image is uploaded, after its queued submission is committed.
+    Wakes an idle worker so the job starts immediately; the upload response returns without waiting.
     """
-    thread = threading.Thread(
-        target=_run_detection,
-        args=(submission_id, project_id, image_object_key),
-        daemon=True,
-    )
-    thread.start()
-    logger.info("[detection] Started background detection for submission %s", submission_id)
+    submission_events.publish(project_id, submission_id, SubmissionStatus.queued)
+    with _wakeup:
+        _wakeup.notify()
+    logger.info("[detection] Queued detection for submission %s (%s)", submission_id, image_object_key)
+
+
+def trigger_detection_batch(jobs: list[tuple[uuid.UUID, uuid.UUID, str]]) -> None:
+    """
+    trigger_detection() for many committed submissions at once, as
+    (submission_id, project_id, image_object_key) tuples. Wakes one idle worker per job.
+    """
+    if not jobs:
+        return
+    for submission_id, project_id, _image_object_key in jobs:
+        submission_events.publish(project_id, submission_id, SubmissionStatus.queued)
+    with _wakeup:
+        _wakeup.notify(len(jobs))
+    logger.info("[detection] Queued detection for %d submission(s)", len(jobs))
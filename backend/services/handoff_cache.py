@@ -0,0 +1,62 @@
+"""
+Upload-to-worker handoff of image bytes.
+
+The upload path already has each image's bytes; it offers them here, keyed by
+the id of the submission they belong to, just before queueing detection. The
+worker takes them instead of downloading the object it was just sent, which
+saves one full GET per inspection. Object keys are not used: two uploads of
+the same filename share one, while a submission id names exactly one upload.
+
+The cache is only an optimisation: entries are consumed once, capped by total
+bytes (oldest evicted first) and expire after HANDOFF_CACHE_TTL_SECONDS, so a
+miss (eviction, retry, another process, restart) falls back to object storage.
+"""
+
+import uuid
+
+from core.config import settings
+from utils.cache import LRUCache
+
+_cache = LRUCache(
+    max_size=settings.HANDOFF_CACHE_MAX_BYTES,
+    sizeof=len,
+    ttl_seconds=settings.HANDOFF_CACHE_TTL_SECONDS,
+)
+
+
+def accepts(size: int | None) -> bool:
+    """Whether an object of this size could be cached (unknown sizes are tried)."""
+    return size is None or size <= _cache.max_size
+
+
+def offer(submission_id: uuid.UUID, data: bytes) -> None:
+    _cache.put(submission_id, data)
+
+
+def take(submission_id: uuid.UUID) -> bytes | None:
+    """Remove and return the bytes handed off for submission_id, or None."""
+    data = _cache.get(submission_id)  # counts the hit/miss and honours the TTL
+    if data is not None:
+        _cache.pop(submission_id)
+    return data
+
+
+def discard(submission_id: uuid.UUID) -> None:
+    """Drop bytes that will not be taken (e.g. the submission was cancelled while queued)."""
+    _cache.pop(submission_id)
+
+
+def stats() -> dict[str, int | float]:
+    takes = _cache.hits + _cache.misses
+    return {
+        "entries": len(_cache),
+        "bytes": _cache.size,
+        "max_bytes": _cache.max_size,
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+        "hit_ratio": round(_cache.hits / takes, 3) if takes else 0.0,
+    }
+
+
+def clear() -> None:
+    _cache.clear()
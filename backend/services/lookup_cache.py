@@ -0,0 +1,64 @@
+"""
+Read-through cache for hot row lookups (projects, memberships, users).
+
+Nearly every request validates its project (and often a membership or user)
+before doing any work; caching those rows saves a round trip per request.
+Entries are column snapshots, not ORM instances, so nothing is shared between
+sessions: a hit is re-attached to the caller's session with merge(load=False),
+which issues no query. Relationships still lazy-load normally.
+
+Services invalidate entries when they write the row. Other processes' writes
+become visible after LOOKUP_CACHE_TTL_SECONDS.
+"""
+
+from typing import Any, Hashable
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from core.config import settings
+from utils.cache import LRUCache
+
+_cache = LRUCache(
+    max_size=settings.LOOKUP_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LOOKUP_CACHE_TTL_SECONDS,
+)
+
+
+def get(db: Session, model: type, key: Hashable) -> Any | None:
+    """Return the cached row attached to db, or None on a miss."""
+    snapshot = _cache.get(key)
+    if snapshot is None:
+        return None
+    instance = model(**snapshot)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+def put(model: type, key: Hashable, instance: Any) -> None:
+    """Store a snapshot of a freshly loaded row's columns."""
+    columns = inspect(model).column_attrs
+    _cache.put(key, {column.key: getattr(instance, column.key) for column in columns})
+
+
+def invalidate(*keys: Hashable) -> None:
+    for key in keys:
+        _cache.pop(key)
+
+
+def invalidate_where(predicate) -> int:
+    return _cache.discard_where(predicate)
+
+
+def stats() -> dict[str, int | float]:
+    lookups = _cache.hits + _cache.misses
+    return {
+        "entries": len(_cache),
+        "hits": _cache.hits,
+        "misses": _cache.misses,
+        "hit_ratio": round(_cache.hits / lookups, 3) if lookups else 0.0,
+    }
+
+
+def clear() -> None:
+    _cache.clear()
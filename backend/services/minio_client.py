@@ -1,28 +1,21 @@
-import io
-from datetime import timedelta
-from minio import Minio
-
-from core.config import settings
+"""
+Object storage facade used across the app.
 
-_client: Minio | None = None
+Despite the name (kept because every service imports it), this module is
+backend-agnostic: each call goes to storage_backend.get_backend(), MinIO or the
+local filesystem depending on STORAGE_BACKEND.
+"""
 
+import io
+from itertools import islice
+from typing import Iterable, Iterator
 
-def get_client() -> Minio:
-    global _client
-    if _client is None:
-        _client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_USE_SSL,
-        )
-    return _client
+from services.storage_backend import ObjectInfo, ObjectNotFound, get_backend
 
 
 def ensure_bucket(bucket_name: str) -> None:
-    client = get_client()
-    if not client.bucket_exists(bucket_name):
-        client.make_bucket(bucket_name)
+    """Create the bucket if needed (cached: repeat calls do not touch storage)."""
+    get_backend().ensure_bucket(bucket_name)
 
 
 def upload_file(
@@ -30,24 +23,53 @@ def upload_file(
     object_name: str,
     file_data: bytes,
     content_type: str,
+    create_bucket: bool = True,
+) -> str:
+    """Store an object. Batch callers ensure the bucket once and pass create_bucket=False."""
+    backend = get_backend()
+    if create_bucket:
+        backend.ensure_bucket(bucket)
+    backend.put_object(bucket, object_name, io.BytesIO(file_data), len(file_data), content_type)
+    return object_name
+
+
+def upload_stream(
+    bucket: str,
+    object_name: str,
+    stream,
+    content_type: str,
+    length: int = -1,
+    create_bucket: bool = True,
 ) -> str:
-    client = get_client()
-    ensure_bucket(bucket)
-    client.put_object(
-        bucket,
-        object_name,
-        io.BytesIO(file_data),
-        length=len(file_data),
-        content_type=content_type,
-    )
+    """
+    Store an object from a file-like stream without reading it all into memory.
+    MinIO sends it in 5 MiB multipart chunks; length=-1 when unknown.
+    """
+    backend = get_backend()
+    if create_bucket:
+        backend.ensure_bucket(bucket)
+    backend.put_object(bucket, object_name, stream, length, content_type)
     return object_name
 
 
 def list_objects(bucket: str, prefix: str) -> list[str]:
     """Return all object names under a given prefix in a bucket."""
-    client = get_client()
-    objects = client.list_objects(bucket, prefix=prefix, recursive=True)
-    return [obj.object_name for obj in objects]
+    return [obj.name for obj in get_backend().list_objects(bucket, prefix)]
+
+
+def iter_object_names(bucket: str, prefix: str = "") -> Iterator[str]:
+    """Like list_objects, but pages through the listing lazily (for very large buckets)."""
+    return (obj.name for obj in get_backend().iter_objects(bucket, prefix))
+
+
+def iter_objects(bucket: str, prefix: str = "") -> Iterator[ObjectInfo]:
+    """Like iter_object_names, with each object's size, ETag and last-modified time."""
+    return get_backend().iter_objects(bucket, prefix)
+
+
+def list_object_etags(bucket: str, prefix: str) -> dict[str, str]:
+    """Return {object_name: etag} for all objects under a prefix (one LIST call, no downloads)."""
+    return {obj.name: obj.etag for obj in get_backend().list_objects(bucket, prefix)}
 
 
 def get_presigned_url(
@@ -56,36 +78,68 @@ def get_presigned_url(
     expires_seconds: int = 900,
     download: bool = False,
 ) -> str:
-    client = get_client()
+    return get_backend().presigned_get_url(bucket, object_name, expires_seconds, download)
 
-    extra_params = None
-    if download:
-        filename = object_name.split("/")[-1]
-        extra_params = {
-            "response-content-disposition": f'attachment; filename="{filename}"'
-        }
 
-    return client.presigned_get_object(
-        bucket,
-        object_name,
-        expires=timedelta(seconds=expires_seconds),
-        extra_query_params=extra_params,
-    )
+def get_presigned_put_url(bucket: str, object_name: str, expires_seconds: int = 900) -> str:
+    """URL a client can PUT the object to directly, without going through the API."""
+    return get_backend().presigned_put_url(bucket, object_name, expires_seconds)
 
 
 def get_file(bucket: str, object_name: str) -> bytes:
-    client = get_client()
-    response = client.get_object(bucket, object_name)
+    return bytes(get_backend().get_object(bucket, object_name))
+
+
+def get_file_view(bucket: str, object_name: str) -> memoryview:
+    """Read-only view of an object; zero-copy (memory-mapped) on the local backend."""
+    return get_backend().get_object(bucket, object_name)
+
+
+def get_file_if_exists(bucket: str, object_name: str) -> bytes | None:
+    """Like get_file, but returns None instead of raising when the object does not exist."""
     try:
-        return response.read()
-    finally:
-        response.close()
-        response.release_conn()
+        return get_file(bucket, object_name)
+    except ObjectNotFound:
+        return None
+
+
+def get_file_head(bucket: str, object_name: str, length: int) -> bytes:
+    """First length bytes of an object (ranged GET)."""
+    return get_backend().get_object_head(bucket, object_name, length)
+
+
+def get_size_if_exists(bucket: str, object_name: str) -> int | None:
+    """Object size in bytes, or None when the object does not exist."""
+    try:
+        return get_backend().stat_object(bucket, object_name).size
+    except ObjectNotFound:
+        return None
+
+
+def get_etag(bucket: str, object_name: str) -> str:
+    return get_backend().stat_object(bucket, object_name).etag
+
+
+def list_buckets() -> list[str]:
+    return get_backend().list_buckets()
 
 
 def delete_file(bucket: str, object_name: str) -> None:
-    client = get_client()
-    client.remove_object(bucket, object_name)
+    get_backend().remove_object(bucket, object_name)
+
+
+def delete_files(bucket: str, object_names: Iterable[str]) -> list[str]:
+    """Batched delete (one request per 1000 objects on MinIO); returns names that failed."""
+    return get_backend().remove_objects(bucket, object_names)
+
+
+def bucket_exists(bucket: str) -> bool:
+    return get_backend().bucket_exists(bucket)
+
+
+def delete_bucket(bucket: str) -> None:
+    """Remove an empty bucket."""
+    get_backend().remove_bucket(bucket)
 
 
 def create_project_bucket(project_id: str) -> None:
@@ -93,15 +147,21 @@ def create_project_bucket(project_id: str) -> None:
     ensure_bucket(project_id)
 
 
-def delete_project_bucket(project_id: str) -> None:
-    """Delete a project's bucket and all its contents."""
-    client = get_client()
+def delete_project_bucket(project_id: str, batch_size: int = 1000) -> None:
+    """
+    Delete a project's bucket and all its contents, synchronously.
+    Deleted projects are purged in the background by services/purge_service.py instead.
+    """
+    backend = get_backend()
     bucket = project_id
-    if not client.bucket_exists(bucket):
+    if not backend.bucket_exists(bucket):
+        backend.forget_bucket(bucket)
         return
-    # Remove all objects first
-    objects = client.list_objects(bucket, recursive=True)
-    for obj in objects:
-        client.remove_object(bucket, obj.object_name)
+    # Remove all objects first, a batch at a time
+    names = iter_object_names(bucket)
+    while batch := list(islice(names, batch_size)):
+        failed = backend.remove_objects(bucket, batch)
+        if failed:
+            raise OSError(f"Could not delete {len(failed)} object(s) from {bucket}, e.g. {failed[0]}")
     # Then remove the bucket
-    client.remove_bucket(bucket)
\ No newline at end of file
+    backend.remove_bucket(bucket)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from db.models import ProjectMember, User
 from schemas.project_members import ProjectMemberCreate, ProjectMemberUpdate
-from services import project_service
+from services import lookup_cache, project_service
 from core import exceptions
 
 
@@ -33,6 +33,7 @@ def add_member(
     )
     db.add(member)
     db.commit()
+    lookup_cache.invalidate(("member", project_id, payload.user_id))
     db.refresh(member)
     return member
 
@@ -53,12 +54,17 @@ def get_member(
     project_id: uuid.UUID,
     user_id: uuid.UUID,
 ) -> ProjectMember:
+    cached = lookup_cache.get(db, ProjectMember, ("member", project_id, user_id))
+    if cached is not None:
+        return cached
+
     member = db.query(ProjectMember).filter(
         ProjectMember.project_id == project_id,
         ProjectMember.user_id == user_id,
     ).first()
     if not member:
         raise exceptions.MemberNotFound()
+    lookup_cache.put(ProjectMember, ("member", project_id, user_id), member)
     return member
 
 
@@ -71,6 +77,7 @@ def update_member_role(
     member = get_member(db, project_id, user_id)
     member.role = payload.role
     db.commit()
+    lookup_cache.invalidate(("member", project_id, user_id))
     db.refresh(member)
     return member
 
@@ -83,6 +90,7 @@ def remove_member(
     member = get_member(db, project_id, user_id)
     db.delete(member)
     db.commit()
+    lookup_cache.invalidate(("member", project_id, user_id))
 
 
 def transfer_ownership(
@@ -102,5 +110,8 @@ def transfer_ownership(
 
     new_owner.role = "owner"
     db.commit()
+    lookup_cache.invalidate(("member", project_id, user_id))
+    if current_owner:
+        lookup_cache.invalidate(("member", project_id, current_owner.user_id))
     db.refresh(new_owner)
     return new_owner
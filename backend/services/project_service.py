@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from db.models import Project
 from schemas.projects import ProjectCreate, ProjectUpdate
 from core import exceptions
-from services import minio_client
+from services import lookup_cache, minio_client, purge_service
 
 
 def create_project(db: Session, payload: ProjectCreate) -> Project:
@@ -29,12 +29,20 @@ def create_project(db: Session, payload: ProjectCreate) -> Project:
 
 
 def get_project(db: Session, project_id: uuid.UUID, include_deleted: bool = False) -> Project:
+    """Live projects are served from lookup_cache when possible (no query)."""
+    if not include_deleted:
+        cached = lookup_cache.get(db, Project, ("project", project_id))
+        if cached is not None:
+            return cached
+
     query = db.query(Project).filter(Project.id == project_id)
     if not include_deleted:
         query = query.filter(Project.deleted_at.is_(None))
     project = query.first()
     if not project:
         raise exceptions.ProjectNotFound()
+    if project.deleted_at is None:
+        lookup_cache.put(Project, ("project", project_id), project)
     return project
 
 
@@ -61,6 +69,7 @@ def update_project(
 
     project.updated_at = datetime.utcnow()
     db.commit()
+    lookup_cache.invalidate(("project", project_id))
     db.refresh(project)
     return project
 
@@ -74,8 +83,8 @@ def delete_project(db: Session, project_id: uuid.UUID) -> None:
     project.deleted_at = datetime.now(timezone.utc)
     project.updated_at = datetime.now(timezone.utc)
     db.commit()
+    lookup_cache.invalidate(("project", project_id))
+    lookup_cache.invalidate_where(lambda key: key[0] == "member" and key[1] == project_id)
 
-    try:
-        minio_client.delete_project_bucket(str(project_id))
-    except Exception:
-        pass
\ No newline at end of file
+    # Stored objects are removed in the background; see purge_service.
+    purge_service.schedule_purge(project_id)
@@ -0,0 +1,260 @@
+"""
+Background purge of deleted projects' stored objects.
+
+delete_project only soft-deletes the row and calls schedule_purge(). A small pool
+of purge workers (PROJECT_PURGE_WORKERS) then empties the project bucket with
+batched deletes and removes it, so no API worker waits on storage.
+
+Purges are resumable: the work left is whatever is still in the bucket. On
+startup, every soft-deleted project whose bucket still exists is rescheduled,
+which picks up purges interrupted by a crash or restart.
+
+A sweep thread also deletes presigned image uploads that were never completed
+(no submission was created for them) once their completion token has expired.
+"""
+
+import logging
+import queue
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.models import Project, Submission
+from db.session import SessionLocal
+from services import minio_client
+
+logger = logging.getLogger(__name__)
+
+# Finished purges kept for GET /metrics/project-purges.
+MAX_FINISHED_PURGES = 100
+
+
+@dataclass
+class PurgeProgress:
+    project_id: str
+    state: str = "queued"  # queued | running | complete | failed
+    objects_deleted: int = 0
+    queued_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+
+
+_queue: "queue.Queue[str]" = queue.Queue()
+_progress: dict[str, PurgeProgress] = {}
+_progress_lock = threading.Lock()
+_stop = threading.Event()
+_workers: list[threading.Thread] = []
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def schedule_purge(project_id: uuid.UUID | str) -> bool:
+    """Queue a project's bucket for purging; False if it is already queued or running."""
+    key = str(project_id)
+    with _progress_lock:
+        current = _progress.get(key)
+        if current is not None and current.state in ("queued", "running"):
+            return False
+        _progress[key] = PurgeProgress(project_id=key, queued_at=_now())
+    _queue.put(key)
+    return True
+
+
+def purge_project_bucket(progress: PurgeProgress) -> None:
+    """Delete every object in the project bucket, PROJECT_PURGE_BATCH_SIZE at a time, then the bucket."""
+    bucket = progress.project_id
+    if not minio_client.bucket_exists(bucket):
+        return
+    names = minio_client.iter_object_names(bucket)
+    while batch := list(islice(names, settings.PROJECT_PURGE_BATCH_SIZE)):
+        if _stop.is_set():
+            # Left for the next process: the remaining objects are the checkpoint.
+            raise InterruptedError("Shutting down")
+        failed = minio_client.delete_files(bucket, batch)
+        progress.objects_deleted += len(batch) - len(failed)
+        if failed:
+            raise OSError(f"Could not delete {len(failed)} object(s), e.g. {failed[0]}")
+    minio_client.delete_bucket(bucket)
+
+
+def _run_purge(project_id: str) -> None:
+    with _progress_lock:
+        progress = _progress.setdefault(project_id, PurgeProgress(project_id=project_id))
+        progress.state = "running"
+        progress.started_at = _now()
+
+    try:
+        purge_project_bucket(progress)
+    except Exception as exc:
+        logger.warning("[purge] Purge of project %s stopped after %d object(s): %s",
+                       project_id, progress.objects_deleted, exc)
+        progress.state = "failed"
+        progress.error = str(exc)
+    else:
+        logger.info("[purge] Purged project %s (%d object(s))", project_id, progress.objects_deleted)
+        progress.state = "complete"
+    progress.finished_at = _now()
+    _trim_finished()
+
+
+def _trim_finished() -> None:
+    with _progress_lock:
+        finished = [p for p in _progress.values() if p.state in ("complete", "failed")]
+        finished.sort(key=lambda p: p.finished_at)
+        for progress in finished[:-MAX_FINISHED_PURGES]:
+            del _progress[progress.project_id]
+
+
+def _worker_loop() -> None:
+    while not _stop.is_set():
+        try:
+            project_id = _queue.get(timeout=1.0)
+        except queue.Empty:
+            continue
+        try:
+            _run_purge(project_id)
+        finally:
+            _queue.task_done()
+
+
+def _pending_project_ids() -> list[str]:
+    """Soft-deleted projects whose bucket still exists (purge never ran or was interrupted)."""
+    db: Session = SessionLocal()
+    try:
+        deleted = {str(project_id) for (project_id,) in db.query(Project.id).filter(Project.deleted_at.isnot(None))}
+    finally:
+        db.close()
+    return sorted(deleted.intersection(minio_client.list_buckets()))
+
+
+def _presigned_submission_id(object_name: str) -> uuid.UUID | None:
+    """The submission id in a presigned upload's name ("images/{submission_id}/{filename}")."""
+    parts = object_name.split("/")
+    if len(parts) != 3 or parts[0] != "images":
+        return None
+    try:
+        return uuid.UUID(parts[1])
+    except ValueError:
+        return None
+
+
+def _existing_submission_ids(submission_ids: list[uuid.UUID]) -> set[uuid.UUID]:
+    db: Session = SessionLocal()
+    try:
+        return {submission_id for (submission_id,) in db.query(Submission.id).filter(Submission.id.in_(submission_ids))}
+    finally:
+        db.close()
+
+
+def sweep_abandoned_uploads() -> int:
+    """
+    Delete live projects' presigned uploads that have no submission and are older than
+    UPLOAD_ABANDONED_AFTER_SECONDS, PROJECT_PURGE_BATCH_SIZE at a time. Returns the number deleted.
+    """
+    db: Session = SessionLocal()
+    try:
+        live = {str(project_id) for (project_id,) in db.query(Project.id).filter(Project.deleted_at.is_(None))}
+    finally:
+        db.close()
+
+    cutoff = _now() - timedelta(seconds=settings.UPLOAD_ABANDONED_AFTER_SECONDS)
+    deleted = 0
+    for bucket in sorted(live.intersection(minio_client.list_buckets())):
+        candidates = (
+            (obj.name, submission_id)
+            for obj in minio_client.iter_objects(bucket, "images/")
+            if obj.last_modified is not None and obj.last_modified < cutoff
+            and (submission_id := _presigned_submission_id(obj.name)) is not None
+        )
+        while batch := list(islice(candidates, settings.PROJECT_PURGE_BATCH_SIZE)):
+            if _stop.is_set():
+                return deleted
+            completed = _existing_submission_ids([submission_id for _, submission_id in batch])
+            abandoned = [name for name, submission_id in batch if submission_id not in completed]
+            if abandoned:
+                failed = minio_client.delete_files(bucket, abandoned)
+                deleted += len(abandoned) - len(failed)
+    return deleted
+
+
+def _sweep_loop() -> None:
+    while not _stop.wait(timeout=settings.UPLOAD_SWEEP_INTERVAL_SECONDS):
+        try:
+            deleted = sweep_abandoned_uploads()
+        except Exception:
+            logger.exception("[purge] Sweep of abandoned uploads failed")
+            continue
+        if deleted:
+            logger.info("[purge] Deleted %d abandoned upload(s)", deleted)
+
+
+def start_purge_workers() -> None:
+    """
+    Start PROJECT_PURGE_WORKERS purge threads and the abandoned-upload sweep,
+    and reschedule unfinished purges.
+    """
+    if _workers:
+        return
+    _stop.clear()
+
+    try:
+        pending = _pending_project_ids()
+    except Exception as exc:
+        logger.warning("[purge] Could not look up unfinished purges: %s", exc)
+        pending = []
+    for project_id in pending:
+        schedule_purge(project_id)
+    if pending:
+        logger.info("[purge] Resuming %d unfinished project purge(s)", len(pending))
+
+    for index in range(settings.PROJECT_PURGE_WORKERS):
+        worker = threading.Thread(target=_worker_loop, name=f"purge-worker-{index}", daemon=True)
+        worker.start()
+        _workers.append(worker)
+    sweeper = threading.Thread(target=_sweep_loop, name="upload-sweep", daemon=True)
+    sweeper.start()
+    _workers.append(sweeper)
+
+
+def stop_purge_workers(timeout: float = 5.0) -> None:
+    """Stop after the current batch; unfinished purges resume on the next start."""
+    _stop.set()
+    for worker in _workers:
+        worker.join(timeout=timeout)
+    _workers.clear()
+
+
+def get_progress(project_id: uuid.UUID | str) -> PurgeProgress | None:
+    with _progress_lock:
+        return _progress.get(str(project_id))
+
+
+def stats() -> dict:
+    with _progress_lock:
+        purges = [asdict(p) for p in _progress.values()]
+    return {
+        "workers": len(_workers),
+        "queued": sum(1 for p in purges if p["state"] == "queued"),
+        "running": sum(1 for p in purges if p["state"] == "running"),
+        "purges": purges,
+    }
+
+
+def reset() -> None:
+    """Forget all progress and queued purges (tests)."""
+    with _progress_lock:
+        _progress.clear()
+    while True:
+        try:
+            _queue.get_nowait()
+            _queue.task_done()
+        except queue.Empty:
+            break
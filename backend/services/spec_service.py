@@ -0,0 +1,151 @@
+"""
+Design-spec text for VLM prompts.
+
+Text is extracted once per spec version and kept in two places:
+  - a sidecar object "spec-text/<etag>.txt" in the project bucket, written in the
+    background when a design is uploaded (or by backfill_spec_text.py for old buckets);
+  - an in-process LRU keyed by bucket plus ETag.
+A detection therefore lists designs/ once and reads small text blobs; a PDF is only
+downloaded and parsed when neither copy exists. A re-uploaded PDF gets a new ETag,
+so stale text is never served.
+"""
+
+import logging
+import threading
+
+from core.config import settings
+from services import minio_client
+from utils.cache import LRUCache
+from utils.pdf_extract import extract_text_from_pdf
+
+logger = logging.getLogger(__name__)
+
+DESIGNS_PREFIX = "designs/"
+SPEC_TEXT_PREFIX = "spec-text/"
+SPEC_SEPARATOR = "\n\n---\n\n"
+
+_spec_text_cache = LRUCache(
+    max_size=settings.SPEC_TEXT_CACHE_MAX_BYTES,
+    sizeof=lambda text: len(text.encode("utf-8")),
+)
+
+
+def _is_pdf_name(object_name: str) -> bool:
+    return object_name.lower().endswith(".pdf")
+
+
+def _sidecar_name(etag: str) -> str:
+    return f"{SPEC_TEXT_PREFIX}{etag}.txt"
+
+
+def _read_sidecar(bucket: str, etag: str) -> str | None:
+    data = minio_client.get_file_if_exists(bucket=bucket, object_name=_sidecar_name(etag))
+    return None if data is None else data.decode("utf-8")
+
+
+def _extract_and_store(bucket: str, object_name: str, etag: str, data: bytes | None = None) -> str:
+    """Extract a PDF's text and persist it as a sidecar. A failed sidecar write is not fatal."""
+    if data is None:
+        data = minio_client.get_file(bucket=bucket, object_name=object_name)
+    text = extract_text_from_pdf(data).strip()
+    try:
+        minio_client.upload_file(
+            bucket=bucket,
+            object_name=_sidecar_name(etag),
+            file_data=text.encode("utf-8"),
+            content_type="text/plain; charset=utf-8",
+        )
+    except Exception as exc:
+        logger.warning("[spec] Could not store extracted text for %s/%s: %s", bucket, object_name, exc)
+    return text
+
+
+def _spec_text_for_object(bucket: str, object_name: str, etag: str) -> str:
+    key = (bucket, etag)
+    text = _spec_text_cache.get(key)
+    if text is None:
+        text = _read_sidecar(bucket, etag)
+        if text is None:
+            text = _extract_and_store(bucket, object_name, etag)
+        _spec_text_cache.put(key, text)
+    return text
+
+
+def load_spec_text(bucket: str) -> str | None:
+    """
+    Return the concatenated text of every design PDF in the bucket, or None if there is none.
+    Listing errors propagate; a PDF that cannot be read is skipped.
+    """
+    spec_parts = []
+    for object_name, etag in minio_client.list_object_etags(bucket=bucket, prefix=DESIGNS_PREFIX).items():
+        if not _is_pdf_name(object_name):
+            continue
+        try:
+            text = _spec_text_for_object(bucket, object_name, etag)
+        except Exception:
+            logger.warning("[spec] Could not extract text from %s/%s", bucket, object_name)
+            continue
+        if text:
+            spec_parts.append(text)
+    return SPEC_SEPARATOR.join(spec_parts) if spec_parts else None
+
+
+# -------------------------
+# Precompute (upload time) + backfill
+# -------------------------
+
+def precompute_spec_text(bucket: str, object_name: str, data: bytes | None = None) -> None:
+    """Extract an uploaded design PDF's text into its sidecar and the cache. Never raises."""
+    if not _is_pdf_name(object_name):
+        return
+    try:
+        etag = minio_client.get_etag(bucket=bucket, object_name=object_name)
+        text = _extract_and_store(bucket, object_name, etag, data)
+        _spec_text_cache.put((bucket, etag), text)
+        logger.info("[spec] Stored extracted text for %s/%s", bucket, object_name)
+    except Exception as exc:
+        logger.warning("[spec] Text extraction failed for %s/%s: %s", bucket, object_name, exc)
+
+
+def schedule_spec_text_extraction(bucket: str, object_name: str, data: bytes | None = None) -> None:
+    """Run precompute_spec_text in a background thread so the upload response is not delayed."""
+    threading.Thread(
+        target=precompute_spec_text,
+        args=(bucket, object_name, data),
+        daemon=True,
+    ).start()
+
+
+def backfill_bucket(bucket: str, prune: bool = False) -> dict[str, int]:
+    """
+    Write missing sidecars for every design PDF in a bucket.
+    With prune=True, also delete sidecars whose PDF version no longer exists.
+    """
+    stats = {"extracted": 0, "existing": 0, "pruned": 0}
+    current_etags = set()
+    for object_name, etag in minio_client.list_object_etags(bucket=bucket, prefix=DESIGNS_PREFIX).items():
+        if not _is_pdf_name(object_name):
+            continue
+        current_etags.add(etag)
+        if minio_client.get_file_if_exists(bucket=bucket, object_name=_sidecar_name(etag)) is not None:
+            stats["existing"] += 1
+            continue
+        _extract_and_store(bucket, object_name, etag)
+        stats["extracted"] += 1
+
+    if prune:
+        for sidecar in minio_client.list_objects(bucket=bucket, prefix=SPEC_TEXT_PREFIX):
+            etag = sidecar[len(SPEC_TEXT_PREFIX):].removesuffix(".txt")
+            if etag not in current_etags:
+                minio_client.delete_file(bucket=bucket, object_name=sidecar)
+                stats["pruned"] += 1
+    return stats
+
+
+def invalidate_spec_text(bucket: str) -> None:
+    """Drop cached spec text for a bucket (called when a design file is written)."""
+    _spec_text_cache.discard_where(lambda key: key[0] == bucket)
+
+
+def clear_spec_text_cache() -> None:
+    _spec_text_cache.clear()
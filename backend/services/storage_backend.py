@@ -0,0 +1,418 @@
+"""
+Object storage backends behind services/minio_client.py.
+
+The rest of the app calls the minio_client facade; it delegates to the backend
+selected by STORAGE_BACKEND:
+
+- "minio" (default): S3 protocol via the MinIO client.
+- "local": a directory per bucket under LOCAL_STORAGE_ROOT, for single-node
+  deployments, benchmarks and tests. Reads are memory-mapped and returned as
+  zero-copy memoryviews; presigned URLs point at the API's /storage/local routes.
+
+Every backend remembers which buckets it has seen, so writes do not pay a
+bucket_exists round trip each time.
+"""
+
+import mimetypes
+import mmap
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+from urllib.parse import quote
+
+from minio import Minio
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+from core.config import settings
+from utils import signed_token
+
+# Chunk size for copying streams into local files.
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    name: str
+    size: int
+    etag: str
+    last_modified: datetime | None = None
+
+
+class StorageBackend(ABC):
+
+    def __init__(self):
+        self._known_buckets: set[str] = set()
+        self._buckets_lock = threading.Lock()
+
+    # -------------------------
+    # Buckets
+    # -------------------------
+
+    def ensure_bucket(self, bucket: str) -> None:
+        """Create the bucket if needed; only the first call per bucket touches storage."""
+        if bucket in self._known_buckets:
+            return
+        if not self.bucket_exists(bucket):
+            self.make_bucket(bucket)
+        with self._buckets_lock:
+            self._known_buckets.add(bucket)
+
+    def forget_bucket(self, bucket: str) -> None:
+        with self._buckets_lock:
+            self._known_buckets.discard(bucket)
+
+    @abstractmethod
+    def bucket_exists(self, bucket: str) -> bool: ...
+
+    @abstractmethod
+    def make_bucket(self, bucket: str) -> None: ...
+
+    @abstractmethod
+    def remove_bucket(self, bucket: str) -> None:
+        """Remove an (emptied) bucket."""
+
+    @abstractmethod
+    def list_buckets(self) -> list[str]: ...
+
+    # -------------------------
+    # Objects
+    # -------------------------
+
+    @abstractmethod
+    def put_object(self, bucket: str, object_name: str, stream: BinaryIO, length: int, content_type: str) -> None:
+        """Store stream as an object; length=-1 when unknown."""
+
+    @abstractmethod
+    def get_object(self, bucket: str, object_name: str) -> memoryview:
+        """Whole object. Raises ObjectNotFound."""
+
+    @abstractmethod
+    def get_object_head(self, bucket: str, object_name: str, length: int) -> bytes:
+        """First length bytes of an object. Raises ObjectNotFound."""
+
+    @abstractmethod
+    def stat_object(self, bucket: str, object_name: str) -> ObjectInfo:
+        """Raises ObjectNotFound."""
+
+    @abstractmethod
+    def iter_objects(self, bucket: str, prefix: str) -> Iterator[ObjectInfo]:
+        """Objects under prefix (recursive), fetched lazily page by page."""
+
+    def list_objects(self, bucket: str, prefix: str) -> list[ObjectInfo]:
+        return list(self.iter_objects(bucket, prefix))
+
+    @abstractmethod
+    def remove_object(self, bucket: str, object_name: str) -> None:
+        """Delete an object; deleting a missing object is not an error."""
+
+    def remove_objects(self, bucket: str, object_names: Iterable[str]) -> list[str]:
+        """Delete several objects; returns the names that could not be deleted."""
+        failed = []
+        for object_name in object_names:
+            try:
+                self.remove_object(bucket, object_name)
+            except OSError:
+                failed.append(object_name)
+        return failed
+
+    @abstractmethod
+    def presigned_get_url(self, bucket: str, object_name: str, expires_seconds: int, download: bool) -> str: ...
+
+    @abstractmethod
+    def presigned_put_url(self, bucket: str, object_name: str, expires_seconds: int) -> str: ...
+
+
+# -------------------------
+# MinIO / S3
+# -------------------------
+
+# Multipart part size for uploads: the S3 minimum, and the most put_object
+# buffers in memory per upload.
+MINIO_PART_SIZE = 5 * 1024 * 1024
+
+
+class MinioBackend(StorageBackend):
+
+    def __init__(self):
+        super().__init__()
+        self._client: Minio | None = None
+
+    @property
+    def client(self) -> Minio:
+        if self._client is None:
+            self._client = Minio(
+                settings.MINIO_ENDPOINT,
+                access_key=settings.MINIO_ACCESS_KEY,
+                secret_key=settings.MINIO_SECRET_KEY,
+                secure=settings.MINIO_USE_SSL,
+            )
+        return self._client
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return self.client.bucket_exists(bucket)
+
+    def make_bucket(self, bucket: str) -> None:
+        self.client.make_bucket(bucket)
+
+    def remove_bucket(self, bucket: str) -> None:
+        self.client.remove_bucket(bucket)
+        self.forget_bucket(bucket)
+
+    def list_buckets(self) -> list[str]:
+        return [bucket.name for bucket in self.client.list_buckets()]
+
+    def put_object(self, bucket: str, object_name: str, stream: BinaryIO, length: int, content_type: str) -> None:
+        self.client.put_object(
+            bucket,
+            object_name,
+            stream,
+            length=length,
+            content_type=content_type,
+            part_size=MINIO_PART_SIZE,
+            num_parallel_uploads=1,  # one part buffered at a time
+        )
+
+    def _read(self, bucket: str, object_name: str, **range_kwargs) -> bytes:
+        try:
+            response = self.client.get_object(bucket, object_name, **range_kwargs)
+        except S3Error as exc:
+            if exc.code == "NoSuchKey":
+                raise ObjectNotFound(f"{bucket}/{object_name}") from exc
+            raise
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def get_object(self, bucket: str, object_name: str) -> memoryview:
+        return memoryview(self._read(bucket, object_name))
+
+    def get_object_head(self, bucket: str, object_name: str, length: int) -> bytes:
+        return self._read(bucket, object_name, offset=0, length=length)
+
+    def stat_object(self, bucket: str, object_name: str) -> ObjectInfo:
+        try:
+            stat = self.client.stat_object(bucket, object_name)
+        except S3Error as exc:
+            if exc.code == "NoSuchKey":
+                raise ObjectNotFound(f"{bucket}/{object_name}") from exc
+            raise
+        return ObjectInfo(name=object_name, size=stat.size, etag=stat.etag, last_modified=stat.last_modified)
+
+    def iter_objects(self, bucket: str, prefix: str) -> Iterator[ObjectInfo]:
+        for obj in self.client.list_objects(bucket, prefix=prefix, recursive=True):
+            yield ObjectInfo(
+                name=obj.object_name, size=obj.size, etag=obj.etag, last_modified=obj.last_modified,
+            )
+
+    def remove_object(self, bucket: str, object_name: str) -> None:
+        self.client.remove_object(bucket, object_name)
+
+    def remove_objects(self, bucket: str, object_names: Iterable[str]) -> list[str]:
+        """One DeleteObjects request per 1000 names instead of a request per object."""
+        errors = self.client.remove_objects(bucket, (DeleteObject(name) for name in object_names))
+        # The result is lazy: the deletes are only sent while it is consumed.
+        return [error.name for error in errors]
+
+    def presigned_get_url(self, bucket: str, object_name: str, expires_seconds: int, download: bool) -> str:
+        extra_params = None
+        if download:
+            filename = object_name.split("/")[-1]
+            extra_params = {
+                "response-content-disposition": f'attachment; filename="{filename}"'
+            }
+        return self.client.presigned_get_object(
+            bucket,
+            object_name,
+            expires=timedelta(seconds=expires_seconds),
+            extra_query_params=extra_params,
+        )
+
+    def presigned_put_url(self, bucket: str, object_name: str, expires_seconds: int) -> str:
+        return self.client.presigned_put_object(bucket, object_name, expires=timedelta(seconds=expires_seconds))
+
+
+# -------------------------
+# Local filesystem
+# -------------------------
+
+# In-progress writes; renamed into place when complete and never listed.
+_PARTIAL_SUFFIX = ".part"
+
+
+class LocalBackend(StorageBackend):
+
+    def __init__(self, root: str | os.PathLike):
+        super().__init__()
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _bucket_dir(self, bucket: str) -> Path:
+        if not bucket or "/" in bucket or bucket in (".", ".."):
+            raise ValueError(f"Invalid bucket name: {bucket!r}")
+        return self.root / bucket
+
+    def path_for(self, bucket: str, object_name: str) -> Path:
+        """Filesystem path of an object (rejects names that escape the bucket)."""
+        bucket_dir = self._bucket_dir(bucket)
+        path = (bucket_dir / object_name).resolve()
+        if not path.is_relative_to(bucket_dir.resolve()) or path == bucket_dir.resolve():
+            raise ValueError(f"Invalid object name: {object_name!r}")
+        return path
+
+    def _existing_path(self, bucket: str, object_name: str) -> Path:
+        path = self.path_for(bucket, object_name)
+        if not path.is_file():
+            raise ObjectNotFound(f"{bucket}/{object_name}")
+        return path
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        # Changes whenever the object is rewritten; spec_service keys its cache on it.
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    @staticmethod
+    def _mtime(stat: os.stat_result) -> datetime:
+        return datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return self._bucket_dir(bucket).is_dir()
+
+    def make_bucket(self, bucket: str) -> None:
+        self._bucket_dir(bucket).mkdir(parents=True, exist_ok=True)
+
+    def remove_bucket(self, bucket: str) -> None:
+        bucket_dir = self._bucket_dir(bucket)
+        # Objects are already deleted; only (nested) empty directories remain.
+        for directory in sorted((p for p in bucket_dir.rglob("*") if p.is_dir()), reverse=True):
+            directory.rmdir()
+        bucket_dir.rmdir()
+        self.forget_bucket(bucket)
+
+    def list_buckets(self) -> list[str]:
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def put_object(self, bucket: str, object_name: str, stream: BinaryIO, length: int, content_type: str) -> None:
+        path = self.path_for(bucket, object_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}{_PARTIAL_SUFFIX}")
+        try:
+            with open(partial, "wb") as out:
+                remaining = length
+                while remaining != 0:
+                    chunk = stream.read(COPY_CHUNK_BYTES if remaining < 0 else min(COPY_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    if remaining > 0:
+                        remaining -= len(chunk)
+            os.replace(partial, path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    def get_object(self, bucket: str, object_name: str) -> memoryview:
+        """Memory-mapped, read-only view; the mapping is released with the last reference to it."""
+        path = self._existing_path(bucket, object_name)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b"")
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def get_object_head(self, bucket: str, object_name: str, length: int) -> bytes:
+        with open(self._existing_path(bucket, object_name), "rb") as f:
+            return f.read(length)
+
+    def stat_object(self, bucket: str, object_name: str) -> ObjectInfo:
+        stat = self._existing_path(bucket, object_name).stat()
+        return ObjectInfo(
+            name=object_name, size=stat.st_size, etag=self._etag(stat), last_modified=self._mtime(stat),
+        )
+
+    def iter_objects(self, bucket: str, prefix: str) -> Iterator[ObjectInfo]:
+        bucket_dir = self._bucket_dir(bucket)
+        if not bucket_dir.is_dir():
+            return iter(())
+        objects = []
+        for path in bucket_dir.rglob("*"):
+            if not path.is_file() or path.name.endswith(_PARTIAL_SUFFIX):
+                continue
+            name = path.relative_to(bucket_dir).as_posix()
+            if name.startswith(prefix):
+                stat = path.stat()
+                objects.append(ObjectInfo(
+                    name=name, size=stat.st_size, etag=self._etag(stat), last_modified=self._mtime(stat),
+                ))
+        # Sorted like an S3 listing.
+        return iter(sorted(objects, key=lambda obj: obj.name))
+
+    def remove_object(self, bucket: str, object_name: str) -> None:
+        self.path_for(bucket, object_name).unlink(missing_ok=True)
+
+    def _signed_url(self, method: str, bucket: str, object_name: str, expires_seconds: int, **claims) -> str:
+        token = signed_token.sign(
+            {"method": method, "bucket": bucket, "object_name": object_name, **claims},
+            settings.DETECTION_WEBHOOK_SECRET,
+            expires_seconds,
+        )
+        return f"{settings.PUBLIC_API_URL}/storage/local/{quote(bucket)}/{quote(object_name)}?token={token}"
+
+    def presigned_get_url(self, bucket: str, object_name: str, expires_seconds: int, download: bool) -> str:
+        return self._signed_url("GET", bucket, object_name, expires_seconds, download=download)
+
+    def presigned_put_url(self, bucket: str, object_name: str, expires_seconds: int) -> str:
+        return self._signed_url("PUT", bucket, object_name, expires_seconds)
+
+    def verify_url_token(self, token: str, method: str, bucket: str, object_name: str) -> dict:
+        """Claims of a presigned-URL token for this exact request. Raises signed_token.InvalidToken."""
+        claims = signed_token.verify(token, settings.DETECTION_WEBHOOK_SECRET)
+        if (claims.get("method"), claims.get("bucket"), claims.get("object_name")) != (method, bucket, object_name):
+            raise signed_token.InvalidToken("Token is for a different request")
+        return claims
+
+    @staticmethod
+    def content_type_for(object_name: str) -> str:
+        return mimetypes.guess_type(object_name)[0] or "application/octet-stream"
+
+
+# -------------------------
+# Selection
+# -------------------------
+
+_backend: StorageBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(settings.STORAGE_BACKEND)
+    return _backend
+
+
+def create_backend(name: str) -> StorageBackend:
+    if name == "minio":
+        return MinioBackend()
+    if name == "local":
+        return LocalBackend(settings.LOCAL_STORAGE_ROOT)
+    raise ValueError(f"Unknown STORAGE_BACKEND {name!r} (expected 'minio' or 'local')")
+
+
+def set_backend(backend: StorageBackend | None) -> None:
+    """Replace the active backend (tests, benchmarks); None re-reads STORAGE_BACKEND on next use."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -1,23 +1,51 @@
+import asyncio
+import logging
+import tempfile
 import uuid
 
-from fastapi import UploadFile, HTTPException, status
+from fastapi import Request, UploadFile, HTTPException, status
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from db.models import Submission
-from schemas.storage import ImageUploadResponse, PresignedUrlResponse
+from core.config import settings
+from schemas.storage import (
+    BatchImageUploadResponse,
+    BatchImageUploadResult,
+    ImageUploadResponse,
+    PresignedImageUpload,
+    PresignedImageUploadResponse,
+    PresignedUrlResponse,
+)
 from schemas.projects import UploadResponse
 from schemas.enums import SubmissionStatus, SubmissionPassFail
 from services import minio_client
 from services import detection_service
+from services import handoff_cache
 from services import project_service
+from services import spec_service
+from services.storage_backend import LocalBackend, get_backend
 from core import exceptions
+from utils import signed_token
 from utils.file_validation import (
     MAX_IMAGE_UPLOAD_BYTES,
     MAX_DESIGN_UPLOAD_BYTES,
+    SizeLimitedReader,
+    UploadTooLarge,
     is_image,
     is_pdf,
 )
 
+logger = logging.getLogger(__name__)
+
+# Bytes read ahead of the upload to check the file signature (magic bytes).
+SIGNATURE_PEEK_BYTES = 16
+
+# Completion tokens outlive the PUT URL so a slow upload can still be completed.
+COMPLETION_TOKEN_TTL_SECONDS = 24 * 60 * 60
+
 
 def _validate_upload_file(
     file: UploadFile,
@@ -37,6 +65,61 @@ def _validate_upload_file(
         )
 
 
+async def _stream_upload(
+    file: UploadFile,
+    bucket: str,
+    object_name: str,
+    max_bytes: int,
+    signature_ok,
+    invalid_detail: str,
+    create_bucket: bool = True,
+) -> None:
+    """
+    Stream an upload into MinIO without holding the file in memory.
+
+    The signature is checked on the first bytes before anything is stored, and
+    the size limit is enforced while streaming (up front when the size is known).
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB",
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    head = await file.read(SIGNATURE_PEEK_BYTES)
+    if signature_ok is not None and not signature_ok(head):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=invalid_detail,
+        )
+    await file.seek(0)
+
+    try:
+        await run_in_threadpool(
+            minio_client.upload_stream,
+            bucket=bucket,
+            object_name=object_name,
+            stream=SizeLimitedReader(file.file, max_bytes),
+            content_type=file.content_type or "",
+            length=file.size if file.size is not None else -1,
+            create_bucket=create_bucket,
+        )
+    except UploadTooLarge:
+        raise too_large
+
+
+async def _hand_off(file: UploadFile, submission_id: uuid.UUID) -> None:
+    """
+    Offer a stored upload's bytes to the detection worker (services/handoff_cache.py).
+    The spooled upload is re-read locally, which is far cheaper than the worker's GET.
+    """
+    if not handoff_cache.accepts(file.size):
+        return
+    await file.seek(0)
+    handoff_cache.offer(submission_id, await file.read())
+
+
 # -------------------------
 # Uploads
 # -------------------------
@@ -50,35 +133,26 @@ async def upload_image(
 ) -> ImageUploadResponse:
     project_service.get_project(db, project_id)
     _validate_upload_file(file, allowed_types, "PNG, JPEG")
-    content_type = file.content_type or ""
 
     # Upload image to MinIO
-    contents = await file.read()
-    if len(contents) > MAX_IMAGE_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB",
-        )
-    if not is_image(contents):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File content is not a valid PNG or JPEG image",
-        )
     bucket = str(project_id)
     object_name = f"images/{file.filename}"
-
-    minio_client.upload_file(
-        bucket=bucket,
-        object_name=object_name,
-        file_data=contents,
-        content_type=content_type,
+    await _stream_upload(
+        file,
+        bucket,
+        object_name,
+        MAX_IMAGE_UPLOAD_BYTES,
+        is_image,
+        "File content is not a valid PNG or JPEG image",
     )
 
     object_key = f"{bucket}/{object_name}"
+    submission_id = uuid.uuid4()
+    await _hand_off(file, submission_id)
 
     # Create submission
     submission = Submission(
-        id=uuid.uuid4(),
+        id=submission_id,
         project_id=project_id,
         submitted_by_user_id=user_id,
         image_id=object_key,
@@ -104,36 +178,261 @@ async def upload_image(
     )
 
 
-async def upload_design(
+async def _store_batch_image(
+    bucket: str,
+    file: UploadFile,
+    allowed_types: list[str],
+    limit: asyncio.Semaphore,
+) -> BatchImageUploadResult:
+    """Validate and upload one file of a batch. Failures are reported, not raised."""
+    filename = file.filename or ""
+    async with limit:
+        try:
+            _validate_upload_file(file, allowed_types, "PNG, JPEG")
+            object_name = f"images/{filename}"
+            await _stream_upload(
+                file,
+                bucket,
+                object_name,
+                MAX_IMAGE_UPLOAD_BYTES,
+                is_image,
+                "File content is not a valid PNG or JPEG image",
+                create_bucket=False,
+            )
+            submission_id = uuid.uuid4()
+            await _hand_off(file, submission_id)
+        except HTTPException as exc:
+            return BatchImageUploadResult(filename=filename, error=exc.detail)
+        except Exception as exc:
+            logger.warning("[storage] Batch upload of %s to %s failed: %s", filename, bucket, exc)
+            return BatchImageUploadResult(filename=filename, error="Upload to storage failed")
+    return BatchImageUploadResult(
+        filename=filename,
+        object_key=f"{bucket}/{object_name}",
+        submission_id=submission_id,
+    )
+
+
+async def upload_images(
     db: Session,
     project_id: uuid.UUID,
-    file: UploadFile,
+    user_id: uuid.UUID,
+    files: list[UploadFile],
     allowed_types: list[str],
-) -> UploadResponse:
+) -> BatchImageUploadResponse:
+    """
+    Batch form of upload_image: files are uploaded to MinIO concurrently
+    (UPLOAD_BATCH_CONCURRENCY streams at a time), the submissions of all stored files are
+    inserted in one transaction and queued for detection together. A file that
+    fails validation or upload gets an error result; the rest of the batch proceeds.
+    """
     project_service.get_project(db, project_id)
-    _validate_upload_file(file, allowed_types, "PDF, TXT")
-    content_type = file.content_type or ""
+    if len(files) > settings.UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many files. Maximum is {settings.UPLOAD_BATCH_MAX_FILES} per request",
+        )
+
+    bucket = str(project_id)
+    await run_in_threadpool(minio_client.ensure_bucket, bucket)
+
+    # Same filename twice would overwrite one object with the other.
+    seen: set[str] = set()
+    duplicates: set[int] = set()
+    for index, file in enumerate(files):
+        if file.filename and file.filename in seen:
+            duplicates.add(index)
+        seen.add(file.filename)
+
+    limit = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
 
-    contents = await file.read()
-    if len(contents) > MAX_DESIGN_UPLOAD_BYTES:
+    async def store(index: int, file: UploadFile) -> BatchImageUploadResult:
+        if index in duplicates:
+            return BatchImageUploadResult(filename=file.filename or "", error="Duplicate filename in batch")
+        return await _store_batch_image(bucket, file, allowed_types, limit)
+
+    results = list(await asyncio.gather(*(store(index, file) for index, file in enumerate(files))))
+
+    submissions = []
+    for result in results:
+        if result.error is None:
+            submissions.append(Submission(
+                id=result.submission_id,
+                project_id=project_id,
+                submitted_by_user_id=user_id,
+                image_id=result.object_key,
+                status=SubmissionStatus.queued,
+                pass_fail=SubmissionPassFail.unknown,
+            ))
+    if submissions:
+        db.add_all(submissions)
+        db.commit()
+        detection_service.trigger_detection_batch(
+            [(submission.id, project_id, submission.image_id) for submission in submissions]
+        )
+
+    return BatchImageUploadResponse(
+        project_id=project_id,
+        uploaded=len(submissions),
+        failed=len(results) - len(submissions),
+        results=results,
+    )
+
+
+# -------------------------
+# Direct uploads (presigned PUT + signed completion)
+# -------------------------
+
+def presign_image_uploads(
+    db: Session,
+    project_id: uuid.UUID,
+    user_id: uuid.UUID,
+    filenames: list[str],
+) -> PresignedImageUploadResponse:
+    """
+    Issue presigned PUT URLs so clients upload images straight to MinIO.
+
+    Each upload gets its submission id up front: it names the object
+    ("images/{submission_id}/{filename}") and is carried, with project and user,
+    in a completion token signed with DETECTION_WEBHOOK_SECRET.
+    """
+    project_service.get_project(db, project_id)
+    if len(filenames) > settings.UPLOAD_BATCH_MAX_FILES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size is {MAX_DESIGN_UPLOAD_BYTES // (1024 * 1024)} MB",
+            detail=f"Too many files. Maximum is {settings.UPLOAD_BATCH_MAX_FILES} per request",
         )
-    if content_type == "application/pdf" and not is_pdf(contents):
+    if any(not name or "/" in name for name in filenames):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File content is not a valid PDF",
+            detail="Filenames must be non-empty and must not contain '/'",
         )
+
     bucket = str(project_id)
-    object_name = f"designs/{file.filename}"
+    minio_client.ensure_bucket(bucket)
+    expires = settings.PRESIGNED_UPLOAD_EXPIRES_SECONDS
 
-    minio_client.upload_file(
-        bucket=bucket,
-        object_name=object_name,
-        file_data=contents,
-        content_type=content_type,
+    uploads = []
+    for filename in filenames:
+        submission_id = uuid.uuid4()
+        object_name = f"images/{submission_id}/{filename}"
+        token = signed_token.sign(
+            {
+                "submission_id": str(submission_id),
+                "project_id": str(project_id),
+                "user_id": str(user_id),
+                "object_name": object_name,
+            },
+            settings.DETECTION_WEBHOOK_SECRET,
+            COMPLETION_TOKEN_TTL_SECONDS,
+        )
+        uploads.append(PresignedImageUpload(
+            filename=filename,
+            object_key=f"{bucket}/{object_name}",
+            upload_url=minio_client.get_presigned_put_url(bucket, object_name, expires),
+            completion_token=token,
+            expires_in=expires,
+        ))
+    return PresignedImageUploadResponse(project_id=project_id, uploads=uploads)
+
+
+def _reject_uploaded_object(bucket: str, object_name: str, detail: str) -> None:
+    try:
+        minio_client.delete_file(bucket=bucket, object_name=object_name)
+    except Exception as exc:
+        logger.warning("[storage] Could not delete rejected upload %s/%s: %s", bucket, object_name, exc)
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def complete_image_upload(db: Session, completion_token: str) -> ImageUploadResponse:
+    """
+    Finish a presigned upload: verify the token, check the stored object, then
+    create the queued submission and enqueue detection. Image bytes never pass
+    through the API (only the first few are read back to check the signature).
+    Completing the same upload twice, even concurrently, returns the existing submission.
+    """
+    try:
+        claims = signed_token.verify(completion_token, settings.DETECTION_WEBHOOK_SECRET)
+        submission_id = uuid.UUID(claims["submission_id"])
+        project_id = uuid.UUID(claims["project_id"])
+        user_id = uuid.UUID(claims["user_id"])
+        object_name = claims["object_name"]
+    except (signed_token.InvalidToken, KeyError, ValueError):
+        raise exceptions.InvalidUploadToken()
+
+    bucket = str(project_id)
+    object_key = f"{bucket}/{object_name}"
+    response = ImageUploadResponse(
+        filename=object_name.rsplit("/", 1)[-1],
+        project_id=project_id,
+        object_key=object_key,
+        submission_id=submission_id,
+    )
+    if db.get(Submission, submission_id) is not None:
+        return response
+
+    project_service.get_project(db, project_id)
+
+    size = minio_client.get_size_if_exists(bucket, object_name)
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image has not been uploaded",
+        )
+    if size > MAX_IMAGE_UPLOAD_BYTES:
+        _reject_uploaded_object(
+            bucket, object_name, f"File too large. Maximum size is {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB",
+        )
+    if not is_image(minio_client.get_file_head(bucket, object_name, SIGNATURE_PEEK_BYTES)):
+        _reject_uploaded_object(bucket, object_name, "File content is not a valid PNG or JPEG image")
+
+    db.add(Submission(
+        id=submission_id,
+        project_id=project_id,
+        submitted_by_user_id=user_id,
+        image_id=object_key,
+        status=SubmissionStatus.queued,
+        pass_fail=SubmissionPassFail.unknown,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent completion of the same upload inserted the row first; it queued detection.
+        db.rollback()
+        if db.get(Submission, submission_id) is None:
+            raise
+        return response
+
+    detection_service.trigger_detection(
+        submission_id=submission_id,
+        project_id=project_id,
+        image_object_key=object_key,
+    )
+    return response
+
+
+async def upload_design(
+    db: Session,
+    project_id: uuid.UUID,
+    file: UploadFile,
+    allowed_types: list[str],
+) -> UploadResponse:
+    project_service.get_project(db, project_id)
+    _validate_upload_file(file, allowed_types, "PDF, TXT")
+
+    bucket = str(project_id)
+    object_name = f"designs/{file.filename}"
+    await _stream_upload(
+        file,
+        bucket,
+        object_name,
+        MAX_DESIGN_UPLOAD_BYTES,
+        is_pdf if file.content_type == "application/pdf" else None,
+        "File content is not a valid PDF",
     )
+    spec_service.invalidate_spec_text(bucket)
+    # The extraction thread reads the PDF back from MinIO.
+    spec_service.schedule_spec_text_extraction(bucket, object_name)
 
     return UploadResponse(
         filename=file.filename,
@@ -142,6 +441,60 @@ async def upload_design(
     )
 
 
+# -------------------------
+# Local backend: presigned URL endpoints
+# -------------------------
+
+def _local_backend() -> LocalBackend:
+    backend = get_backend()
+    if not isinstance(backend, LocalBackend):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return backend
+
+
+def _verify_local_url(backend: LocalBackend, token: str, method: str, bucket: str, object_name: str) -> dict:
+    try:
+        return backend.verify_url_token(token, method, bucket, object_name)
+    except (signed_token.InvalidToken, ValueError):
+        raise exceptions.PermissionDenied("Invalid or expired storage URL")
+
+
+def local_object_response(bucket: str, object_name: str, token: str) -> FileResponse:
+    """Serve a presigned GET on the local backend (sendfile, no copy through Python)."""
+    backend = _local_backend()
+    claims = _verify_local_url(backend, token, "GET", bucket, object_name)
+    path = backend.path_for(bucket, object_name)
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Object not found")
+    return FileResponse(
+        path,
+        media_type=backend.content_type_for(object_name),
+        filename=path.name if claims.get("download") else None,
+    )
+
+
+async def store_local_object(bucket: str, object_name: str, token: str, request: Request) -> None:
+    """Accept a presigned PUT on the local backend, streaming the body to disk."""
+    backend = _local_backend()
+    _verify_local_url(backend, token, "PUT", bucket, object_name)
+
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as body:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_IMAGE_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File too large. Maximum size is {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)} MB",
+                )
+            body.write(chunk)
+        body.seek(0)
+        await run_in_threadpool(backend.ensure_bucket, bucket)
+        await run_in_threadpool(
+            backend.put_object, bucket, object_name, body, -1, request.headers.get("content-type", ""),
+        )
+
+
 # -------------------------
 # Downloads (Presigned URLs)
 # -------------------------
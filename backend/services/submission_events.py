@@ -0,0 +1,116 @@
+"""
+In-process pub/sub for submission status changes.
+
+Detection workers (threads) and request handlers call publish(); the per-project
+SSE endpoint subscribes with an asyncio queue. Events are handed to each
+subscriber's event loop with call_soon_threadsafe, so publishing never blocks a
+worker. Subscribers only see events published by the same process.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+
+from db.models import Submission
+
+logger = logging.getLogger(__name__)
+
+# Per-subscriber backlog; a client that falls this far behind loses its oldest events.
+MAX_PENDING_EVENTS = 100
+
+
+@dataclass(eq=False)
+class Subscription:
+    project_id: uuid.UUID
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=MAX_PENDING_EVENTS))
+
+
+_subscriptions: dict[uuid.UUID, set[Subscription]] = {}
+_lock = threading.Lock()
+
+
+def subscribe(project_id: uuid.UUID) -> Subscription:
+    """Register a subscriber for one project. Must be called from the subscriber's event loop."""
+    subscription = Subscription(project_id=project_id, loop=asyncio.get_running_loop())
+    with _lock:
+        _subscriptions.setdefault(project_id, set()).add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription) -> None:
+    with _lock:
+        subscribers = _subscriptions.get(subscription.project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del _subscriptions[subscription.project_id]
+
+
+def subscriber_count(project_id: uuid.UUID | None = None) -> int:
+    with _lock:
+        if project_id is not None:
+            return len(_subscriptions.get(project_id, ()))
+        return sum(len(subscribers) for subscribers in _subscriptions.values())
+
+
+def _value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+def publish(
+    project_id: uuid.UUID,
+    submission_id: uuid.UUID,
+    status: str,
+    pass_fail: str | None = None,
+    anomaly_count: int | None = None,
+    error_message: str | None = None,
+    annotation_status: str | None = None,
+) -> None:
+    """Send a status change to every subscriber of the project. Safe to call from any thread."""
+    with _lock:
+        subscribers = list(_subscriptions.get(project_id, ()))
+    if not subscribers:
+        return
+
+    event = {
+        "submission_id": str(submission_id),
+        "project_id": str(project_id),
+        "status": _value(status),
+        "pass_fail": _value(pass_fail),
+        "anomaly_count": anomaly_count,
+        "error_message": error_message,
+        "annotation_status": _value(annotation_status),
+    }
+    for subscription in subscribers:
+        try:
+            subscription.loop.call_soon_threadsafe(_offer, subscription.queue, event)
+        except RuntimeError:
+            # Subscriber's loop has closed; it will never unsubscribe itself.
+            unsubscribe(subscription)
+
+
+def publish_submission(submission: Submission) -> None:
+    """publish() the current state of a submission row. Never raises."""
+    try:
+        publish(
+            project_id=submission.project_id,
+            submission_id=submission.id,
+            status=submission.status,
+            pass_fail=submission.pass_fail,
+            anomaly_count=submission.anomaly_count,
+            error_message=submission.error_message,
+            annotation_status=submission.annotation_status,
+        )
+    except Exception:
+        logger.exception("[events] Could not publish status of submission %s", submission.id)
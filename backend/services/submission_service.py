@@ -1,13 +1,44 @@
+import base64
+import binascii
+import logging
 import uuid
+from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, load_only
 
-from db.models import Submission
+from db.models import Anomaly, Submission
 from schemas.submissions import SubmissionCreate, SubmissionUpdate
-from schemas.enums import SubmissionStatus, SubmissionPassFail
-from services import project_service
+from schemas.enums import AnnotationStatus, SubmissionStatus, SubmissionPassFail
+from services import detection_service, handoff_cache, minio_client, project_service, submission_events
 from core import exceptions
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+RETRYABLE_STATUSES = (
+    SubmissionStatus.failed,
+    SubmissionStatus.error,
+    SubmissionStatus.timeout,
+    SubmissionStatus.cancelled,
+)
+
+# Columns loaded for list pages (schemas.submissions.SubmissionSummary); the rest stay deferred.
+SUMMARY_COLUMNS = (
+    Submission.id,
+    Submission.project_id,
+    Submission.submitted_by_user_id,
+    Submission.submitted_at,
+    Submission.image_id,
+    Submission.status,
+    Submission.pass_fail,
+    Submission.anomaly_count,
+    Submission.annotated_image_key,
+    Submission.annotation_status,
+)
+
 
 def create_submission(
     db: Session,
@@ -27,6 +58,7 @@ def create_submission(
     db.add(submission)
     db.commit()
     db.refresh(submission)
+    submission_events.publish_submission(submission)
     return submission
 
 
@@ -44,22 +76,62 @@ def get_submission(
     return submission
 
 
+def encode_cursor(submission: Submission) -> str:
+    """Opaque keyset cursor for the position right after this submission (newest first)."""
+    raw = f"{submission.submitted_at.isoformat()}|{submission.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        submitted_at, submission_id = raw.split("|")
+        return datetime.fromisoformat(submitted_at), uuid.UUID(submission_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise exceptions.InvalidCursor()
+
+
 def list_submissions_for_project(
     db: Session,
     project_id: uuid.UUID,
     status: str | None = None,
     pass_fail: str | None = None,
-) -> list[Submission]:
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+) -> tuple[list[Submission], str | None]:
+    """
+    Return one page of submissions, newest first, and the cursor of the next page (None on the last).
+
+    Keyset pagination on (submitted_at, id): each page is an index range scan that
+    starts after the cursor, so latency does not grow with the page number. Only
+    SUMMARY_COLUMNS are loaded.
+    """
     project_service.get_project(db, project_id)
 
-    query = db.query(Submission).filter(Submission.project_id == project_id)
+    query = (
+        db.query(Submission)
+        .options(load_only(*SUMMARY_COLUMNS))
+        .filter(Submission.project_id == project_id)
+    )
 
     if status is not None:
         query = query.filter(Submission.status == status)
     if pass_fail is not None:
         query = query.filter(Submission.pass_fail == pass_fail)
+    if cursor is not None:
+        submitted_at, submission_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Submission.submitted_at, Submission.id) < tuple_(submitted_at, submission_id)
+        )
 
-    return query.order_by(Submission.submitted_at.desc()).all()
+    rows = (
+        query.order_by(Submission.submitted_at.desc(), Submission.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
 
 
 def update_submission(
@@ -69,6 +141,7 @@ def update_submission(
     payload: SubmissionUpdate,
 ) -> Submission:
     submission = get_submission(db, project_id, submission_id)
+    previous_status = submission.status
 
     if payload.status is not None:
         submission.status = payload.status
@@ -81,6 +154,8 @@ def update_submission(
 
     db.commit()
     db.refresh(submission)
+    if submission.status != previous_status:
+        submission_events.publish_submission(submission)
     return submission
 
 
@@ -90,8 +165,19 @@ def delete_submission(
     submission_id: uuid.UUID,
 ) -> None:
     submission = get_submission(db, project_id, submission_id)
+    annotated_image_key = submission.annotated_image_key
     db.delete(submission)
     db.commit()
+    _delete_annotated_image(annotated_image_key)
+
+
+def _delete_annotated_image(annotated_image_key: str | None) -> None:
+    if annotated_image_key:
+        try:
+            bucket, object_name = annotated_image_key.split("/", 1)
+            minio_client.delete_file(bucket=bucket, object_name=object_name)
+        except Exception as exc:
+            logger.warning("Could not delete annotated image %s: %s", annotated_image_key, exc)
 
 
 def retry_submission(
@@ -99,17 +185,68 @@ def retry_submission(
     project_id: uuid.UUID,
     submission_id: uuid.UUID,
 ) -> Submission:
+    """
+    Queue a finished submission for detection again and wake a worker. When the verdict
+    stands and only its bounding boxes failed, only the annotation stage re-runs.
+    The worker reuses the image prepared by the previous attempt while it is checkpointed.
+    """
     submission = get_submission(db, project_id, submission_id)
 
-    if submission.status not in (SubmissionStatus.failed, SubmissionStatus.error, SubmissionStatus.timeout):
+    if submission.status not in RETRYABLE_STATUSES:
         raise exceptions.InvalidStateTransition(
-            "Only failed, error, or timeout submissions can be retried"
+            "Only failed, error, timeout, or cancelled submissions can be retried"
         )
 
+    if submission.status == SubmissionStatus.failed and submission.annotation_status == AnnotationStatus.failed:
+        submission.annotation_status = AnnotationStatus.pending
+        db.commit()
+        db.refresh(submission)
+        detection_service.retry_annotation(
+            submission.id, submission.project_id, submission.image_id, submission.attempt,
+        )
+        submission_events.publish_submission(submission)
+        return submission
+
+    annotated_image_key = submission.annotated_image_key
+    db.query(Anomaly).filter(Anomaly.submission_id == submission.id).delete(synchronize_session=False)
     submission.status = SubmissionStatus.queued
     submission.pass_fail = SubmissionPassFail.unknown
     submission.anomaly_count = None
     submission.error_message = None
+    submission.annotated_image_key = None
+    submission.annotation_status = None
     db.commit()
     db.refresh(submission)
+    _delete_annotated_image(annotated_image_key)
+    detection_service.trigger_detection(submission.id, submission.project_id, submission.image_id)
+    return submission
+
+
+def cancel_submission(
+    db: Session,
+    project_id: uuid.UUID,
+    submission_id: uuid.UUID,
+) -> Submission:
+    """
+    Cancel a queued or running inspection. Queued ones are never claimed; a running one has
+    its model request aborted and its result and bounding boxes dropped (detection_service).
+    """
+    submission = get_submission(db, project_id, submission_id)
+    db.refresh(submission, with_for_update=True)  # a worker may finish it meanwhile
+
+    if submission.status not in (SubmissionStatus.queued, SubmissionStatus.running):
+        raise exceptions.InvalidStateTransition(
+            "Only queued or running submissions can be cancelled"
+        )
+
+    was_queued = submission.status == SubmissionStatus.queued
+    submission.status = SubmissionStatus.cancelled
+    db.commit()
+    db.refresh(submission)
+
+    if was_queued:
+        handoff_cache.discard(submission.id)
+    else:
+        detection_service.cancel_detection(submission.id)
+    submission_events.publish_submission(submission)
     return submission
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from db.models import User
 from schemas.users import UserCreate, UserUpdate
 from core import exceptions
+from services import lookup_cache
 from utils.password import hash_password
 
 
@@ -26,9 +27,14 @@ def create_user(db: Session, payload: UserCreate) -> User:
 
 
 def get_user(db: Session, user_id: uuid.UUID) -> User:
+    cached = lookup_cache.get(db, User, ("user", user_id))
+    if cached is not None:
+        return cached
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise exceptions.UserNotFound()
+    lookup_cache.put(User, ("user", user_id), user)
     return user
 
 
@@ -53,6 +59,7 @@ def update_user(db: Session, user_id: uuid.UUID, payload: UserUpdate) -> User:
 
     user.updated_at = datetime.utcnow()
     db.commit()
+    lookup_cache.invalidate(("user", user_id))
     db.refresh(user)
     return user
 
@@ -60,4 +67,6 @@ def update_user(db: Session, user_id: uuid.UUID, payload: UserUpdate) -> User:
 def delete_user(db: Session, user_id: uuid.UUID) -> None:
     user = get_user(db, user_id)
     db.delete(user)
-    db.commit()
\ No newline at end of file
+    db.commit()
+    lookup_cache.invalidate(("user", user_id))
+    lookup_cache.invalidate_where(lambda key: key[0] == "member" and key[2] == user_id)
\ No newline at end of file
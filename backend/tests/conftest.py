@@ -13,9 +13,35 @@ os.environ.setdefault("DETECTION_WEBHOOK_SECRET", "test-webhook-secret")
 from fastapi.testclient import TestClient
 
 from main import app
+from services import handoff_cache, lookup_cache, storage_backend
 
 
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI app."""
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _clear_lookup_cache():
+    """Cached project/member/user rows must not leak between tests."""
+    lookup_cache.clear()
+    yield
+    lookup_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_handoff_cache():
+    """Image bytes offered by upload tests must not reach detection tests."""
+    handoff_cache.clear()
+    yield
+    handoff_cache.clear()
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    """Route minio_client calls to a LocalBackend in a temp dir (no MinIO container needed)."""
+    backend = storage_backend.LocalBackend(tmp_path / "storage")
+    storage_backend.set_backend(backend)
+    yield backend
+    storage_backend.set_backend(None)
@@ -1,13 +1,19 @@
 """Tests for detection_service."""
 import io
+import time
 import uuid
 import pytest
 import requests
 from unittest.mock import MagicMock, patch
 
 from PIL import Image
+from sqlalchemy.dialects import postgresql
 
-from services import detection_service
+from db.models import Submission
+from models.ollama_vlm import DetectionCancelled
+from schemas.enums import AnnotationStatus
+from services import detection_service, handoff_cache
+from utils.file_validation import MAX_IMAGE_UPLOAD_BYTES
 
 pytestmark = pytest.mark.unit
 
@@ -30,9 +36,39 @@ def _make_submission(status="queued", pass_fail="unknown"):
     sub.id = SUBMISSION_ID
     sub.status = status
     sub.pass_fail = pass_fail
+    sub.attempt = 0
     return sub
 
 
+def _make_defect(description="bolt on runway"):
+    defect = MagicMock()
+    defect.id = "DEF-001"
+    defect.description = description
+    defect.severity = "fod"
+    return defect
+
+
+def _run_queued_annotations() -> list:
+    """Run the annotation stage for everything _infer() queued; returns the jobs."""
+    jobs = []
+    while not detection_service._annotations.empty():
+        jobs.append(detection_service._annotations.get_nowait())
+        detection_service._annotate(jobs[-1])
+    return jobs
+
+
+@pytest.fixture(autouse=True)
+def _reset_stage_state():
+    """Empty the annotation queue, retry checkpoints and cancel events; most tests prepare MagicMock images."""
+    detection_service._checkpoints.clear()
+    with patch.object(detection_service._checkpoints, "_sizeof", lambda _value: 1):
+        yield
+    detection_service._checkpoints.clear()
+    detection_service._cancel_events.clear()
+    while not detection_service._annotations.empty():
+        detection_service._annotations.get_nowait()
+
+
 def _make_result(pass_fail="pass", defects=None, response="RESULT: PASS"):
     result = MagicMock()
     result.pass_fail = pass_fail
@@ -43,32 +79,459 @@ def _make_result(pass_fail="pass", defects=None, response="RESULT: PASS"):
 
 class TestTriggerDetection:
 
-    @patch("services.detection_service.threading.Thread")
-    def test_starts_background_thread(self, mock_thread_cls):
-        mock_thread = MagicMock()
-        mock_thread_cls.return_value = mock_thread
+    def test_wakes_one_worker(self):
+        with patch("services.detection_service._wakeup") as mock_wakeup:
+            detection_service.trigger_detection(
+                submission_id=SUBMISSION_ID,
+                project_id=PROJECT_ID,
+                image_object_key=IMAGE_KEY,
+            )
+
+        mock_wakeup.notify.assert_called_once_with()
 
+    def test_publishes_queued_event(self):
+        with patch("services.detection_service.submission_events") as mock_events:
+            detection_service.trigger_detection(
+                submission_id=SUBMISSION_ID,
+                project_id=PROJECT_ID,
+                image_object_key=IMAGE_KEY,
+            )
+
+        mock_events.publish.assert_called_once_with(PROJECT_ID, SUBMISSION_ID, "queued")
+
+    @patch("services.detection_service.threading.Thread")
+    def test_does_not_start_a_thread_per_upload(self, mock_thread_cls):
         detection_service.trigger_detection(
             submission_id=SUBMISSION_ID,
             project_id=PROJECT_ID,
             image_object_key=IMAGE_KEY,
         )
 
-        mock_thread_cls.assert_called_once_with(
-            target=detection_service._run_detection,
-            args=(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY),
-            daemon=True,
+        mock_thread_cls.assert_not_called()
+
+
+class TestTriggerDetectionBatch:
+
+    def test_wakes_one_worker_per_job_and_publishes_each(self):
+        jobs = [(uuid.uuid4(), PROJECT_ID, IMAGE_KEY) for _ in range(3)]
+        with (
+            patch("services.detection_service._wakeup") as mock_wakeup,
+            patch("services.detection_service.submission_events") as mock_events,
+        ):
+            detection_service.trigger_detection_batch(jobs)
+
+        mock_wakeup.notify.assert_called_once_with(3)
+        assert [c.args[1] for c in mock_events.publish.call_args_list] == [job[0] for job in jobs]
+
+    def test_empty_batch_is_a_no_op(self):
+        with patch("services.detection_service._wakeup") as mock_wakeup:
+            detection_service.trigger_detection_batch([])
+
+        mock_wakeup.notify.assert_not_called()
+
+
+class TestClaimNextSubmission:
+
+    def _query(self, mock_db):
+        return mock_db.query.return_value.filter.return_value.order_by.return_value.with_for_update.return_value
+
+    def test_claims_oldest_queued_and_marks_running(self):
+        submission = _make_submission()
+        submission.project_id = PROJECT_ID
+        submission.image_id = IMAGE_KEY
+        mock_db = MagicMock()
+        self._query(mock_db).first.return_value = submission
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            job = detection_service._claim_next_submission()
+
+        assert job == (SUBMISSION_ID, PROJECT_ID, IMAGE_KEY, 1)
+        assert submission.attempt == 1  # each claim is a new attempt
+        assert submission.status == "running"
+        assert submission.heartbeat_at.name == "now"  # the claim starts the lease
+        mock_db.query.return_value.filter.return_value.order_by.return_value.with_for_update.assert_called_once_with(
+            skip_locked=True,
+        )
+        mock_db.commit.assert_called_once()
+        mock_db.close.assert_called_once()
+
+    def test_claim_tracks_the_job_for_cancellation(self):
+        submission = _make_submission()
+        mock_db = MagicMock()
+        self._query(mock_db).first.return_value = submission
+        tracked_at_commit = []
+        mock_db.commit.side_effect = lambda: tracked_at_commit.append(SUBMISSION_ID in detection_service._cancel_events)
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            detection_service._claim_next_submission()
+
+        assert tracked_at_commit == [True]
+        assert detection_service.cancel_detection(SUBMISSION_ID) is True
+
+    def test_failed_claim_is_not_tracked(self):
+        mock_db = MagicMock()
+        self._query(mock_db).first.return_value = _make_submission()
+        mock_db.commit.side_effect = RuntimeError("connection lost")
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            pytest.raises(RuntimeError),
+        ):
+            detection_service._claim_next_submission()
+
+        assert SUBMISSION_ID not in detection_service._cancel_events
+
+    def test_publishes_running_event(self):
+        submission = _make_submission()
+        submission.project_id = PROJECT_ID
+        submission.image_id = IMAGE_KEY
+        mock_db = MagicMock()
+        self._query(mock_db).first.return_value = submission
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.submission_events") as mock_events,
+        ):
+            detection_service._claim_next_submission()
+
+        mock_events.publish.assert_called_once_with(PROJECT_ID, SUBMISSION_ID, "running")
+
+    def test_empty_queue_returns_none(self):
+        mock_db = MagicMock()
+        self._query(mock_db).first.return_value = None
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            assert detection_service._claim_next_submission() is None
+
+        mock_db.commit.assert_not_called()
+        mock_db.close.assert_called_once()
+
+
+def _filter_sql(mock_db) -> str:
+    """The WHERE clause a mocked query(...).filter(...).update(...) was built with, as Postgres SQL."""
+    clauses = mock_db.query.return_value.filter.call_args.args
+    return " AND ".join(
+        str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        for clause in clauses
+    )
+
+
+class TestLeases:
+
+    def test_requeues_only_running_rows_with_a_lapsed_lease(self):
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.update.return_value = 2
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch.object(detection_service.settings, "DETECTION_LEASE_SECONDS", 60),
+        ):
+            assert detection_service._requeue_interrupted_submissions() == 2
+
+        where = _filter_sql(mock_db)
+        assert "submissions.status = 'running'" in where
+        assert "submissions.heartbeat_at IS NULL OR submissions.heartbeat_at < now() - " in where
+        mock_db.commit.assert_called_once()
+
+    def test_renews_the_leases_of_this_process_jobs(self):
+        detection_service._track(SUBMISSION_ID)
+        mock_db = MagicMock()
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            detection_service._renew_leases()
+
+        assert str(SUBMISSION_ID) in _filter_sql(mock_db)
+        (values,), _ = mock_db.query.return_value.filter.return_value.update.call_args
+        assert list(values) == [Submission.heartbeat_at]
+        mock_db.commit.assert_called_once()
+        mock_db.close.assert_called_once()
+
+    def test_no_jobs_no_session(self):
+        with patch("services.detection_service.SessionLocal") as mock_session_cls:
+            assert detection_service._renew_leases() == 0
+
+        mock_session_cls.assert_not_called()
+
+    def test_lease_loop_renews_then_requeues_and_wakes_workers(self):
+        calls = []
+        with (
+            patch.object(detection_service, "_stop") as mock_stop,
+            patch("services.detection_service._renew_leases", side_effect=lambda: calls.append("renew")),
+            patch(
+                "services.detection_service._requeue_interrupted_submissions",
+                side_effect=lambda: calls.append("requeue") or 2,
+            ),
+            patch("services.detection_service._wakeup") as mock_wakeup,
+        ):
+            mock_stop.wait.side_effect = [False, True]
+            detection_service._lease_loop()
+
+        assert calls == ["renew", "requeue"]
+        mock_wakeup.notify.assert_called_once_with(2)
+
+    def test_lease_loop_survives_database_errors(self):
+        with (
+            patch.object(detection_service, "_stop") as mock_stop,
+            patch("services.detection_service._renew_leases", side_effect=Exception("db offline")),
+            patch("services.detection_service._requeue_interrupted_submissions") as mock_requeue,
+        ):
+            mock_stop.wait.side_effect = [False, False, True]
+            detection_service._lease_loop()
+
+        mock_requeue.assert_not_called()
+        assert mock_stop.wait.call_count == 3
+
+
+class TestWorkerPool:
+
+    @pytest.fixture(autouse=True)
+    def _reset_pool(self):
+        """Serial mode unless a test sets DETECTION_PREFETCH_DEPTH."""
+        detection_service._workers.clear()
+        with (
+            patch.object(detection_service.settings, "DETECTION_PREFETCH_DEPTH", 0),
+            patch.object(detection_service.settings, "DETECTION_ANNOTATION_WORKERS", 0),
+            patch("services.detection_service._resume_pending_annotations", return_value=0),
+        ):
+            yield
+        detection_service._workers.clear()
+        detection_service._stop.clear()
+        while not detection_service._prepared.empty():
+            detection_service._prepared.get_nowait()
+
+    @patch("services.detection_service._requeue_interrupted_submissions", return_value=0)
+    @patch("services.detection_service.threading.Thread")
+    def test_starts_configured_number_of_workers(self, mock_thread_cls, _mock_requeue):
+        with patch.object(detection_service.settings, "DETECTION_WORKERS", 3):
+            detection_service.start_detection_workers()
+
+        targets = [call.kwargs["target"] for call in mock_thread_cls.call_args_list]
+        assert targets == [detection_service._worker_loop] * 3 + [detection_service._lease_loop]
+        assert mock_thread_cls.return_value.start.call_count == 4
+        assert all(call.kwargs["daemon"] is True for call in mock_thread_cls.call_args_list)
+
+    @patch("services.detection_service._requeue_interrupted_submissions", return_value=0)
+    @patch("services.detection_service.threading.Thread")
+    def test_start_is_idempotent(self, mock_thread_cls, _mock_requeue):
+        with patch.object(detection_service.settings, "DETECTION_WORKERS", 2):
+            detection_service.start_detection_workers()
+            detection_service.start_detection_workers()
+
+        assert mock_thread_cls.call_count == 3
+
+    @patch("services.detection_service.threading.Thread")
+    def test_requeues_interrupted_before_starting(self, mock_thread_cls):
+        calls = []
+        with (
+            patch(
+                "services.detection_service._requeue_interrupted_submissions",
+                side_effect=lambda: calls.append("requeue") or 0,
+            ),
+            patch.object(detection_service.settings, "DETECTION_WORKERS", 1),
+        ):
+            mock_thread_cls.return_value.start.side_effect = lambda: calls.append("start")
+            detection_service.start_detection_workers()
+
+        assert calls == ["requeue", "start", "start"]
+
+    @patch("services.detection_service._requeue_interrupted_submissions", side_effect=Exception("db offline"))
+    @patch("services.detection_service.threading.Thread")
+    def test_requeue_failure_still_starts_workers(self, mock_thread_cls, _mock_requeue):
+        with patch.object(detection_service.settings, "DETECTION_WORKERS", 1):
+            detection_service.start_detection_workers()
+
+        assert mock_thread_cls.return_value.start.call_count == 2
+
+    def test_worker_loop_runs_claimed_jobs_until_stopped(self):
+        jobs = [(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)]
+
+        def _claim():
+            if jobs:
+                return jobs.pop()
+            detection_service._stop.set()
+            return None
+
+        with (
+            patch("services.detection_service._claim_next_submission", side_effect=_claim),
+            patch("services.detection_service._run_detection") as mock_run,
+        ):
+            detection_service._worker_loop()
+
+        mock_run.assert_called_once_with(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+    def test_worker_loop_survives_claim_errors(self):
+        calls = {"n": 0}
+
+        def _claim():
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise RuntimeError("db offline")
+            detection_service._stop.set()
+            return None
+
+        with (
+            patch("services.detection_service._claim_next_submission", side_effect=_claim),
+            patch.object(detection_service.settings, "DETECTION_POLL_INTERVAL_SECONDS", 0),
+        ):
+            detection_service._worker_loop()
+
+        assert calls["n"] == 2
+
+    def test_stop_joins_workers(self):
+        worker = MagicMock()
+        detection_service._workers.append(worker)
+
+        detection_service.stop_detection_workers(timeout=1)
+
+        worker.join.assert_called_once_with(timeout=1)
+        assert detection_service._workers == []
+        assert detection_service._stop.is_set()
+
+
+class TestDetectionPipeline:
+
+    @pytest.fixture(autouse=True)
+    def _reset_pipeline(self):
+        detection_service._workers.clear()
+        with (
+            patch.object(detection_service.settings, "DETECTION_PREFETCH_DEPTH", 2),
+            patch.object(detection_service.settings, "DETECTION_POLL_INTERVAL_SECONDS", 0),
+            patch.object(detection_service.settings, "DETECTION_ANNOTATION_WORKERS", 0),
+            patch("services.detection_service._resume_pending_annotations", return_value=0),
+        ):
+            yield
+        detection_service._workers.clear()
+        detection_service._stop.clear()
+        while not detection_service._prepared.empty():
+            detection_service._prepared.get_nowait()
+
+    def _prepared_job(self, submission_id=SUBMISSION_ID):
+        return detection_service._PreparedJob(submission_id, PROJECT_ID, IMAGE_KEY, MagicMock(), memoryview(b""), None)
+
+    @patch("services.detection_service._requeue_interrupted_submissions", return_value=0)
+    @patch("services.detection_service.threading.Thread")
+    def test_starts_prefetch_thread_and_inference_workers(self, mock_thread_cls, _mock_requeue):
+        with patch.object(detection_service.settings, "DETECTION_WORKERS", 3):
+            detection_service.start_detection_workers()
+
+        targets = [call.kwargs["target"] for call in mock_thread_cls.call_args_list]
+        assert targets == (
+            [detection_service._prefetch_loop] + [detection_service._inference_loop] * 3 + [detection_service._lease_loop]
         )
-        mock_thread.start.assert_called_once()
+
+    def test_prefetch_loads_claimed_jobs_into_queue(self):
+        jobs = [(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)]
+
+        def _claim():
+            if jobs:
+                return jobs.pop()
+            detection_service._stop.set()
+            return None
+
+        with (
+            patch("services.detection_service._claim_next_submission", side_effect=_claim),
+            patch("services.detection_service._prepare_job", return_value=self._prepared_job()) as mock_prepare,
+        ):
+            detection_service._prefetch_loop()
+
+        mock_prepare.assert_called_once_with(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+        assert detection_service._prepared.get_nowait().submission_id == SUBMISSION_ID
+
+    def test_prefetch_does_not_claim_past_depth(self):
+        detection_service._prepared.put(self._prepared_job())
+        detection_service._prepared.put(self._prepared_job())
+
+        def _wait(timeout):
+            detection_service._stop.set()
+
+        with (
+            patch("services.detection_service._claim_next_submission") as mock_claim,
+            patch.object(detection_service._wakeup, "wait", side_effect=_wait),
+        ):
+            detection_service._prefetch_loop()
+
+        mock_claim.assert_not_called()
+
+    def test_failed_prefetch_is_not_queued(self):
+        jobs = [(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)]
+
+        def _claim():
+            if jobs:
+                return jobs.pop()
+            detection_service._stop.set()
+            return None
+
+        with (
+            patch("services.detection_service._claim_next_submission", side_effect=_claim),
+            patch("services.detection_service._prepare_job", return_value=None),
+        ):
+            detection_service._prefetch_loop()
+
+        assert detection_service._prepared.empty()
+
+    def test_inference_loop_runs_prefetched_jobs_and_frees_a_slot(self):
+        job = self._prepared_job()
+        detection_service._prepared.put(job)
+
+        def _infer(taken):
+            detection_service._stop.set()
+
+        with (
+            patch("services.detection_service._infer", side_effect=_infer) as mock_infer,
+            patch.object(detection_service._wakeup, "notify_all") as mock_notify,
+        ):
+            detection_service._inference_loop()
+
+        mock_infer.assert_called_once_with(job)
+        mock_notify.assert_called_once()
+
+    def test_stop_requeues_prefetched_jobs(self):
+        detection_service._prepared.put(self._prepared_job())
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.update.return_value = 1
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            detection_service.stop_detection_workers(timeout=1)
+
+        mock_db.query.return_value.filter.return_value.update.assert_called_once()
+        mock_db.commit.assert_called_once()
+        assert detection_service._prepared.empty()
+
+    def test_prepare_job_loads_inputs(self):
+        image = MagicMock()
+        with (
+            patch("services.detection_service._load_image_from_minio", return_value=(image, b"raw")) as mock_load,
+            patch("services.detection_service.spec_service") as mock_spec,
+        ):
+            mock_spec.load_spec_text.return_value = "spec"
+            job = detection_service._prepare_job(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        mock_load.assert_called_once_with(str(PROJECT_ID), IMAGE_KEY.split("/", 1)[1], SUBMISSION_ID)
+        assert (job.image, job.image_bytes, job.spec_text) == (image, b"raw", "spec")
+
+    def test_prepare_job_records_load_errors(self):
+        with (
+            patch("services.detection_service._load_image_from_minio", side_effect=RuntimeError("storage down")),
+            patch("services.detection_service._record_error") as mock_record,
+        ):
+            assert detection_service._prepare_job(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY) is None
+
+        mock_record.assert_called_once()
 
 
 class TestRunDetection:
 
-    def _call(self, submission=None, result=None, list_objects_return=None):
+    @pytest.fixture(autouse=True)
+    def _mock_spec_service(self):
+        with patch("services.detection_service.spec_service") as mock_spec:
+            mock_spec.load_spec_text.return_value = None
+            self.mock_spec = mock_spec
+            yield mock_spec
+
+    def _call(self, submission=None, result=None):
         """Helper: run _run_detection with all external dependencies mocked."""
         submission = submission or _make_submission()
         result = result or _make_result()
-        list_objects_return = list_objects_return if list_objects_return is not None else []
 
         mock_db = MagicMock()
         mock_db.get.return_value = submission
@@ -79,8 +542,7 @@ class TestRunDetection:
             patch("services.detection_service._load_image_from_minio") as mock_load_img,
             patch("services.detection_service.get_model") as mock_get_model,
         ):
-            mock_minio.list_objects.return_value = list_objects_return
-            mock_load_img.return_value = MagicMock()
+            mock_load_img.return_value = (MagicMock(), b"")
             mock_get_model.return_value.detect_fod.return_value = result
 
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
@@ -95,6 +557,28 @@ class TestRunDetection:
         assert submission.pass_fail == "pass"
         assert submission.anomaly_count == 0
 
+    def test_publishes_final_status(self):
+        with patch("services.detection_service.submission_events") as mock_events:
+            self._call(result=_make_result(pass_fail="pass"))
+
+        mock_events.publish.assert_called_once_with(
+            PROJECT_ID, SUBMISSION_ID, "complete", "pass", 0, annotation_status=AnnotationStatus.skipped,
+        )
+
+    def test_publishes_timeout(self):
+        submission = _make_submission()
+        with patch("services.detection_service.submission_events") as mock_events:
+            mock_db = MagicMock()
+            mock_db.get.return_value = submission
+            with (
+                patch("services.detection_service.SessionLocal", return_value=mock_db),
+                patch("services.detection_service._load_image_from_minio", side_effect=requests.exceptions.Timeout()),
+            ):
+                detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        assert submission.status == "timeout"
+        mock_events.publish_submission.assert_called_once_with(submission)
+
     def test_sets_pass_fail_and_anomaly_count_on_fail_with_defects(self):
         defect = MagicMock()
         defect.id = "DEF-001"
@@ -109,29 +593,49 @@ class TestRunDetection:
         assert submission.pass_fail == "fail"
         assert submission.anomaly_count == 1
 
-    def test_lists_design_objects_with_correct_bucket_and_prefix(self):
-        _, mock_minio, _ = self._call()
+    def test_loads_spec_text_from_project_bucket(self):
+        self._call()
 
-        mock_minio.list_objects.assert_called_once_with(
-            bucket=str(PROJECT_ID),
-            prefix="designs/",
-        )
+        self.mock_spec.load_spec_text.assert_called_once_with(str(PROJECT_ID))
 
-    def test_no_designs_does_not_raise(self):
-        # Should complete without error even when there are no design PDFs
-        self._call(list_objects_return=[])
+    def test_spec_text_passed_to_model(self):
+        self.mock_spec.load_spec_text.return_value = "spec content"
+        _, _, mock_get_model = self._call()
 
-    def test_submission_not_found_returns_early(self):
+        args, _ = mock_get_model.return_value.detect_fod.call_args
+        assert args[2] == "spec content"
+
+    def test_original_bytes_passed_to_model(self):
+        """The stored object bytes go to the model so it can skip re-encoding."""
         mock_db = MagicMock()
-        mock_db.get.return_value = None
+        mock_db.get.return_value = _make_submission()
 
         with (
             patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"original")),
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            mock_get_model.return_value.detect_fod.return_value = _make_result()
+            detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        _, kwargs = mock_get_model.return_value.detect_fod.call_args
+        assert kwargs["source_bytes"] == b"original"
+
+    def test_no_designs_does_not_raise(self):
+        # Should complete without error even when there are no design PDFs
+        self._call()
+
+    def test_submission_cancelled_after_claim_returns_early(self):
+        detection_service._track(SUBMISSION_ID).set()
+
+        with (
+            patch("services.detection_service.SessionLocal") as mock_session_cls,
             patch("services.detection_service._load_image_from_minio") as mock_load_img,
             patch("services.detection_service.get_model") as mock_get_model,
         ):
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
+            mock_session_cls.assert_not_called()
             mock_load_img.assert_not_called()
             mock_get_model.assert_not_called()
 
@@ -155,13 +659,13 @@ class TestRunDetection:
         mock_db.get.return_value = _make_submission()
 
         with (
-            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.SessionLocal", return_value=mock_db) as mock_session_cls,
             patch("services.detection_service._load_image_from_minio", side_effect=requests.exceptions.Timeout()),
             patch("services.detection_service.minio_client"),
         ):
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
-        mock_db.close.assert_called_once()
+        assert mock_db.close.call_count == mock_session_cls.call_count == 1
 
     def test_exception_marks_submission_error(self):
         submission = _make_submission()
@@ -189,86 +693,89 @@ class TestRunDetection:
 
     def test_no_annotation_on_pass(self):
         """A passing result must never trigger OWLv2 annotation — no red boxes on clean images."""
-        defect = MagicMock()
-        defect.id = "DEF-001"
-        defect.description = "bolt on runway"
-        defect.severity = "fod"
-
         # pass_fail="pass" even though defects list is non-empty (edge case from parser)
-        result = _make_result(pass_fail="pass", defects=[defect])
+        submission = _make_submission()
+        result = _make_result(pass_fail="pass", defects=[_make_defect()])
         mock_db = MagicMock()
-        mock_db.get.return_value = _make_submission()
+        mock_db.get.return_value = submission
 
         with (
             patch("services.detection_service.SessionLocal", return_value=mock_db),
             patch("services.detection_service.minio_client"),
-            patch("services.detection_service._load_image_from_minio", return_value=MagicMock()),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
             patch("services.detection_service.get_model") as mock_get_model,
             patch("services.detection_service.wait_for_owlv2") as mock_wait,
-            patch("services.detection_service.get_owlv2_detector") as mock_detector,
+            patch("services.detection_service.get_owlv2_annotator") as mock_detector,
         ):
             mock_get_model.return_value.detect_fod.return_value = result
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
+        assert submission.annotation_status == AnnotationStatus.skipped
+        assert detection_service._annotations.empty()
         mock_wait.assert_not_called()
         mock_detector.assert_not_called()
 
-    def test_wait_for_owlv2_called_before_annotation(self):
-        """wait_for_owlv2() must be called when defects are present."""
-        defect = MagicMock()
-        defect.id = "DEF-001"
-        defect.description = "bolt on runway"
-        defect.severity = "fod"
-
-        result = _make_result(pass_fail="fail", defects=[defect])
+    def test_verdict_saved_before_owlv2_runs(self):
+        """The submission is failed as soon as the VLM answers; OWLv2 is left to the annotation stage."""
+        submission = _make_submission()
         mock_db = MagicMock()
-        mock_db.get.return_value = _make_submission()
+        mock_db.get.return_value = submission
 
         with (
             patch("services.detection_service.SessionLocal", return_value=mock_db),
-            patch("services.detection_service.minio_client"),
-            patch("services.detection_service._load_image_from_minio", return_value=MagicMock()),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
             patch("services.detection_service.get_model") as mock_get_model,
             patch("services.detection_service.wait_for_owlv2") as mock_wait,
-            patch("services.detection_service.build_queries_and_severity_map", return_value=([], {})),
+            patch("services.detection_service.get_owlv2_annotator") as mock_detector,
+            patch("services.detection_service.submission_events") as mock_events,
         ):
-            mock_get_model.return_value.detect_fod.return_value = result
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail", defects=[_make_defect()])
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
-        mock_wait.assert_called_once()
+        assert submission.status == "failed"
+        assert submission.annotation_status == AnnotationStatus.pending
+        assert mock_events.publish.call_args.kwargs["annotation_status"] == AnnotationStatus.pending
+        mock_wait.assert_not_called()
+        mock_detector.assert_not_called()
 
-    def test_owlv2_annotation_stored_when_defects_present(self):
-        """Line 118: image_to_base64(annotated) runs when OWLv2 returns an annotated image."""
-        defect = MagicMock()
-        defect.id = "DEF-001"
-        defect.description = "bolt on runway"
-        defect.severity = "fod"
+        job = detection_service._annotations.get_nowait()
+        assert (job.submission_id, job.project_id, job.image_object_key) == (SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+        assert job.defects is not None and job.image is not None
 
+    def test_fail_without_defects_skips_annotation(self):
         submission = _make_submission()
-        result = _make_result(pass_fail="fail", defects=[defect])
-
         mock_db = MagicMock()
         mock_db.get.return_value = submission
 
         with (
             patch("services.detection_service.SessionLocal", return_value=mock_db),
-            patch("services.detection_service.minio_client"),
-            patch("services.detection_service._load_image_from_minio", return_value=MagicMock()),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
             patch("services.detection_service.get_model") as mock_get_model,
-            patch("services.detection_service.build_queries_and_severity_map", return_value=(["bolt"], {0: "fod"})),
-            patch("services.detection_service.get_owlv2_detector") as mock_detector,
-            patch("services.detection_service.image_to_base64", return_value="base64data") as mock_b64,
         ):
-            mock_get_model.return_value.detect_fod.return_value = result
-            mock_detector.return_value.annotate.return_value = MagicMock()
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail")
+            detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        assert submission.annotation_status == AnnotationStatus.skipped
+        assert detection_service._annotations.empty()
+
+    def test_deleted_submission_is_not_queued_for_annotation(self):
+        mock_db = MagicMock()
+        mock_db.get.return_value = None
 
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail", defects=[_make_defect()])
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
-        mock_b64.assert_called_once()
-        assert submission.annotated_image == "base64data"
+        assert detection_service._annotations.empty()
 
-    def test_sets_status_running_before_detection(self):
-        submission = _make_submission()
+
+    def test_only_the_result_is_written(self):
+        """The claim already marked the submission running; the job commits once, with its verdict."""
+        submission = _make_submission(status="running")
         statuses = []
 
         mock_db = MagicMock()
@@ -278,13 +785,13 @@ class TestRunDetection:
         with (
             patch("services.detection_service.SessionLocal", return_value=mock_db),
             patch("services.detection_service.minio_client"),
-            patch("services.detection_service._load_image_from_minio", return_value=MagicMock()),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
             patch("services.detection_service.get_model") as mock_get_model,
         ):
             mock_get_model.return_value.detect_fod.return_value = _make_result()
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
 
-        assert statuses[0] == "running"
+        assert statuses == ["complete"]
 
     def test_image_key_prefix_stripped(self):
         """image_object_key has "{project_id}/" prefix that must be stripped before MinIO call."""
@@ -297,7 +804,7 @@ class TestRunDetection:
             patch("services.detection_service._load_image_from_minio") as mock_load_img,
             patch("services.detection_service.get_model") as mock_get_model,
         ):
-            mock_load_img.return_value = MagicMock()
+            mock_load_img.return_value = (MagicMock(), b"")
             mock_get_model.return_value.detect_fod.return_value = _make_result()
 
             detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
@@ -318,14 +825,455 @@ class TestRunDetection:
 
         mock_db.close.assert_called_once()
 
+    def test_no_session_open_while_model_runs(self):
+        """The pooled connection is returned before inference and a new session writes the result."""
+        mock_db = MagicMock()
+        mock_db.get.return_value = _make_submission()
+        open_during_inference = []
+
+        def detect(*args, **kwargs):
+            open_during_inference.append(mock_session_cls.call_count - mock_db.close.call_count)
+            return _make_result()
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db) as mock_session_cls,
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            mock_get_model.return_value.detect_fod.side_effect = detect
+            detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        assert open_during_inference == [0]
+        assert mock_session_cls.call_count == mock_db.close.call_count == 1
+
+    def test_submission_deleted_during_detection_is_not_written(self):
+        mock_db = MagicMock()
+        mock_db.get.return_value = None
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
+            patch("services.detection_service.get_model") as mock_get_model,
+            patch("services.detection_service.submission_events") as mock_events,
+        ):
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail")
+            detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        mock_db.add.assert_not_called()
+        mock_events.publish.assert_not_called()
+
+
+class TestAnnotationStage:
+
+    def _job(self, **overrides):
+        fields = {"defects": [_make_defect()], "image": MagicMock()}
+        fields.update(overrides)
+        return detection_service._AnnotationJob(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY, **fields)
+
+    def _annotate(self, job, submission=None, queries=(["bolt"], {0: "fod"}), store=None):
+        if submission is None:
+            submission = _make_submission(status="failed", pass_fail="fail")
+            submission.annotation_status = "pending"
+        submission.annotated_image_key = None
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.minio_client") as mock_minio,
+            patch("services.detection_service.wait_for_owlv2") as mock_wait,
+            patch("services.detection_service.build_queries_and_severity_map", return_value=queries),
+            patch("services.detection_service.get_owlv2_annotator") as mock_detector,
+            patch("services.detection_service._store_annotated_image", **(store or {"return_value": "key"})) as mock_store,
+            patch("services.detection_service.submission_events") as mock_events,
+        ):
+            self.annotated = mock_detector.return_value.annotate.return_value
+            detection_service._annotate(job)
+
+        self.mock_db, self.mock_minio, self.mock_wait = mock_db, mock_minio, mock_wait
+        self.mock_store, self.mock_events = mock_store, mock_events
+        return submission
+
+    def test_stores_annotated_image_and_marks_complete(self):
+        """The annotated image is uploaded to MinIO and only its object key is kept on the row."""
+        submission = self._annotate(self._job())
+
+        self.mock_wait.assert_called_once()
+        self.mock_store.assert_called_once_with(str(PROJECT_ID), SUBMISSION_ID, 0, self.annotated)
+        assert submission.annotated_image_key == "key"
+        assert submission.annotation_status == AnnotationStatus.complete
+        self.mock_events.publish_submission.assert_called_once_with(submission)
+
+    def test_no_queries_skips_without_loading_owlv2(self):
+        submission = self._annotate(self._job(), queries=([], {}))
+
+        self.mock_wait.assert_not_called()
+        assert submission.annotated_image_key is None
+        assert submission.annotation_status == AnnotationStatus.skipped
+
+    def test_upload_failure_marks_annotation_failed(self):
+        submission = self._annotate(self._job(), store={"side_effect": Exception("minio down")})
+
+        assert submission.status == "failed"  # the verdict is untouched
+        assert submission.annotated_image_key is None
+        assert submission.annotation_status == AnnotationStatus.failed
+
+    def test_rerun_submission_is_not_overwritten(self):
+        submission = _make_submission(status="running")
+        submission.annotation_status = None
+
+        self._annotate(self._job(), submission=submission)
+
+        assert submission.annotated_image_key is None
+        self.mock_store.assert_not_called()
+        self.mock_db.commit.assert_not_called()
+        self.mock_events.publish_submission.assert_not_called()
+
+    def test_previous_attempt_is_discarded_before_upload(self):
+        """A run that was retried meanwhile neither uploads nor attaches its boxes to the retry's row."""
+        submission = _make_submission(status="failed", pass_fail="fail")
+        submission.annotation_status = "pending"
+        submission.attempt = 2
+
+        self._annotate(self._job(attempt=1), submission=submission)
+
+        self.mock_store.assert_not_called()
+        assert submission.annotated_image_key is None
+        self.mock_db.commit.assert_not_called()
+        self.mock_events.publish_submission.assert_not_called()
+
+    def test_deleted_submission_stores_nothing(self):
+        mock_db = MagicMock()
+        mock_db.get.return_value = None
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._store_annotated_image") as mock_store,
+        ):
+            status = detection_service._save_annotation(self._job(), MagicMock(), AnnotationStatus.complete)
+
+        assert status is None
+        mock_store.assert_not_called()
+        mock_db.commit.assert_not_called()
+
+    def test_resumed_job_loads_defects_and_image(self):
+        mock_db = MagicMock()
+        query = mock_db.query.return_value.filter.return_value.order_by.return_value
+        query.__iter__.return_value = iter([("DEF-001", "fod", "bolt on runway")])
+        image = MagicMock()
+        job = detection_service._AnnotationJob(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._load_image_from_minio", return_value=(image, b"")) as mock_load,
+        ):
+            detection_service._load_annotation_inputs(job)
+
+        assert [(d.id, d.severity, d.description) for d in job.defects] == [("DEF-001", "fod", "bolt on runway")]
+        assert job.image is image
+        mock_load.assert_called_once_with(str(PROJECT_ID), "images/test.png")
+        mock_db.close.assert_called_once()
+
+    def test_resume_queues_pending_submissions(self):
+        mock_db = MagicMock()
+        query = mock_db.query.return_value.filter.return_value.order_by.return_value
+        query.all.return_value = [(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY, 3)]
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            assert detection_service._resume_pending_annotations() == 1
+
+        job = detection_service._annotations.get_nowait()
+        assert (job.submission_id, job.defects, job.image, job.attempt) == (SUBMISSION_ID, None, None, 3)
+
+    @patch("services.detection_service._requeue_interrupted_submissions", return_value=0)
+    @patch("services.detection_service._resume_pending_annotations", return_value=0)
+    @patch("services.detection_service.threading.Thread")
+    def test_starts_annotation_workers(self, mock_thread_cls, _mock_resume, _mock_requeue):
+        detection_service._workers.clear()
+        try:
+            with (
+                patch.object(detection_service.settings, "DETECTION_PREFETCH_DEPTH", 0),
+                patch.object(detection_service.settings, "DETECTION_WORKERS", 1),
+                patch.object(detection_service.settings, "DETECTION_ANNOTATION_WORKERS", 2),
+            ):
+                detection_service.start_detection_workers()
+        finally:
+            detection_service._workers.clear()
+
+        targets = [call.kwargs["target"] for call in mock_thread_cls.call_args_list]
+        assert targets == (
+            [detection_service._worker_loop] + [detection_service._annotation_loop] * 2 + [detection_service._lease_loop]
+        )
+        _mock_resume.assert_called_once()
+
+    def test_stop_drops_queued_annotations(self):
+        speculation = MagicMock()
+        detection_service._annotations.put(self._job(speculation=speculation))
+
+        with patch("services.detection_service._requeue_prefetched", return_value=0):
+            detection_service.stop_detection_workers(timeout=1)
+        detection_service._stop.clear()
+
+        assert detection_service._annotations.empty()
+        speculation.cancel.assert_called_once()
+
+
+class TestCancellation:
+
+    @pytest.fixture(autouse=True)
+    def _reset(self):
+        detection_service._cancel_events.clear()
+        with patch("services.detection_service.spec_service"):
+            yield
+        detection_service._cancel_events.clear()
+
+    def _prepare(self, submission):
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
+        ):
+            return detection_service._prepare_job(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+    def test_cancel_sets_the_claimed_job_event(self):
+        job = self._prepare(_make_submission(status="running"))
+
+        assert detection_service.cancel_detection(SUBMISSION_ID) is True
+        assert job.cancelled.is_set()
+
+    def test_cancel_of_untracked_submission_returns_false(self):
+        assert detection_service.cancel_detection(uuid.uuid4()) is False
+
+    def test_cancelled_before_start_is_not_prepared(self):
+        detection_service._track(SUBMISSION_ID)
+        assert detection_service.cancel_detection(SUBMISSION_ID) is True
+
+        with patch("services.detection_service._load_image_from_minio") as mock_load:
+            assert detection_service._prepare_job(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY) is None
+
+        mock_load.assert_not_called()
+        assert SUBMISSION_ID not in detection_service._cancel_events
+
+    def test_retry_claim_is_not_cancelled_by_the_previous_run(self):
+        """Cancel, then retry before the cancelled run has left the model."""
+        old_run = self._prepare(_make_submission(status="running"))
+        detection_service.cancel_detection(SUBMISSION_ID)
+
+        detection_service._track(SUBMISSION_ID)  # the retry's claim
+        new_run = self._prepare(_make_submission(status="running"))
+
+        assert new_run is not None
+        assert new_run.cancelled is not old_run.cancelled
+        assert not new_run.cancelled.is_set()
+
+    def test_previous_run_finishing_leaves_the_retry_tracked(self):
+        old_run = self._prepare(_make_submission(status="running"))
+        detection_service.cancel_detection(SUBMISSION_ID)
+        new_cancelled = detection_service._track(SUBMISSION_ID)
+
+        with patch("services.detection_service.get_model"):
+            detection_service._infer(old_run)
+
+        assert detection_service._cancel_events[SUBMISSION_ID] is new_cancelled
+        assert detection_service.cancel_detection(SUBMISSION_ID) is True
+        assert new_cancelled.is_set()
+
+    def test_cancelled_job_skips_the_model(self):
+        job = self._prepare(_make_submission(status="running"))
+        detection_service.cancel_detection(SUBMISSION_ID)
+
+        with (
+            patch("services.detection_service.get_model") as mock_get_model,
+            patch("services.detection_service._record_error") as mock_record,
+        ):
+            detection_service._infer(job)
+
+        mock_get_model.assert_not_called()
+        mock_record.assert_not_called()
+        assert SUBMISSION_ID not in detection_service._cancel_events
+
+    def test_aborted_request_records_nothing_and_skips_annotation(self):
+        submission = _make_submission(status="running")
+        job = self._prepare(submission)
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.get_model") as mock_get_model,
+            patch("services.detection_service.submission_events") as mock_events,
+        ):
+            mock_get_model.return_value.detect_fod.side_effect = DetectionCancelled()
+            detection_service._infer(job)
+
+        assert mock_get_model.return_value.detect_fod.call_args.kwargs["cancel"] is job.cancelled
+        assert submission.status == "running"  # left as the cancel request wrote it
+        mock_db.commit.assert_not_called()
+        mock_events.publish.assert_not_called()
+        assert detection_service._annotations.empty()
+
+    def test_result_of_submission_cancelled_elsewhere_is_discarded(self):
+        """A cancel handled by another process is only visible in the row; the write must not undo it."""
+        submission = _make_submission(status="running")
+        job = self._prepare(submission)
+        submission.status = "cancelled"
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail", defects=[_make_defect()])
+            detection_service._infer(job)
+
+        assert submission.status == "cancelled"
+        mock_db.add.assert_not_called()
+        assert detection_service._annotations.empty()
+
+    def test_result_of_a_previous_attempt_is_discarded(self):
+        """A run that lost its claim (retried after a lapsed lease) must not write over the retry's row."""
+        submission = _make_submission(status="running")
+        job = self._prepare(submission)
+        submission.attempt = job.attempt + 1
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+
+        with (
+            patch("services.detection_service.SessionLocal", return_value=mock_db),
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            mock_get_model.return_value.detect_fod.return_value = _make_result(pass_fail="fail", defects=[_make_defect()])
+            detection_service._infer(job)
+
+        assert submission.status == "running"
+        mock_db.add.assert_not_called()
+        assert detection_service._annotations.empty()
+
+    def test_errors_do_not_overwrite_cancelled(self):
+        submission = _make_submission(status="cancelled")
+        mock_db = MagicMock()
+        mock_db.get.return_value = submission
+
+        detection_service._mark_failed(mock_db, SUBMISSION_ID, RuntimeError("boom"))
+        detection_service._mark_timeout(mock_db, SUBMISSION_ID)
+
+        assert submission.status == "cancelled"
+        mock_db.commit.assert_not_called()
+
+    def test_result_writes_lock_the_row(self):
+        """A cancel committed between the read and the write must not be overwritten."""
+        mock_db = MagicMock()
+        mock_db.get.return_value = _make_submission(status="running")
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            detection_service._save_result(SUBMISSION_ID, PROJECT_ID, _make_result(), AnnotationStatus.skipped)
+            detection_service._record_error(SUBMISSION_ID, RuntimeError("boom"))
+            detection_service._record_error(SUBMISSION_ID, requests.exceptions.Timeout())
+
+        assert mock_db.get.call_count == 3
+        for call in mock_db.get.call_args_list:
+            assert call.kwargs == {"with_for_update": True}
+
+
+class TestRetryCheckpoints:
+
+    @pytest.fixture(autouse=True)
+    def _mock_io(self):
+        self.mock_db = MagicMock()
+        with (
+            patch("services.detection_service.SessionLocal", return_value=self.mock_db),
+            patch("services.detection_service.spec_service"),
+            patch("services.detection_service._load_image_from_minio") as mock_load,
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            self.image = MagicMock()
+            mock_load.return_value = (self.image, b"raw")
+            self.mock_load = mock_load
+            self.model = mock_get_model.return_value
+            yield
+
+    def _run(self, submission, result=None, side_effect=None):
+        self.mock_db.get.return_value = submission
+        self.model.detect_fod.return_value = result
+        self.model.detect_fod.side_effect = side_effect
+        detection_service._run_detection(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+    def test_retry_after_timeout_reuses_the_prepared_image(self):
+        self._run(_make_submission(), side_effect=requests.exceptions.Timeout())
+        self._run(_make_submission(), result=_make_result())
+
+        self.mock_load.assert_called_once()
+        assert self.model.detect_fod.call_args.args[0] is self.image
+        assert self.model.detect_fod.call_args.kwargs["source_bytes"] == b"raw"
+
+    def test_checkpoint_dropped_when_nothing_is_left_to_retry(self):
+        self._run(_make_submission(), result=_make_result(pass_fail="pass"))
+
+        assert detection_service._checkpoints.get(SUBMISSION_ID) is None
+
+    def test_checkpoint_kept_until_boxes_are_drawn(self):
+        submission = _make_submission()
+        self._run(submission, result=_make_result(pass_fail="fail", defects=[_make_defect()]))
+        assert detection_service._checkpoints.get(SUBMISSION_ID) is not None
+
+        with (
+            patch("services.detection_service.wait_for_owlv2"),
+            patch("services.detection_service.get_owlv2_annotator"),
+            patch("services.detection_service._store_annotated_image", return_value="key"),
+        ):
+            _run_queued_annotations()
+
+        assert submission.annotation_status == AnnotationStatus.complete
+        assert detection_service._checkpoints.get(SUBMISSION_ID) is None
+
+    def test_annotation_retry_uses_the_checkpoint(self):
+        detection_service._checkpoints.put(SUBMISSION_ID, detection_service._Checkpoint(self.image, b""))
+        query = self.mock_db.query.return_value.filter.return_value.order_by.return_value
+        query.__iter__.return_value = iter([("DEF-001", "fod", "bolt on runway")])
+
+        detection_service.retry_annotation(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY, 0)
+        job = detection_service._annotations.get_nowait()
+        detection_service._load_annotation_inputs(job)
+
+        assert job.image is self.image
+        self.mock_load.assert_not_called()
+
+    def test_checkpoint_does_not_hold_the_storage_view(self):
+        """A view may keep a memory-mapped file open for the checkpoint's whole TTL."""
+        view = memoryview(b"raw")
+        self.mock_load.return_value = (self.image, view)
+
+        self._run(_make_submission(), side_effect=requests.exceptions.Timeout())
+
+        checkpoint = detection_service._checkpoints.get(SUBMISSION_ID)
+        assert type(checkpoint.image_bytes) is bytes
+        assert checkpoint.image_bytes == b"raw"
+
+    def test_checkpoint_size_counts_pixels_and_source_bytes(self):
+        checkpoint = detection_service._Checkpoint(Image.new("RGB", (10, 20)), b"x" * 7)
+
+        assert detection_service._checkpoint_size(checkpoint) == 10 * 20 * 3 + 7
+
 
 class TestLoadImageFromMinio:
 
+    def test_returns_original_bytes(self):
+        png_bytes = _make_rgb_image(10, 10)
+        with patch("services.detection_service.minio_client") as mock_minio:
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            _, data = detection_service._load_image_from_minio("bucket", "img.png")
+
+        assert data == png_bytes
+
     def test_returns_rgb_image(self):
         png_bytes = _make_rgb_image(100, 100)
         with patch("services.detection_service.minio_client") as mock_minio:
-            mock_minio.get_file.return_value = png_bytes
-            img = detection_service._load_image_from_minio("my-bucket", "some/image.png")
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            img, _ = detection_service._load_image_from_minio("my-bucket", "some/image.png")
 
         assert img.mode == "RGB"
         assert img.size == (100, 100)
@@ -333,83 +1281,89 @@ class TestLoadImageFromMinio:
     def test_large_image_is_resized(self):
         png_bytes = _make_rgb_image(2048, 2048)
         with patch("services.detection_service.minio_client") as mock_minio:
-            mock_minio.get_file.return_value = png_bytes
-            img = detection_service._load_image_from_minio("bucket", "img.png")
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            img, _ = detection_service._load_image_from_minio("bucket", "img.png")
 
         assert max(img.size) == 1024
 
     def test_image_within_limit_is_not_resized(self):
         png_bytes = _make_rgb_image(512, 768)
         with patch("services.detection_service.minio_client") as mock_minio:
-            mock_minio.get_file.return_value = png_bytes
-            img = detection_service._load_image_from_minio("bucket", "img.png")
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            img, _ = detection_service._load_image_from_minio("bucket", "img.png")
 
         assert img.size == (512, 768)
 
     def test_non_square_large_image_aspect_ratio_preserved(self):
         png_bytes = _make_rgb_image(2048, 1024)
         with patch("services.detection_service.minio_client") as mock_minio:
-            mock_minio.get_file.return_value = png_bytes
-            img = detection_service._load_image_from_minio("bucket", "img.png")
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            img, _ = detection_service._load_image_from_minio("bucket", "img.png")
 
         w, h = img.size
         assert w == 1024
         assert h == 512
 
+    def test_handed_off_bytes_skip_storage(self):
+        png_bytes = _make_rgb_image(10, 10)
+        submission_id = uuid.uuid4()
+        handoff_cache.offer(submission_id, png_bytes)
 
-class TestLoadSpecText:
+        with patch("services.detection_service.minio_client") as mock_minio:
+            img, data = detection_service._load_image_from_minio("bucket", "images/img.png", submission_id)
 
-    def _call(self, objects, file_data=None, extract_returns="spec content"):
-        with (
-            patch("services.detection_service.minio_client") as mock_minio,
-            patch("services.detection_service.extract_text_from_pdf", return_value=extract_returns),
-        ):
-            mock_minio.list_objects.return_value = objects
-            if file_data is not None:
-                mock_minio.get_file.return_value = file_data
-            else:
-                mock_minio.get_file.return_value = b"%PDF fake"
-            return detection_service._load_spec_text("my-bucket")
+        mock_minio.get_file_view.assert_not_called()
+        assert data == png_bytes
+        assert img.size == (10, 10)
 
-    def test_returns_none_when_no_objects(self):
-        result = self._call(objects=[])
-        assert result is None
+    def test_handoff_is_consumed_once(self):
+        png_bytes = _make_rgb_image(10, 10)
+        submission_id = uuid.uuid4()
+        handoff_cache.offer(submission_id, png_bytes)
 
-    def test_returns_none_when_no_pdfs(self):
-        result = self._call(objects=["designs/image.png", "designs/readme.txt"])
-        assert result is None
+        with patch("services.detection_service.minio_client") as mock_minio:
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            detection_service._load_image_from_minio("bucket", "images/img.png", submission_id)
+            detection_service._load_image_from_minio("bucket", "images/img.png", submission_id)
 
-    def test_returns_text_for_single_pdf(self):
-        result = self._call(objects=["designs/spec.pdf"], extract_returns="spec content")
-        assert result == "spec content"
+        mock_minio.get_file_view.assert_called_once_with(bucket="bucket", object_name="images/img.png")
 
-    def test_joins_multiple_pdfs_with_separator(self):
-        with (
-            patch("services.detection_service.minio_client") as mock_minio,
-            patch("services.detection_service.extract_text_from_pdf", side_effect=["first", "second"]),
-        ):
-            mock_minio.list_objects.return_value = ["designs/a.pdf", "designs/b.pdf"]
-            mock_minio.get_file.return_value = b"%PDF fake"
-            result = detection_service._load_spec_text("bucket")
+    def test_oversize_stored_object_is_not_read(self):
+        """The object may have been replaced through its presigned PUT URL after the upload was completed."""
+        with patch("services.detection_service.minio_client") as mock_minio:
+            mock_minio.get_size_if_exists.return_value = MAX_IMAGE_UPLOAD_BYTES + 1
+            with pytest.raises(ValueError, match="over the"):
+                detection_service._load_image_from_minio("bucket", "images/img.png")
 
-        assert "first" in result
-        assert "second" in result
-        assert "---" in result
+        mock_minio.get_file_view.assert_not_called()
 
-    def test_returns_none_when_all_pdfs_empty(self):
-        result = self._call(objects=["designs/empty.pdf"], extract_returns="   ")
-        assert result is None
+    def test_other_submissions_handoff_is_not_used(self):
+        png_bytes = _make_rgb_image(10, 10)
+        handoff_cache.offer(uuid.uuid4(), _make_rgb_image(20, 20))
 
-    def test_skips_failed_pdf_silently(self):
-        with (
-            patch("services.detection_service.minio_client") as mock_minio,
-            patch("services.detection_service.extract_text_from_pdf", side_effect=Exception("corrupt pdf")),
-        ):
-            mock_minio.list_objects.return_value = ["designs/bad.pdf"]
-            mock_minio.get_file.return_value = b"%PDF fake"
-            result = detection_service._load_spec_text("bucket")
+        with patch("services.detection_service.minio_client") as mock_minio:
+            mock_minio.get_file_view.return_value = memoryview(png_bytes)
+            mock_minio.get_size_if_exists.return_value = len(png_bytes)
+            img, _ = detection_service._load_image_from_minio("bucket", "images/img.png", uuid.uuid4())
+
+        assert img.size == (10, 10)
 
-        assert result is None
+
+class TestStoreAnnotatedImage:
+
+    def test_uploads_png_under_annotated_prefix(self):
+        with patch("services.detection_service.minio_client") as mock_minio:
+            key = detection_service._store_annotated_image("bucket", SUBMISSION_ID, 2, Image.new("RGB", (4, 4)))
+
+        assert key == f"bucket/annotated/{SUBMISSION_ID}-2.png"
+        kwargs = mock_minio.upload_file.call_args.kwargs
+        assert kwargs["object_name"] == f"annotated/{SUBMISSION_ID}-2.png"
+        assert kwargs["content_type"] == "image/png"
+        assert kwargs["file_data"][:8] == b"\x89PNG\r\n\x1a\n"
 
 
 class TestBuildAnomalies:
@@ -543,3 +1497,138 @@ class TestMarkTimeout:
         detection_service._mark_timeout(mock_db, SUBMISSION_ID)
 
         mock_db.rollback.assert_called_once()
+
+
+class TestSpeculativeLocalization:
+
+    VOCABULARY = ["bolt", "foreign object", "debris", "tool"]
+
+    @pytest.fixture(autouse=True)
+    def _speculative(self):
+        detection_service._vocabulary_cache.clear()
+        with (
+            patch.object(detection_service.settings, "OWLV2_SPECULATIVE", True),
+            patch("services.detection_service.wait_for_owlv2"),
+            patch("services.detection_service.SessionLocal") as mock_session,
+            patch("services.detection_service.submission_events"),
+            patch("services.detection_service._store_annotated_image", return_value="key") as mock_store,
+            patch("services.detection_service.get_owlv2_annotator") as mock_annotator,
+            patch("services.detection_service.get_model") as mock_get_model,
+        ):
+            submission = _make_submission(status="failed", pass_fail="fail")
+            submission.annotation_status = AnnotationStatus.pending
+            mock_session.return_value.get.return_value = submission
+            self.mock_store = mock_store
+            self.annotator = mock_annotator.return_value
+            self.model = mock_get_model.return_value
+            yield
+        detection_service._vocabulary_cache.clear()
+
+    def _job(self, vocabulary=None):
+        return detection_service._PreparedJob(
+            SUBMISSION_ID, PROJECT_ID, IMAGE_KEY, Image.new("RGB", (50, 50)), memoryview(b""), None,
+            self.VOCABULARY if vocabulary is None else vocabulary,
+        )
+
+    def _defect(self, description):
+        defect = MagicMock()
+        defect.description = description
+        defect.severity = "fod"
+        return defect
+
+    def test_owlv2_runs_while_vlm_is_answering(self):
+        started, overlapped = [], []
+        self.annotator.detect.side_effect = lambda image, queries: started.append(queries) or {}
+
+        def _vlm(*args, **kwargs):
+            overlapped.append(_wait_for(lambda: started))  # OWLv2 starts before the VLM returns
+            return _make_result(pass_fail="pass")
+
+        self.model.detect_fod.side_effect = _vlm
+
+        detection_service._infer(self._job())
+
+        assert overlapped == [True]
+        assert started == [self.VOCABULARY]
+        self.mock_store.assert_not_called()
+
+    def test_matching_defects_use_speculative_boxes(self):
+        self.annotator.detect.return_value = {0: (0.8, [1, 1, 20, 20])}
+        self.model.detect_fod.return_value = _make_result(pass_fail="fail", defects=[self._defect("Loose bolt")])
+
+        with patch("services.detection_service.draw_boxes", return_value="drawn") as mock_draw:
+            detection_service._infer(self._job())
+            _run_queued_annotations()
+
+        self.annotator.detect.assert_called_once()  # speculative pass only
+        self.annotator.annotate.assert_not_called()
+        assert mock_draw.call_args.args[1] == {0: (0.8, [1, 1, 20, 20])}
+        self.mock_store.assert_called_once_with(str(PROJECT_ID), SUBMISSION_ID, 0, "drawn")
+
+    def test_unmatched_defects_get_a_regular_pass(self):
+        self.annotator.detect.side_effect = [
+            {0: (0.8, [1, 1, 20, 20])},   # speculative: "bolt"
+            {0: (0.6, [5, 5, 30, 30])},   # follow-up for the unmatched query
+        ]
+        defects = [self._defect("Loose bolt"), self._defect("Cable tie")]
+        self.model.detect_fod.return_value = _make_result(pass_fail="fail", defects=defects)
+
+        with patch("services.detection_service.draw_boxes", return_value="drawn") as mock_draw:
+            detection_service._infer(self._job())
+            _run_queued_annotations()
+
+        assert self.annotator.detect.call_args_list[1].args[1] == ["Cable tie"]
+        assert mock_draw.call_args.args[1] == {0: (0.8, [1, 1, 20, 20]), 1: (0.6, [5, 5, 30, 30])}
+
+    def test_speculation_failure_falls_back_to_regular_pass(self):
+        self.annotator.detect.side_effect = [RuntimeError("oom"), {0: (0.6, [5, 5, 30, 30])}]
+        self.model.detect_fod.return_value = _make_result(pass_fail="fail", defects=[self._defect("Loose bolt")])
+
+        with patch("services.detection_service.draw_boxes", return_value="drawn") as mock_draw:
+            detection_service._infer(self._job())
+            _run_queued_annotations()
+
+        assert mock_draw.call_args.args[1] == {0: (0.6, [5, 5, 30, 30])}
+        self.mock_store.assert_called_once()
+
+    def test_disabled_uses_the_sequential_path(self):
+        self.model.detect_fod.return_value = _make_result(pass_fail="fail", defects=[self._defect("Loose bolt")])
+
+        with patch.object(detection_service.settings, "OWLV2_SPECULATIVE", False):
+            detection_service._infer(self._job())
+            _run_queued_annotations()
+
+        self.annotator.detect.assert_not_called()
+        self.annotator.annotate.assert_called_once()
+
+    def test_project_vocabulary_is_cached(self):
+        mock_db = MagicMock()
+        query = mock_db.query.return_value.join.return_value.filter.return_value.order_by.return_value
+        query.limit.return_value = [("Loose bolt on the runway",)]
+
+        with patch("services.detection_service.SessionLocal", return_value=mock_db):
+            first = detection_service._project_vocabulary(PROJECT_ID, "spec")
+            second = detection_service._project_vocabulary(PROJECT_ID, "spec")
+
+        assert first == second
+        assert first[0] == "loose bolt on the runway"
+        mock_db.query.assert_called_once()
+
+    def test_vocabulary_errors_do_not_fail_the_job(self):
+        with (
+            patch("services.detection_service._load_image_from_minio", return_value=(MagicMock(), b"")),
+            patch("services.detection_service.spec_service"),
+            patch("services.detection_service._project_vocabulary", side_effect=RuntimeError("db")),
+        ):
+            job = detection_service._prepare_job(SUBMISSION_ID, PROJECT_ID, IMAGE_KEY)
+
+        assert job.vocabulary == []
+
+
+def _wait_for(condition, timeout=2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
@@ -0,0 +1,69 @@
+"""Tests for handoff_cache."""
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from services import handoff_cache
+
+pytestmark = pytest.mark.unit
+
+A = uuid.uuid4()
+B = uuid.uuid4()
+
+
+class TestHandoffCache:
+
+    def test_take_returns_offered_bytes_once(self):
+        handoff_cache.offer(A, b"abc")
+
+        assert handoff_cache.take(A) == b"abc"
+        assert handoff_cache.take(A) is None
+        assert handoff_cache.stats()["hits"] == 1
+        assert handoff_cache.stats()["misses"] == 1
+
+    def test_capped_by_total_bytes(self):
+        with patch.object(handoff_cache._cache, "max_size", 10):
+            handoff_cache.offer(A, b"x" * 6)
+            handoff_cache.offer(B, b"y" * 6)
+
+            assert handoff_cache.take(A) is None
+            assert handoff_cache.take(B) == b"y" * 6
+            assert handoff_cache.stats()["bytes"] == 0
+
+    def test_same_filename_uploads_do_not_share_an_entry(self):
+        handoff_cache.offer(A, b"first")
+        handoff_cache.offer(B, b"second")
+
+        handoff_cache.discard(A)
+
+        assert handoff_cache.take(B) == b"second"
+
+    def test_discard_drops_without_counting_a_take(self):
+        handoff_cache.offer(A, b"abc")
+
+        handoff_cache.discard(A)
+        handoff_cache.discard(uuid.uuid4())
+
+        assert handoff_cache.stats()["entries"] == 0
+        assert handoff_cache.stats()["misses"] == 0
+
+    def test_accepts(self):
+        with patch.object(handoff_cache._cache, "max_size", 10):
+            assert handoff_cache.accepts(10)
+            assert not handoff_cache.accepts(11)
+            assert handoff_cache.accepts(None)
+
+    def test_expired_entries_are_not_returned(self):
+        with patch.object(handoff_cache._cache, "ttl_seconds", -1):
+            handoff_cache.offer(A, b"abc")
+
+        assert handoff_cache.take(A) is None
+
+    def test_metrics_route(self, client):
+        handoff_cache.offer(A, b"abcd")
+
+        body = client.get("/metrics/handoff-cache").json()
+
+        assert body["entries"] == 1
+        assert body["bytes"] == 4
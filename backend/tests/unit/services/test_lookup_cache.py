@@ -0,0 +1,62 @@
+"""Tests for lookup_cache."""
+import uuid
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import inspect
+
+from db.models import Project
+from services import lookup_cache
+
+pytestmark = pytest.mark.unit
+
+
+def _db():
+    mock_db = MagicMock()
+    mock_db.merge.side_effect = lambda instance, load: instance
+    return mock_db
+
+
+class TestLookupCache:
+
+    def test_miss_returns_none(self):
+        assert lookup_cache.get(_db(), Project, ("project", uuid.uuid4())) is None
+        assert lookup_cache.stats()["misses"] == 1
+
+    def test_hit_returns_detached_copy_merged_without_loading(self):
+        project = Project(id=uuid.uuid4(), name="Apron", description=None)
+        lookup_cache.put(Project, ("project", project.id), project)
+        mock_db = _db()
+
+        cached = lookup_cache.get(mock_db, Project, ("project", project.id))
+
+        assert cached is not project
+        assert (cached.id, cached.name) == (project.id, "Apron")
+        assert inspect(cached).detached
+        assert mock_db.merge.call_args.kwargs == {"load": False}
+        mock_db.query.assert_not_called()
+
+    def test_invalidate(self):
+        project = Project(id=uuid.uuid4(), name="Apron")
+        lookup_cache.put(Project, ("project", project.id), project)
+
+        lookup_cache.invalidate(("project", project.id))
+
+        assert lookup_cache.get(_db(), Project, ("project", project.id)) is None
+
+    def test_invalidate_where(self):
+        project_id = uuid.uuid4()
+        lookup_cache.put(Project, ("member", project_id, uuid.uuid4()), Project(id=uuid.uuid4(), name="a"))
+        lookup_cache.put(Project, ("member", project_id, uuid.uuid4()), Project(id=uuid.uuid4(), name="b"))
+        lookup_cache.put(Project, ("member", uuid.uuid4(), uuid.uuid4()), Project(id=uuid.uuid4(), name="c"))
+
+        assert lookup_cache.invalidate_where(lambda key: key[1] == project_id) == 2
+        assert lookup_cache.stats()["entries"] == 1
+
+    def test_stats_hit_ratio(self):
+        project = Project(id=uuid.uuid4(), name="Apron")
+        lookup_cache.put(Project, ("project", project.id), project)
+        lookup_cache.get(_db(), Project, ("project", project.id))
+        lookup_cache.get(_db(), Project, ("project", project.id))
+        lookup_cache.get(_db(), Project, ("project", uuid.uuid4()))
+
+        assert lookup_cache.stats() == {"entries": 1, "hits": 2, "misses": 1, "hit_ratio": 0.667}
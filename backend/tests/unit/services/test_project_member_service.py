@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 
 from core import exceptions
+from db.models import ProjectMember
 from schemas.project_members import ProjectMemberCreate, ProjectMemberUpdate
 from services import project_member_service
 
@@ -122,6 +123,36 @@ class TestProjectMemberService:
         result = project_member_service.get_member(mock_db, uuid.uuid4(), uuid.uuid4())
         assert result == mock_member
 
+    def test_get_member_second_lookup_served_from_cache(self):
+        """Test a membership is queried once and then served from lookup_cache."""
+        project_id, user_id = uuid.uuid4(), uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.merge.side_effect = lambda instance, load: instance
+        mock_db.query.return_value.filter.return_value.first.return_value = ProjectMember(
+            project_id=project_id, user_id=user_id, role="editor",
+        )
+
+        project_member_service.get_member(mock_db, project_id, user_id)
+        result = project_member_service.get_member(mock_db, project_id, user_id)
+
+        assert result.role == "editor"
+        mock_db.query.assert_called_once()
+
+    def test_remove_member_invalidates_cache(self):
+        """Test a removed member is no longer served from lookup_cache."""
+        project_id, user_id = uuid.uuid4(), uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = ProjectMember(
+            project_id=project_id, user_id=user_id, role="editor",
+        )
+
+        project_member_service.get_member(mock_db, project_id, user_id)
+        project_member_service.remove_member(mock_db, project_id, user_id)
+        mock_db.query.return_value.filter.return_value.first.return_value = None
+
+        with pytest.raises(exceptions.MemberNotFound):
+            project_member_service.get_member(mock_db, project_id, user_id)
+
     def test_get_member_not_found(self):
         """Test getting non-existent member raises MemberNotFound."""
         mock_db = MagicMock()
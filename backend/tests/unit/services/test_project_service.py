@@ -5,6 +5,7 @@ from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 from core import exceptions
+from db.models import Project
 from schemas.projects import ProjectCreate, ProjectUpdate
 from services import project_service
 
@@ -49,6 +50,33 @@ class TestProjectService:
         with pytest.raises(exceptions.ProjectNotFound):
             project_service.get_project(mock_db, uuid.uuid4())
 
+    def test_get_project_second_lookup_served_from_cache(self):
+        """Test a live project is queried once and then served from lookup_cache."""
+        project_id = uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.merge.side_effect = lambda instance, load: instance
+        chain = mock_db.query.return_value.filter.return_value
+        chain.filter.return_value.first.return_value = Project(id=project_id, name="Apron", deleted_at=None)
+
+        project_service.get_project(mock_db, project_id)
+        result = project_service.get_project(mock_db, project_id)
+
+        assert result.name == "Apron"
+        mock_db.query.assert_called_once()
+
+    def test_update_project_invalidates_cache(self):
+        """Test an updated project is re-read on the next lookup."""
+        project_id = uuid.uuid4()
+        mock_db = MagicMock()
+        chain = mock_db.query.return_value.filter.return_value
+        chain.filter.return_value.first.return_value = Project(id=project_id, name="Apron", deleted_at=None)
+
+        with patch("services.project_service.lookup_cache") as mock_cache:
+            mock_cache.get.return_value = None
+            project_service.update_project(mock_db, project_id, ProjectUpdate(name="Hangar"))
+
+        mock_cache.invalidate.assert_called_once_with(("project", project_id))
+
     def test_update_project(self):
         """Test updating a project."""
         mock_project = MagicMock()
@@ -70,10 +98,24 @@ class TestProjectService:
         mock_db = MagicMock()
         mock_get_project = MagicMock(return_value=mock_project)
 
-        with patch("services.project_service.get_project", mock_get_project):
+        with patch("services.project_service.get_project", mock_get_project), \
+                patch("services.project_service.purge_service") as mock_purge:
             project_service.delete_project(mock_db, project_id)
 
         mock_get_project.assert_called_once_with(mock_db, project_id)
         assert mock_project.deleted_at is not None
         assert mock_project.updated_at is not None
-        mock_db.commit.assert_called_once()
\ No newline at end of file
+        mock_db.commit.assert_called_once()
+        mock_purge.schedule_purge.assert_called_once_with(project_id)
+
+    def test_delete_project_does_not_touch_storage(self):
+        """Test the bucket is purged in the background, not inside the request."""
+        mock_project = MagicMock()
+        mock_project.deleted_at = None
+
+        with patch("services.project_service.get_project", return_value=mock_project), \
+                patch("services.project_service.purge_service"), \
+                patch("services.project_service.minio_client") as mock_minio:
+            project_service.delete_project(MagicMock(), uuid.uuid4())
+
+        mock_minio.delete_project_bucket.assert_not_called()
\ No newline at end of file
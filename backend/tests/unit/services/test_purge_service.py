@@ -0,0 +1,207 @@
+"""Tests for purge_service (background purge of deleted projects' buckets)."""
+import os
+import time
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services import minio_client, purge_service
+from services.purge_service import PurgeProgress
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _reset_purges():
+    purge_service.reset()
+    purge_service._stop.clear()
+    yield
+    purge_service.reset()
+
+
+def _fill(bucket: str, count: int) -> None:
+    for index in range(count):
+        minio_client.upload_file(bucket, f"images/{index:03d}.png", b"x", "image/png")
+
+
+class TestPurgeProjectBucket:
+
+    def test_deletes_in_batches_then_removes_bucket(self, local_storage):
+        _fill("p1", 25)
+        progress = PurgeProgress(project_id="p1")
+
+        with patch.object(purge_service.settings, "PROJECT_PURGE_BATCH_SIZE", 10), \
+                patch.object(local_storage, "remove_objects", wraps=local_storage.remove_objects) as remove:
+            purge_service.purge_project_bucket(progress)
+
+        assert [len(call.args[1]) for call in remove.call_args_list] == [10, 10, 5]
+        assert progress.objects_deleted == 25
+        assert not minio_client.bucket_exists("p1")
+
+    def test_missing_bucket_is_a_no_op(self, local_storage):
+        progress = PurgeProgress(project_id="gone")
+
+        purge_service.purge_project_bucket(progress)
+
+        assert progress.objects_deleted == 0
+
+    def test_failed_deletes_stop_the_purge_and_keep_the_bucket(self, local_storage):
+        _fill("p1", 3)
+        progress = PurgeProgress(project_id="p1")
+
+        with patch.object(local_storage, "remove_objects", return_value=["images/001.png"]):
+            with pytest.raises(OSError):
+                purge_service.purge_project_bucket(progress)
+
+        assert progress.objects_deleted == 2
+        assert minio_client.bucket_exists("p1")
+
+    def test_interrupted_purge_resumes_from_remaining_objects(self, local_storage):
+        _fill("p1", 5)
+        first = PurgeProgress(project_id="p1")
+
+        with patch.object(purge_service.settings, "PROJECT_PURGE_BATCH_SIZE", 2), \
+                patch.object(minio_client, "delete_files", side_effect=[[], RuntimeError("crash")]):
+            with pytest.raises(RuntimeError):
+                purge_service.purge_project_bucket(first)
+
+        # Nothing was really deleted by the mock, so everything is still there to resume.
+        second = PurgeProgress(project_id="p1")
+        purge_service.purge_project_bucket(second)
+
+        assert second.objects_deleted == 5
+        assert not minio_client.bucket_exists("p1")
+
+
+class TestSchedulePurge:
+
+    def test_duplicate_schedule_is_ignored(self):
+        project_id = uuid.uuid4()
+
+        assert purge_service.schedule_purge(project_id) is True
+        assert purge_service.schedule_purge(project_id) is False
+        assert purge_service.get_progress(project_id).state == "queued"
+
+    def test_run_purge_records_progress(self, local_storage):
+        _fill("p1", 3)
+        purge_service.schedule_purge("p1")
+
+        purge_service._run_purge("p1")
+
+        progress = purge_service.get_progress("p1")
+        assert progress.state == "complete"
+        assert progress.objects_deleted == 3
+        assert progress.finished_at is not None
+
+    def test_run_purge_records_failure(self):
+        purge_service.schedule_purge("p1")
+
+        with patch("services.purge_service.purge_project_bucket", side_effect=OSError("storage down")):
+            purge_service._run_purge("p1")
+
+        progress = purge_service.get_progress("p1")
+        assert progress.state == "failed"
+        assert progress.error == "storage down"
+        assert purge_service.schedule_purge("p1") is True
+
+    def test_finished_purges_are_trimmed(self):
+        with patch.object(purge_service, "MAX_FINISHED_PURGES", 2), \
+                patch("services.purge_service.purge_project_bucket"):
+            for name in ("a", "b", "c"):
+                purge_service.schedule_purge(name)
+                purge_service._run_purge(name)
+
+        assert purge_service.get_progress("a") is None
+        assert purge_service.get_progress("c").state == "complete"
+
+
+class TestWorkers:
+
+    def test_start_reschedules_deleted_projects_with_buckets(self):
+        deleted = [uuid.uuid4(), uuid.uuid4()]
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value = [(project_id,) for project_id in deleted]
+
+        with patch("services.purge_service.SessionLocal", return_value=mock_db), \
+                patch("services.purge_service.minio_client.list_buckets", return_value=[str(deleted[0]), "other"]), \
+                patch.object(purge_service.settings, "PROJECT_PURGE_WORKERS", 0):
+            purge_service.start_purge_workers()
+        purge_service.stop_purge_workers()
+
+        assert purge_service.get_progress(deleted[0]).state == "queued"
+        assert purge_service.get_progress(deleted[1]) is None
+        mock_db.close.assert_called_once()
+
+    def test_workers_drain_the_queue(self, local_storage):
+        _fill("p1", 2)
+        with patch.object(purge_service.settings, "PROJECT_PURGE_WORKERS", 1), \
+                patch("services.purge_service._pending_project_ids", return_value=[]):
+            purge_service.start_purge_workers()
+            try:
+                purge_service.schedule_purge("p1")
+                purge_service._queue.join()
+            finally:
+                purge_service.stop_purge_workers()
+
+        assert purge_service.get_progress("p1").state == "complete"
+        assert not minio_client.bucket_exists("p1")
+
+
+class TestSweepAbandonedUploads:
+
+    PROJECT_ID = uuid.uuid4()
+
+    def _upload(self, local_storage, object_name: str, age_seconds: float) -> None:
+        minio_client.upload_file(str(self.PROJECT_ID), object_name, b"x", "image/png")
+        mtime = time.time() - age_seconds
+        os.utime(local_storage.path_for(str(self.PROJECT_ID), object_name), (mtime, mtime))
+
+    def _sweep(self, completed=()):
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.side_effect = [
+            [(self.PROJECT_ID,)],
+            *([[(submission_id,) for submission_id in completed]] * 10),
+        ]
+        with patch("services.purge_service.SessionLocal", return_value=mock_db):
+            return purge_service.sweep_abandoned_uploads()
+
+    def test_deletes_only_old_uploads_without_a_submission(self, local_storage):
+        completed, abandoned, recent = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        old = 3 * 24 * 60 * 60
+        self._upload(local_storage, f"images/{completed}/a.png", old)
+        self._upload(local_storage, f"images/{abandoned}/b.png", old)
+        self._upload(local_storage, f"images/{recent}/c.png", 60)
+        self._upload(local_storage, "images/direct.png", old)
+
+        assert self._sweep(completed=[completed]) == 1
+
+        remaining = set(minio_client.list_objects(str(self.PROJECT_ID), "images/"))
+        assert remaining == {f"images/{completed}/a.png", f"images/{recent}/c.png", "images/direct.png"}
+
+    def test_deleted_projects_are_left_to_the_purge(self, local_storage):
+        self._upload(local_storage, f"images/{uuid.uuid4()}/a.png", 3 * 24 * 60 * 60)
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value = []
+
+        with patch("services.purge_service.SessionLocal", return_value=mock_db):
+            assert purge_service.sweep_abandoned_uploads() == 0
+
+    def test_sweep_loop_survives_errors(self):
+        with patch.object(purge_service, "_stop") as mock_stop, \
+                patch("services.purge_service.sweep_abandoned_uploads", side_effect=OSError("storage down")) as sweep:
+            mock_stop.wait.side_effect = [False, False, True]
+            purge_service._sweep_loop()
+
+        assert sweep.call_count == 2
+
+
+class TestPurgeMetricsRoute:
+
+    def test_reports_progress(self, client):
+        purge_service.schedule_purge("p1")
+
+        body = client.get("/metrics/project-purges").json()
+
+        assert body["queued"] == 1
+        assert body["purges"][0]["project_id"] == "p1"
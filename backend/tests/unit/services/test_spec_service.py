@@ -0,0 +1,228 @@
+"""Tests for spec_service."""
+import pytest
+from unittest.mock import call, patch
+
+from services import spec_service
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    spec_service.clear_spec_text_cache()
+    yield
+    spec_service.clear_spec_text_cache()
+
+
+@pytest.fixture
+def mock_minio():
+    """minio_client with no spec-text sidecars stored yet."""
+    with patch("services.spec_service.minio_client") as mock:
+        mock.get_file_if_exists.return_value = None
+        mock.get_file.return_value = b"%PDF fake"
+        yield mock
+
+
+class TestLoadSpecText:
+
+    def _call(self, mock_minio, objects, extract_returns="spec content"):
+        mock_minio.list_object_etags.return_value = objects
+        with patch("services.spec_service.extract_text_from_pdf", return_value=extract_returns):
+            return spec_service.load_spec_text("my-bucket")
+
+    def test_lists_designs_prefix(self, mock_minio):
+        self._call(mock_minio, objects={})
+
+        mock_minio.list_object_etags.assert_called_once_with(bucket="my-bucket", prefix="designs/")
+
+    def test_returns_none_when_no_objects(self, mock_minio):
+        assert self._call(mock_minio, objects={}) is None
+
+    def test_returns_none_when_no_pdfs(self, mock_minio):
+        result = self._call(mock_minio, objects={"designs/image.png": "e1", "designs/readme.txt": "e2"})
+        assert result is None
+
+    def test_returns_text_for_single_pdf(self, mock_minio):
+        result = self._call(mock_minio, objects={"designs/spec.pdf": "e1"}, extract_returns="spec content")
+        assert result == "spec content"
+
+    def test_joins_multiple_pdfs_with_separator(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/a.pdf": "e1", "designs/b.pdf": "e2"}
+        with patch("services.spec_service.extract_text_from_pdf", side_effect=["first", "second"]):
+            result = spec_service.load_spec_text("bucket")
+
+        assert "first" in result
+        assert "second" in result
+        assert "---" in result
+
+    def test_returns_none_when_all_pdfs_empty(self, mock_minio):
+        result = self._call(mock_minio, objects={"designs/empty.pdf": "e1"}, extract_returns="   ")
+        assert result is None
+
+    def test_skips_failed_pdf_silently(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/bad.pdf": "e1"}
+        with patch("services.spec_service.extract_text_from_pdf", side_effect=Exception("corrupt pdf")):
+            result = spec_service.load_spec_text("bucket")
+
+        assert result is None
+
+    def test_listing_error_propagates(self, mock_minio):
+        mock_minio.list_object_etags.side_effect = Exception("bucket missing")
+        with pytest.raises(Exception, match="bucket missing"):
+            spec_service.load_spec_text("bucket")
+
+
+class TestSidecars:
+
+    def test_sidecar_is_used_instead_of_parsing_pdf(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+        mock_minio.get_file_if_exists.return_value = b"precomputed spec"
+
+        with patch("services.spec_service.extract_text_from_pdf") as mock_extract:
+            result = spec_service.load_spec_text("bucket")
+
+        assert result == "precomputed spec"
+        mock_minio.get_file_if_exists.assert_called_once_with(bucket="bucket", object_name="spec-text/etag-1.txt")
+        mock_minio.get_file.assert_not_called()
+        mock_extract.assert_not_called()
+
+    def test_missing_sidecar_is_written_after_extraction(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec"):
+            spec_service.load_spec_text("bucket")
+
+        mock_minio.upload_file.assert_called_once_with(
+            bucket="bucket",
+            object_name="spec-text/etag-1.txt",
+            file_data=b"spec",
+            content_type="text/plain; charset=utf-8",
+        )
+
+    def test_sidecar_write_failure_still_returns_text(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+        mock_minio.upload_file.side_effect = Exception("read-only")
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec"):
+            assert spec_service.load_spec_text("bucket") == "spec"
+
+
+class TestSpecTextCache:
+
+    def test_unchanged_pdf_is_extracted_once(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec") as mock_extract:
+            first = spec_service.load_spec_text("bucket")
+            second = spec_service.load_spec_text("bucket")
+
+        assert first == second == "spec"
+        mock_extract.assert_called_once()
+        mock_minio.get_file.assert_called_once()
+
+    def test_new_etag_is_extracted_again(self, mock_minio):
+        with patch("services.spec_service.extract_text_from_pdf", side_effect=["v1", "v2"]):
+            mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+            first = spec_service.load_spec_text("bucket")
+            mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-2"}
+            second = spec_service.load_spec_text("bucket")
+
+        assert (first, second) == ("v1", "v2")
+
+    def test_failed_extraction_is_not_cached(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+
+        with patch("services.spec_service.extract_text_from_pdf", side_effect=[Exception("flaky"), "spec"]):
+            assert spec_service.load_spec_text("bucket") is None
+            assert spec_service.load_spec_text("bucket") == "spec"
+
+    def test_invalidate_drops_only_that_bucket(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec") as mock_extract:
+            spec_service.load_spec_text("bucket-a")
+            spec_service.load_spec_text("bucket-b")
+
+            spec_service.invalidate_spec_text("bucket-a")
+            spec_service.load_spec_text("bucket-a")
+            spec_service.load_spec_text("bucket-b")
+
+        assert mock_extract.call_count == 3
+
+
+class TestPrecomputeSpecText:
+
+    def test_extracts_from_given_bytes_and_fills_cache(self, mock_minio):
+        mock_minio.get_etag.return_value = "etag-1"
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec") as mock_extract:
+            spec_service.precompute_spec_text("bucket", "designs/spec.pdf", b"%PDF uploaded")
+
+        mock_extract.assert_called_once_with(b"%PDF uploaded")
+        mock_minio.get_file.assert_not_called()
+        mock_minio.upload_file.assert_called_once()
+
+        # Detection now hits the cache: no sidecar read, no parse
+        mock_minio.list_object_etags.return_value = {"designs/spec.pdf": "etag-1"}
+        assert spec_service.load_spec_text("bucket") == "spec"
+        mock_minio.get_file_if_exists.assert_not_called()
+
+    def test_downloads_when_no_bytes_given(self, mock_minio):
+        mock_minio.get_etag.return_value = "etag-1"
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec"):
+            spec_service.precompute_spec_text("bucket", "designs/spec.pdf")
+
+        mock_minio.get_file.assert_called_once_with(bucket="bucket", object_name="designs/spec.pdf")
+
+    def test_skips_non_pdf(self, mock_minio):
+        spec_service.precompute_spec_text("bucket", "designs/notes.txt", b"text")
+
+        mock_minio.get_etag.assert_not_called()
+
+    def test_errors_are_swallowed(self, mock_minio):
+        mock_minio.get_etag.side_effect = Exception("minio down")
+
+        spec_service.precompute_spec_text("bucket", "designs/spec.pdf", b"%PDF")
+
+    @patch("services.spec_service.threading.Thread")
+    def test_schedule_runs_in_background_thread(self, mock_thread_cls):
+        spec_service.schedule_spec_text_extraction("bucket", "designs/spec.pdf", b"%PDF")
+
+        mock_thread_cls.assert_called_once_with(
+            target=spec_service.precompute_spec_text,
+            args=("bucket", "designs/spec.pdf", b"%PDF"),
+            daemon=True,
+        )
+        mock_thread_cls.return_value.start.assert_called_once()
+
+
+class TestBackfillBucket:
+
+    def test_extracts_only_missing_sidecars(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {
+            "designs/a.pdf": "etag-a",
+            "designs/b.pdf": "etag-b",
+            "designs/notes.txt": "etag-t",
+        }
+        mock_minio.get_file_if_exists.side_effect = lambda bucket, object_name: (
+            b"done" if object_name == "spec-text/etag-a.txt" else None
+        )
+
+        with patch("services.spec_service.extract_text_from_pdf", return_value="spec"):
+            stats = spec_service.backfill_bucket("bucket")
+
+        assert stats == {"extracted": 1, "existing": 1, "pruned": 0}
+        mock_minio.get_file.assert_called_once_with(bucket="bucket", object_name="designs/b.pdf")
+
+    def test_prune_removes_orphaned_sidecars(self, mock_minio):
+        mock_minio.list_object_etags.return_value = {"designs/a.pdf": "etag-a"}
+        mock_minio.get_file_if_exists.return_value = b"done"
+        mock_minio.list_objects.return_value = ["spec-text/etag-a.txt", "spec-text/etag-old.txt"]
+
+        stats = spec_service.backfill_bucket("bucket", prune=True)
+
+        assert stats["pruned"] == 1
+        assert mock_minio.delete_file.call_args_list == [
+            call(bucket="bucket", object_name="spec-text/etag-old.txt"),
+        ]
@@ -0,0 +1,183 @@
+"""Tests for storage_backend and the minio_client facade over it."""
+import io
+import mmap
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from minio.error import S3Error
+
+from services import minio_client, storage_backend
+from services.storage_backend import LocalBackend, MinioBackend, ObjectNotFound
+from utils.file_validation import PNG_MAGIC
+
+pytestmark = pytest.mark.unit
+
+
+def _token(url: str) -> str:
+    return parse_qs(urlparse(url).query)["token"][0]
+
+
+class TestLocalBackend:
+
+    def test_put_then_get_is_memory_mapped(self, local_storage):
+        local_storage.ensure_bucket("p1")
+        local_storage.put_object("p1", "images/a.png", io.BytesIO(b"pixels"), 6, "image/png")
+
+        view = local_storage.get_object("p1", "images/a.png")
+
+        assert bytes(view) == b"pixels"
+        assert isinstance(view.obj, mmap.mmap)
+        assert view.readonly
+
+    def test_unknown_length_stream_is_copied_fully(self, local_storage):
+        data = b"x" * (storage_backend.COPY_CHUNK_BYTES * 2 + 3)
+        local_storage.put_object("p1", "big.bin", io.BytesIO(data), -1, "")
+
+        assert local_storage.stat_object("p1", "big.bin").size == len(data)
+
+    def test_failed_write_leaves_no_object(self, local_storage):
+        stream = MagicMock()
+        stream.read.side_effect = [b"partial", OSError("client went away")]
+
+        with pytest.raises(OSError):
+            local_storage.put_object("p1", "images/a.png", stream, -1, "image/png")
+
+        assert local_storage.list_objects("p1", "") == []
+        assert list((local_storage.root / "p1" / "images").iterdir()) == []
+
+    def test_missing_object_raises(self, local_storage):
+        with pytest.raises(ObjectNotFound):
+            local_storage.get_object("p1", "nope.png")
+
+    def test_empty_object(self, local_storage):
+        local_storage.put_object("p1", "empty", io.BytesIO(b""), 0, "")
+        assert bytes(local_storage.get_object("p1", "empty")) == b""
+
+    def test_head_and_stat(self, local_storage):
+        local_storage.put_object("p1", "a.png", io.BytesIO(PNG_MAGIC + b"rest"), -1, "image/png")
+
+        assert local_storage.get_object_head("p1", "a.png", 8) == PNG_MAGIC
+        assert local_storage.stat_object("p1", "a.png").size == len(PNG_MAGIC) + 4
+
+    def test_etag_changes_on_rewrite(self, local_storage):
+        local_storage.put_object("p1", "designs/spec.pdf", io.BytesIO(b"v1"), -1, "")
+        first = local_storage.stat_object("p1", "designs/spec.pdf").etag
+        local_storage.put_object("p1", "designs/spec.pdf", io.BytesIO(b"v22"), -1, "")
+
+        assert local_storage.stat_object("p1", "designs/spec.pdf").etag != first
+
+    def test_list_objects_by_prefix(self, local_storage):
+        for name in ("designs/a.pdf", "designs/b.pdf", "images/c.png"):
+            local_storage.put_object("p1", name, io.BytesIO(b"x"), 1, "")
+
+        assert [obj.name for obj in local_storage.list_objects("p1", "designs/")] == ["designs/a.pdf", "designs/b.pdf"]
+        assert local_storage.list_objects("missing-bucket", "") == []
+
+    @pytest.mark.parametrize("object_name", ["../other/a.png", "/etc/passwd", "images/../../x"])
+    def test_rejects_names_outside_bucket(self, local_storage, object_name):
+        with pytest.raises(ValueError):
+            local_storage.put_object("p1", object_name, io.BytesIO(b"x"), 1, "")
+
+    def test_presigned_urls_are_scoped_to_method_and_object(self, local_storage):
+        url = local_storage.presigned_get_url("p1", "images/a.png", 60, download=True)
+
+        claims = local_storage.verify_url_token(_token(url), "GET", "p1", "images/a.png")
+        assert claims["download"] is True
+        with pytest.raises(storage_backend.signed_token.InvalidToken):
+            local_storage.verify_url_token(_token(url), "PUT", "p1", "images/a.png")
+        with pytest.raises(storage_backend.signed_token.InvalidToken):
+            local_storage.verify_url_token(_token(url), "GET", "p1", "images/b.png")
+
+
+class TestBucketCache:
+
+    def test_ensure_bucket_checks_storage_once(self):
+        backend = MinioBackend()
+        backend._client = MagicMock()
+        backend._client.bucket_exists.return_value = False
+
+        backend.ensure_bucket("p1")
+        backend.ensure_bucket("p1")
+
+        backend._client.bucket_exists.assert_called_once_with("p1")
+        backend._client.make_bucket.assert_called_once_with("p1")
+
+    def test_removed_bucket_is_forgotten(self, local_storage):
+        local_storage.ensure_bucket("p1")
+        minio_client.delete_project_bucket("p1")
+
+        assert "p1" not in local_storage._known_buckets
+        assert not local_storage.bucket_exists("p1")
+
+
+class TestMinioBackend:
+
+    def test_no_such_key_maps_to_object_not_found(self):
+        backend = MinioBackend()
+        backend._client = MagicMock()
+        backend._client.stat_object.side_effect = S3Error(MagicMock(), "NoSuchKey", "missing", "", "", "")
+
+        with pytest.raises(ObjectNotFound):
+            backend.stat_object("p1", "a.png")
+
+
+class TestCreateBackend:
+
+    def test_local(self, tmp_path):
+        with patch("services.storage_backend.settings.LOCAL_STORAGE_ROOT", str(tmp_path)):
+            assert isinstance(storage_backend.create_backend("local"), LocalBackend)
+
+    def test_unknown_name_raises(self):
+        with pytest.raises(ValueError):
+            storage_backend.create_backend("s4")
+
+
+class TestFacadeOnLocalBackend:
+
+    def test_upload_get_and_delete(self, local_storage):
+        minio_client.upload_file("p1", "images/a.png", b"data", "image/png")
+
+        assert minio_client.get_file("p1", "images/a.png") == b"data"
+        assert minio_client.list_objects("p1", "images/") == ["images/a.png"]
+        assert minio_client.get_size_if_exists("p1", "images/a.png") == 4
+
+        minio_client.delete_file("p1", "images/a.png")
+        assert minio_client.get_file_if_exists("p1", "images/a.png") is None
+        assert minio_client.get_size_if_exists("p1", "images/a.png") is None
+
+    def test_delete_project_bucket_removes_nested_objects(self, local_storage):
+        minio_client.upload_file("p1", "images/x/a.png", b"a", "image/png")
+        minio_client.upload_file("p1", "designs/spec.pdf", b"b", "application/pdf")
+
+        minio_client.delete_project_bucket("p1")
+
+        assert minio_client.list_buckets() == []
+
+
+class TestLocalUrlRoutes:
+
+    def test_presigned_put_then_get(self, local_storage, client):
+        put_url = minio_client.get_presigned_put_url("p1", "images/a.png", 60)
+        get_url = minio_client.get_presigned_url("p1", "images/a.png", 60)
+
+        put = client.put(urlparse(put_url).path, params={"token": _token(put_url)}, content=PNG_MAGIC + b"img")
+        get = client.get(urlparse(get_url).path, params={"token": _token(get_url)})
+
+        assert put.status_code == 200
+        assert get.status_code == 200
+        assert get.content == PNG_MAGIC + b"img"
+        assert get.headers["content-type"] == "image/png"
+
+    def test_get_with_put_token_is_forbidden(self, local_storage, client):
+        put_url = minio_client.get_presigned_put_url("p1", "images/a.png", 60)
+
+        response = client.get(urlparse(put_url).path, params={"token": _token(put_url)})
+
+        assert response.status_code == 403
+
+    def test_routes_absent_on_minio_backend(self, client):
+        with patch("services.storage_service.get_backend", return_value=MinioBackend()):
+            response = client.get("/storage/local/p1/images/a.png", params={"token": "x"})
+
+        assert response.status_code == 404
@@ -1,10 +1,14 @@
 """Tests for storage_service."""
+import io
 import uuid
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
 
-from services import storage_service
+from core import exceptions
+from services import handoff_cache, storage_service
 from utils.file_validation import (
     PNG_MAGIC,
     PDF_MAGIC,
@@ -15,6 +19,16 @@ from utils.file_validation import (
 pytestmark = pytest.mark.unit
 
 
+def _upload_file(filename, contents, content_type, size="known"):
+    """A real UploadFile over in-memory bytes (size=None mimics an unknown length)."""
+    return UploadFile(
+        file=io.BytesIO(contents),
+        filename=filename,
+        size=len(contents) if size == "known" else size,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
 class TestStorageServiceUploadImage:
 
     @pytest.mark.asyncio
@@ -29,12 +43,8 @@ class TestStorageServiceUploadImage:
         mock_project = MagicMock()
         mock_get_project.return_value = mock_project
         mock_db = MagicMock()
-        mock_minio.upload_file.return_value = f"images/test.png"
 
-        mock_file = AsyncMock()
-        mock_file.filename = "test.png"
-        mock_file.content_type = "image/png"
-        mock_file.read = AsyncMock(return_value=PNG_MAGIC + b" rest of png content")
+        mock_file = _upload_file("test.png", PNG_MAGIC + b" rest of png content", "image/png")
 
         result = await storage_service.upload_image(
             db=mock_db,
@@ -45,7 +55,7 @@ class TestStorageServiceUploadImage:
         )
 
         mock_get_project.assert_called_once_with(mock_db, project_id)
-        mock_minio.upload_file.assert_called_once()
+        mock_minio.upload_stream.assert_called_once()
         mock_db.add.assert_called_once()
         mock_db.commit.assert_called_once()
         mock_detection.trigger_detection.assert_called_once()
@@ -53,6 +63,47 @@ class TestStorageServiceUploadImage:
         assert result.project_id == project_id
         assert f"{project_id}/images/test.png" == result.object_key
 
+    @pytest.mark.asyncio
+    @patch("services.storage_service.project_service.get_project")
+    @patch("services.storage_service.detection_service")
+    @patch("services.storage_service.minio_client")
+    async def test_upload_image_hands_bytes_to_worker(self, mock_minio, mock_detection, mock_get_project):
+        """Test the uploaded bytes are offered to the detection worker before it is triggered."""
+        contents = PNG_MAGIC + b" rest of png content"
+        offered = {}
+        mock_detection.trigger_detection.side_effect = lambda **kwargs: offered.update(
+            data=handoff_cache.take(kwargs["submission_id"])
+        )
+
+        await storage_service.upload_image(
+            db=MagicMock(),
+            project_id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            file=_upload_file("test.png", contents, "image/png"),
+            allowed_types=["image/png"],
+        )
+
+        assert offered["data"] == contents
+
+    @pytest.mark.asyncio
+    @patch("services.storage_service.project_service.get_project")
+    @patch("services.storage_service.detection_service")
+    @patch("services.storage_service.minio_client")
+    async def test_upload_image_over_handoff_cap_is_not_cached(self, mock_minio, mock_detection, mock_get_project):
+        """Test images larger than the handoff cache are left for the worker to download."""
+        project_id = uuid.uuid4()
+
+        with patch("services.storage_service.handoff_cache.accepts", return_value=False):
+            await storage_service.upload_image(
+                db=MagicMock(),
+                project_id=project_id,
+                user_id=uuid.uuid4(),
+                file=_upload_file("test.png", PNG_MAGIC + b"x", "image/png"),
+                allowed_types=["image/png"],
+            )
+
+        assert handoff_cache.stats()["entries"] == 0
+
     @pytest.mark.asyncio
     @patch("services.storage_service.project_service.get_project")
     async def test_upload_image_project_not_found(self, mock_get_project):
@@ -120,10 +171,7 @@ class TestStorageServiceUploadImage:
         """Test upload fails when image exceeds max size."""
         mock_get_project.return_value = MagicMock()
         mock_db = MagicMock()
-        mock_file = AsyncMock()
-        mock_file.filename = "large.png"
-        mock_file.content_type = "image/png"
-        mock_file.read = AsyncMock(return_value=PNG_MAGIC + b"x" * (MAX_IMAGE_UPLOAD_BYTES + 1))
+        mock_file = _upload_file("large.png", PNG_MAGIC + b"x" * (MAX_IMAGE_UPLOAD_BYTES + 1), "image/png")
 
         with pytest.raises(HTTPException) as exc:
             await storage_service.upload_image(
@@ -142,10 +190,7 @@ class TestStorageServiceUploadImage:
         """Test upload fails when file content is not valid PNG/JPEG."""
         mock_get_project.return_value = MagicMock()
         mock_db = MagicMock()
-        mock_file = AsyncMock()
-        mock_file.filename = "fake.png"
-        mock_file.content_type = "image/png"
-        mock_file.read = AsyncMock(return_value=b"not an image at all")
+        mock_file = _upload_file("fake.png", b"not an image at all", "image/png")
 
         with pytest.raises(HTTPException) as exc:
             await storage_service.upload_image(
@@ -159,24 +204,321 @@ class TestStorageServiceUploadImage:
         assert "not a valid" in exc.value.detail.lower()
 
 
+class TestStorageServiceStreamingUpload:
+
+    @pytest.fixture(autouse=True)
+    def _mocks(self):
+        with (
+            patch("services.storage_service.project_service.get_project"),
+            patch("services.storage_service.detection_service"),
+            patch("services.storage_service.minio_client") as mock_minio,
+        ):
+            self.mock_minio = mock_minio
+            yield
+
+    async def _upload(self, mock_file):
+        return await storage_service.upload_image(
+            db=MagicMock(),
+            project_id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            file=mock_file,
+            allowed_types=["image/png"],
+        )
+
+    @pytest.mark.asyncio
+    async def test_streams_the_file_object_instead_of_bytes(self):
+        """Test MinIO receives a size-limited reader over the spooled file, from its start."""
+        contents = PNG_MAGIC + b"pixels" * 100
+        streamed = []
+        self.mock_minio.upload_stream.side_effect = lambda **kwargs: streamed.append(kwargs["stream"].read())
+
+        await self._upload(_upload_file("a.png", contents, "image/png"))
+
+        kwargs = self.mock_minio.upload_stream.call_args.kwargs
+        assert kwargs["length"] == len(contents)
+        assert kwargs["content_type"] == "image/png"
+        assert streamed == [contents]
+
+    @pytest.mark.asyncio
+    async def test_known_oversize_rejected_before_reading(self):
+        """Test a declared size over the limit is rejected without streaming anything."""
+        mock_file = _upload_file("a.png", PNG_MAGIC, "image/png", size=MAX_IMAGE_UPLOAD_BYTES + 1)
+
+        with pytest.raises(HTTPException) as exc:
+            await self._upload(mock_file)
+
+        assert "too large" in exc.value.detail.lower()
+        self.mock_minio.upload_stream.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_size_limit_enforced_while_streaming(self):
+        """Test an upload of unknown length fails as soon as it passes the limit."""
+        def consume(**kwargs):
+            while kwargs["stream"].read(1024 * 1024):
+                pass
+
+        self.mock_minio.upload_stream.side_effect = consume
+        mock_file = _upload_file("a.png", PNG_MAGIC + b"x" * MAX_IMAGE_UPLOAD_BYTES, "image/png", size=None)
+
+        with pytest.raises(HTTPException) as exc:
+            await self._upload(mock_file)
+
+        assert self.mock_minio.upload_stream.call_args.kwargs["length"] == -1
+        assert "too large" in exc.value.detail.lower()
+
+
+def _image_file(filename, contents=PNG_MAGIC + b" rest of png content", content_type="image/png"):
+    return _upload_file(filename, contents, content_type)
+
+
+class TestStorageServiceUploadImages:
+
+    async def _upload(self, files, mock_db=None):
+        return await storage_service.upload_images(
+            db=mock_db or MagicMock(),
+            project_id=self.project_id,
+            user_id=uuid.uuid4(),
+            files=files,
+            allowed_types=["image/png", "image/jpeg"],
+        )
+
+    @pytest.fixture(autouse=True)
+    def _mocks(self):
+        self.project_id = uuid.uuid4()
+        with (
+            patch("services.storage_service.project_service.get_project") as mock_get_project,
+            patch("services.storage_service.detection_service") as mock_detection,
+            patch("services.storage_service.minio_client") as mock_minio,
+        ):
+            self.mock_get_project = mock_get_project
+            self.mock_detection = mock_detection
+            self.mock_minio = mock_minio
+            yield
+
+    @pytest.mark.asyncio
+    async def test_one_commit_and_one_enqueue_for_whole_batch(self):
+        """Test every stored file gets a submission, inserted and queued together."""
+        mock_db = MagicMock()
+
+        result = await self._upload([_image_file("a.png"), _image_file("b.png"), _image_file("c.png")], mock_db)
+
+        assert (result.uploaded, result.failed) == (3, 0)
+        self.mock_get_project.assert_called_once()
+        self.mock_minio.ensure_bucket.assert_called_once_with(str(self.project_id))
+        assert self.mock_minio.upload_stream.call_count == 3
+        assert all(call.kwargs["create_bucket"] is False for call in self.mock_minio.upload_stream.call_args_list)
+        assert len(mock_db.add_all.call_args[0][0]) == 3
+        mock_db.commit.assert_called_once()
+        jobs = self.mock_detection.trigger_detection_batch.call_args[0][0]
+        assert [job[2] for job in jobs] == [f"{self.project_id}/images/{name}" for name in ("a.png", "b.png", "c.png")]
+        assert [job[0] for job in jobs] == [r.submission_id for r in result.results]
+        assert all(handoff_cache.take(r.submission_id) is not None for r in result.results)
+
+    @pytest.mark.asyncio
+    async def test_invalid_files_are_reported_and_skipped(self):
+        """Test bad files get per-file errors while valid ones are stored."""
+        files = [
+            _image_file("ok.png"),
+            _image_file("doc.pdf", content_type="application/pdf"),
+            _image_file("fake.png", contents=b"not an image"),
+            _image_file("big.png", contents=PNG_MAGIC + b"x" * MAX_IMAGE_UPLOAD_BYTES),
+        ]
+
+        result = await self._upload(files)
+
+        assert (result.uploaded, result.failed) == (1, 3)
+        assert result.results[0].submission_id is not None
+        assert "Invalid file type" in result.results[1].error
+        assert "not a valid PNG or JPEG" in result.results[2].error
+        assert "too large" in result.results[3].error
+        assert all(r.submission_id is None for r in result.results[1:])
+
+    @pytest.mark.asyncio
+    async def test_storage_failure_only_fails_that_file(self):
+        """Test a MinIO error for one object does not abort the batch."""
+        def upload_stream(object_name, **kwargs):
+            if object_name == "images/b.png":
+                raise Exception("minio down")
+
+        self.mock_minio.upload_stream.side_effect = upload_stream
+
+        result = await self._upload([_image_file("a.png"), _image_file("b.png")])
+
+        assert (result.uploaded, result.failed) == (1, 1)
+        assert result.results[1].error == "Upload to storage failed"
+
+    @pytest.mark.asyncio
+    async def test_duplicate_filename_rejected(self):
+        """Test a repeated filename is not uploaded over the first one."""
+        result = await self._upload([_image_file("a.png"), _image_file("a.png")])
+
+        assert self.mock_minio.upload_stream.call_count == 1
+        assert result.results[1].error == "Duplicate filename in batch"
+
+    @pytest.mark.asyncio
+    async def test_nothing_stored_means_no_commit(self):
+        """Test a batch with no valid files neither commits nor enqueues."""
+        mock_db = MagicMock()
+
+        result = await self._upload([_image_file("fake.png", contents=b"nope")], mock_db)
+
+        assert result.uploaded == 0
+        mock_db.commit.assert_not_called()
+        self.mock_detection.trigger_detection_batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_too_many_files_rejected(self):
+        """Test requests over UPLOAD_BATCH_MAX_FILES are rejected before any upload."""
+        with patch("services.storage_service.settings.UPLOAD_BATCH_MAX_FILES", 1):
+            with pytest.raises(HTTPException) as exc_info:
+                await self._upload([_image_file("a.png"), _image_file("b.png")])
+
+        assert exc_info.value.status_code == 400
+        self.mock_minio.upload_stream.assert_not_called()
+
+
+class TestStorageServiceDirectUpload:
+
+    @pytest.fixture(autouse=True)
+    def _mocks(self):
+        self.project_id = uuid.uuid4()
+        self.user_id = uuid.uuid4()
+        with (
+            patch("services.storage_service.project_service.get_project"),
+            patch("services.storage_service.detection_service") as mock_detection,
+            patch("services.storage_service.minio_client") as mock_minio,
+        ):
+            mock_minio.get_presigned_put_url.side_effect = lambda bucket, name, expires: f"http://minio/{bucket}/{name}?sig"
+            mock_minio.get_size_if_exists.return_value = 1024
+            mock_minio.get_file_head.return_value = PNG_MAGIC + b"\x00" * 8
+            self.mock_detection = mock_detection
+            self.mock_minio = mock_minio
+            yield
+
+    def _presign(self, *filenames):
+        return storage_service.presign_image_uploads(
+            db=MagicMock(), project_id=self.project_id, user_id=self.user_id, filenames=list(filenames),
+        )
+
+    def _complete(self, token, existing=None):
+        mock_db = MagicMock()
+        mock_db.get.return_value = existing
+        return mock_db, storage_service.complete_image_upload(db=mock_db, completion_token=token)
+
+    def test_presign_returns_put_url_and_token_per_file(self):
+        """Test each file gets its own object key under images/ and a presigned PUT URL."""
+        result = self._presign("a.png", "b.png")
+
+        assert [u.filename for u in result.uploads] == ["a.png", "b.png"]
+        first = result.uploads[0]
+        assert first.object_key.startswith(f"{self.project_id}/images/") and first.object_key.endswith("/a.png")
+        assert first.upload_url.startswith("http://minio/")
+        assert first.object_key != result.uploads[1].object_key
+        self.mock_minio.upload_stream.assert_not_called()
+
+    def test_presign_rejects_path_in_filename(self):
+        with pytest.raises(HTTPException) as exc:
+            self._presign("../other/a.png")
+        assert exc.value.status_code == 400
+
+    def test_complete_creates_submission_and_enqueues(self):
+        """Test completion checks the stored object, then creates and queues the submission."""
+        upload = self._presign("a.png").uploads[0]
+
+        mock_db, result = self._complete(upload.completion_token)
+
+        submission = mock_db.add.call_args[0][0]
+        assert submission.id == result.submission_id
+        assert submission.image_id == upload.object_key == result.object_key
+        assert submission.submitted_by_user_id == self.user_id
+        mock_db.commit.assert_called_once()
+        self.mock_detection.trigger_detection.assert_called_once_with(
+            submission_id=result.submission_id, project_id=self.project_id, image_object_key=upload.object_key,
+        )
+
+    def test_complete_is_idempotent(self):
+        """Test completing the same upload twice does not create a second submission."""
+        token = self._presign("a.png").uploads[0].completion_token
+
+        mock_db, _ = self._complete(token, existing=MagicMock())
+
+        mock_db.add.assert_not_called()
+        self.mock_detection.trigger_detection.assert_not_called()
+
+    def test_concurrent_completion_returns_the_row_it_lost_to(self):
+        """Test a completion racing another one for the same upload returns the winner's submission."""
+        upload = self._presign("a.png").uploads[0]
+        mock_db = MagicMock()
+        mock_db.get.side_effect = [None, MagicMock()]
+        mock_db.commit.side_effect = IntegrityError("INSERT", {}, Exception("duplicate key"))
+
+        result = storage_service.complete_image_upload(db=mock_db, completion_token=upload.completion_token)
+
+        assert result.object_key == upload.object_key
+        mock_db.rollback.assert_called_once()
+        self.mock_detection.trigger_detection.assert_not_called()
+
+    def test_other_integrity_errors_propagate(self):
+        upload = self._presign("a.png").uploads[0]
+        mock_db = MagicMock()
+        mock_db.get.return_value = None
+        mock_db.commit.side_effect = IntegrityError("INSERT", {}, Exception("foreign key"))
+
+        with pytest.raises(IntegrityError):
+            storage_service.complete_image_upload(db=mock_db, completion_token=upload.completion_token)
+
+    def test_complete_rejects_forged_token(self):
+        token = self._presign("a.png").uploads[0].completion_token
+        with patch("services.storage_service.settings.DETECTION_WEBHOOK_SECRET", "other-secret"):
+            with pytest.raises(exceptions.InvalidUploadToken):
+                self._complete(token)
+
+    def test_complete_before_upload_fails(self):
+        self.mock_minio.get_size_if_exists.return_value = None
+        token = self._presign("a.png").uploads[0].completion_token
+
+        with pytest.raises(HTTPException) as exc:
+            self._complete(token)
+
+        assert "not been uploaded" in exc.value.detail
+
+    def test_complete_deletes_oversize_object(self):
+        self.mock_minio.get_size_if_exists.return_value = MAX_IMAGE_UPLOAD_BYTES + 1
+        token = self._presign("a.png").uploads[0].completion_token
+
+        with pytest.raises(HTTPException) as exc:
+            self._complete(token)
+
+        assert "too large" in exc.value.detail.lower()
+        self.mock_minio.delete_file.assert_called_once()
+
+    def test_complete_deletes_non_image_object(self):
+        self.mock_minio.get_file_head.return_value = b"<html>"
+        upload = self._presign("a.png").uploads[0]
+
+        with pytest.raises(HTTPException):
+            mock_db, _ = self._complete(upload.completion_token)
+
+        bucket, object_name = upload.object_key.split("/", 1)
+        self.mock_minio.delete_file.assert_called_once_with(bucket=bucket, object_name=object_name)
+        self.mock_detection.trigger_detection.assert_not_called()
+
+
 class TestStorageServiceUploadDesign:
 
     @pytest.mark.asyncio
+    @patch("services.storage_service.spec_service")
     @patch("services.storage_service.project_service.get_project")
     @patch("services.storage_service.minio_client")
-    async def test_upload_design_success(self, mock_minio, mock_get_project):
+    async def test_upload_design_success(self, mock_minio, mock_get_project, mock_spec):
         """Test successful design upload."""
         project_id = uuid.uuid4()
 
         mock_project = MagicMock()
         mock_get_project.return_value = mock_project
         mock_db = MagicMock()
-        mock_minio.upload_file.return_value = "designs/spec.pdf"
 
-        mock_file = AsyncMock()
-        mock_file.filename = "spec.pdf"
-        mock_file.content_type = "application/pdf"
-        mock_file.read = AsyncMock(return_value=PDF_MAGIC + b" rest of pdf content")
+        mock_file = _upload_file("spec.pdf", PDF_MAGIC + b" rest of pdf content", "application/pdf")
 
         result = await storage_service.upload_design(
             db=mock_db,
@@ -186,11 +528,48 @@ class TestStorageServiceUploadDesign:
         )
 
         mock_get_project.assert_called_once_with(mock_db, project_id)
-        mock_minio.upload_file.assert_called_once()
+        mock_minio.upload_stream.assert_called_once()
         assert result.filename == "spec.pdf"
         assert result.project_id == project_id
         assert f"{project_id}/designs/spec.pdf" == result.object_key
 
+    @pytest.mark.asyncio
+    @patch("services.storage_service.spec_service")
+    @patch("services.storage_service.project_service.get_project")
+    @patch("services.storage_service.minio_client")
+    async def test_upload_design_invalidates_spec_text_cache(self, mock_minio, mock_get_project, mock_spec):
+        """A new design version must drop the project's cached spec text."""
+        project_id = uuid.uuid4()
+        mock_file = _upload_file("spec.pdf", PDF_MAGIC + b" rest of pdf content", "application/pdf")
+
+        await storage_service.upload_design(
+            db=MagicMock(),
+            project_id=project_id,
+            file=mock_file,
+            allowed_types=["application/pdf", "text/plain"],
+        )
+
+        mock_spec.invalidate_spec_text.assert_called_once_with(str(project_id))
+
+    @pytest.mark.asyncio
+    @patch("services.storage_service.spec_service")
+    @patch("services.storage_service.project_service.get_project")
+    @patch("services.storage_service.minio_client")
+    async def test_upload_design_schedules_text_extraction(self, mock_minio, mock_get_project, mock_spec):
+        """Spec text is extracted off the request path (the thread reads the PDF back from MinIO)."""
+        project_id = uuid.uuid4()
+        contents = PDF_MAGIC + b" rest of pdf content"
+        mock_file = _upload_file("spec.pdf", contents, "application/pdf")
+
+        await storage_service.upload_design(
+            db=MagicMock(),
+            project_id=project_id,
+            file=mock_file,
+            allowed_types=["application/pdf", "text/plain"],
+        )
+
+        mock_spec.schedule_spec_text_extraction.assert_called_once_with(str(project_id), "designs/spec.pdf")
+
     @pytest.mark.asyncio
     async def test_upload_design_invalid_file_type(self):
         """Test design upload fails for disallowed file type."""
@@ -216,12 +595,7 @@ class TestStorageServiceUploadDesign:
         """Test design upload fails when file exceeds max size."""
         mock_get_project.return_value = MagicMock()
         mock_db = MagicMock()
-        mock_file = AsyncMock()
-        mock_file.filename = "huge.pdf"
-        mock_file.content_type = "application/pdf"
-        mock_file.read = AsyncMock(
-            return_value=PDF_MAGIC + b"x" * (MAX_DESIGN_UPLOAD_BYTES + 1)
-        )
+        mock_file = _upload_file("huge.pdf", PDF_MAGIC + b"x" * (MAX_DESIGN_UPLOAD_BYTES + 1), "application/pdf")
 
         with pytest.raises(HTTPException) as exc:
             await storage_service.upload_design(
@@ -239,10 +613,7 @@ class TestStorageServiceUploadDesign:
         """Test design upload fails when content_type is PDF but content is not."""
         mock_get_project.return_value = MagicMock()
         mock_db = MagicMock()
-        mock_file = AsyncMock()
-        mock_file.filename = "fake.pdf"
-        mock_file.content_type = "application/pdf"
-        mock_file.read = AsyncMock(return_value=b"not a real pdf")
+        mock_file = _upload_file("fake.pdf", b"not a real pdf", "application/pdf")
 
         with pytest.raises(HTTPException) as exc:
             await storage_service.upload_design(
@@ -0,0 +1,99 @@
+"""Tests for submission_events."""
+import asyncio
+import threading
+import uuid
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from schemas.enums import AnnotationStatus, SubmissionPassFail, SubmissionStatus
+from services import submission_events
+
+pytestmark = pytest.mark.unit
+
+
+PROJECT_ID = uuid.uuid4()
+SUBMISSION_ID = uuid.uuid4()
+
+
+class TestSubmissionEvents:
+
+    @pytest.mark.asyncio
+    async def test_subscriber_receives_event(self):
+        subscription = submission_events.subscribe(PROJECT_ID)
+        try:
+            submission_events.publish(PROJECT_ID, SUBMISSION_ID, SubmissionStatus.running)
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+        finally:
+            submission_events.unsubscribe(subscription)
+
+        assert event["submission_id"] == str(SUBMISSION_ID)
+        assert event["status"] == "running"
+        assert event["pass_fail"] is None
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        subscription = submission_events.subscribe(PROJECT_ID)
+        try:
+            worker = threading.Thread(
+                target=submission_events.publish,
+                args=(PROJECT_ID, SUBMISSION_ID, "complete", SubmissionPassFail.pass_, 0),
+            )
+            worker.start()
+            worker.join()
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+        finally:
+            submission_events.unsubscribe(subscription)
+
+        assert (event["status"], event["pass_fail"], event["anomaly_count"]) == ("complete", "pass", 0)
+
+    @pytest.mark.asyncio
+    async def test_annotation_status_is_included(self):
+        subscription = submission_events.subscribe(PROJECT_ID)
+        try:
+            submission_events.publish(
+                PROJECT_ID, SUBMISSION_ID, "failed", "fail", 1, annotation_status=AnnotationStatus.pending,
+            )
+            event = await asyncio.wait_for(subscription.queue.get(), timeout=1)
+        finally:
+            submission_events.unsubscribe(subscription)
+
+        assert event["annotation_status"] == "pending"
+
+    @pytest.mark.asyncio
+    async def test_other_projects_are_not_notified(self):
+        subscription = submission_events.subscribe(PROJECT_ID)
+        try:
+            submission_events.publish(uuid.uuid4(), SUBMISSION_ID, "queued")
+            await asyncio.sleep(0)
+            assert subscription.queue.empty()
+        finally:
+            submission_events.unsubscribe(subscription)
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest(self, monkeypatch):
+        monkeypatch.setattr(submission_events, "MAX_PENDING_EVENTS", 2)
+        subscription = submission_events.subscribe(PROJECT_ID)
+        try:
+            for status in ("queued", "running", "complete"):
+                submission_events.publish(PROJECT_ID, SUBMISSION_ID, status)
+            await asyncio.sleep(0)
+            statuses = [subscription.queue.get_nowait()["status"] for _ in range(subscription.queue.qsize())]
+        finally:
+            submission_events.unsubscribe(subscription)
+
+        assert statuses == ["running", "complete"]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_subscriber(self):
+        subscription = submission_events.subscribe(PROJECT_ID)
+        assert submission_events.subscriber_count(PROJECT_ID) == 1
+        submission_events.unsubscribe(subscription)
+        assert submission_events.subscriber_count(PROJECT_ID) == 0
+
+    def test_publish_without_subscribers_is_noop(self):
+        submission_events.publish(PROJECT_ID, SUBMISSION_ID, "queued")
+
+    def test_publish_submission_never_raises(self):
+        with patch.object(submission_events, "publish", side_effect=RuntimeError("boom")):
+            submission_events.publish_submission(MagicMock())
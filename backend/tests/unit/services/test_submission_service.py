@@ -1,16 +1,33 @@
 """Tests for submission_service."""
 import uuid
+from datetime import datetime, timezone
+
 import pytest
 from unittest.mock import MagicMock, patch
 
 from core import exceptions
 from schemas.submissions import SubmissionCreate, SubmissionUpdate
-from schemas.enums import SubmissionStatus, SubmissionPassFail
+from schemas.enums import AnnotationStatus, SubmissionStatus, SubmissionPassFail
 from services import submission_service
 
 pytestmark = pytest.mark.unit
 
 
+def _page_query(mock_db):
+    """The final query object of list_submissions_for_project (no status/pass_fail/cursor filters)."""
+    return (
+        mock_db.query.return_value.options.return_value.filter.return_value
+        .order_by.return_value.limit.return_value
+    )
+
+
+def _submission_at(minute: int) -> MagicMock:
+    sub = MagicMock()
+    sub.id = uuid.uuid4()
+    sub.submitted_at = datetime(2026, 1, 1, 12, minute, tzinfo=timezone.utc)
+    return sub
+
+
 class TestSubmissionService:
 
     def test_create_submission_success(self):
@@ -70,10 +87,11 @@ class TestSubmissionService:
         mock_submissions = [MagicMock(), MagicMock(), MagicMock()]
         mock_db = MagicMock()
         with patch("services.submission_service.project_service.get_project", return_value=mock_project):
-            mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = mock_submissions
+            _page_query(mock_db).all.return_value = mock_submissions
 
-            result = submission_service.list_submissions_for_project(mock_db, uuid.uuid4())
+            result, next_cursor = submission_service.list_submissions_for_project(mock_db, uuid.uuid4())
         assert len(result) == 3
+        assert next_cursor is None
 
     def test_list_submissions_project_not_found(self):
         """Test listing submissions fails when project does not exist."""
@@ -82,6 +100,45 @@ class TestSubmissionService:
             with pytest.raises(exceptions.ProjectNotFound):
                 submission_service.list_submissions_for_project(mock_db, uuid.uuid4())
 
+    def test_list_submissions_fetches_one_extra_row_for_next_cursor(self):
+        """Test a full page returns the cursor of its last row."""
+        rows = [_submission_at(m) for m in (5, 4, 3)]
+        mock_db = MagicMock()
+        _page_query(mock_db).all.return_value = rows
+
+        with patch("services.submission_service.project_service.get_project"):
+            page, next_cursor = submission_service.list_submissions_for_project(mock_db, uuid.uuid4(), limit=2)
+
+        mock_db.query.return_value.options.return_value.filter.return_value.order_by.return_value.limit.assert_called_once_with(3)
+        assert page == rows[:2]
+        assert submission_service.decode_cursor(next_cursor) == (rows[1].submitted_at, rows[1].id)
+
+    def test_list_submissions_with_cursor_filters_after_position(self):
+        """Test the cursor adds a (submitted_at, id) row-value filter."""
+        cursor = submission_service.encode_cursor(_submission_at(1))
+        mock_db = MagicMock()
+        filtered = mock_db.query.return_value.options.return_value.filter.return_value.filter.return_value
+        filtered.order_by.return_value.limit.return_value.all.return_value = []
+
+        with patch("services.submission_service.project_service.get_project"):
+            page, next_cursor = submission_service.list_submissions_for_project(mock_db, uuid.uuid4(), cursor=cursor)
+
+        clause = mock_db.query.return_value.options.return_value.filter.return_value.filter.call_args[0][0]
+        assert "submitted_at" in str(clause) and "<" in str(clause)
+        assert (page, next_cursor) == ([], None)
+
+    def test_cursor_round_trip(self):
+        """Test encode_cursor/decode_cursor preserve timestamp precision and id."""
+        sub = _submission_at(7)
+        sub.submitted_at = sub.submitted_at.replace(microsecond=123456)
+        assert submission_service.decode_cursor(submission_service.encode_cursor(sub)) == (sub.submitted_at, sub.id)
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", "bm9waXBl", "MjAyNi0wMS0wMXxub3QtYS11dWlk"])
+    def test_invalid_cursor_raises(self, cursor):
+        """Test malformed cursors raise InvalidCursor (400)."""
+        with pytest.raises(exceptions.InvalidCursor):
+            submission_service.decode_cursor(cursor)
+
     def test_update_submission(self):
         """Test updating submission fields."""
         mock_submission = MagicMock()
@@ -111,6 +168,18 @@ class TestSubmissionService:
         mock_db.delete.assert_called_once_with(mock_submission)
         mock_db.commit.assert_called_once()
 
+    def test_delete_submission_removes_annotated_image(self):
+        """Test the stored annotated image is deleted with its submission."""
+        mock_submission = MagicMock()
+        mock_submission.annotated_image_key = "proj/annotated/sub.png"
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with patch("services.submission_service.minio_client") as mock_minio:
+            submission_service.delete_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        mock_minio.delete_file.assert_called_once_with(bucket="proj", object_name="annotated/sub.png")
+
     def test_retry_submission_from_failed(self):
         """Test retrying a failed submission resets it to queued."""
         mock_submission = MagicMock()
@@ -118,14 +187,87 @@ class TestSubmissionService:
         mock_db = MagicMock()
         mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
 
-        submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+        with patch("services.submission_service.detection_service"):
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
 
         assert mock_submission.status == SubmissionStatus.queued
         assert mock_submission.pass_fail == SubmissionPassFail.unknown
         assert mock_submission.anomaly_count is None
         assert mock_submission.error_message is None
+        mock_db.query.return_value.filter.return_value.delete.assert_called_once()  # previous anomalies
         mock_db.commit.assert_called_once()
 
+    def test_retry_submission_triggers_detection(self):
+        """Test retrying re-enqueues detection (which publishes the queued status and wakes a worker)."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.timeout
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with patch("services.submission_service.detection_service") as mock_detection:
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        mock_detection.trigger_detection.assert_called_once_with(
+            mock_submission.id, mock_submission.project_id, mock_submission.image_id,
+        )
+        mock_detection.retry_annotation.assert_not_called()
+
+    def test_retry_submission_deletes_previous_annotated_image(self):
+        """Test a full retry drops the previous run's boxes."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.failed
+        mock_submission.annotated_image_key = "proj/annotated/sub.png"
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with (
+            patch("services.submission_service.detection_service"),
+            patch("services.submission_service.minio_client") as mock_minio,
+        ):
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        assert mock_submission.annotated_image_key is None
+        mock_minio.delete_file.assert_called_once_with(bucket="proj", object_name="annotated/sub.png")
+
+    def test_retry_after_failed_annotation_reruns_only_annotation(self):
+        """Test the verdict is kept when only the OWLv2 stage failed."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.failed
+        mock_submission.pass_fail = SubmissionPassFail.fail
+        mock_submission.annotation_status = AnnotationStatus.failed
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with (
+            patch("services.submission_service.detection_service") as mock_detection,
+            patch("services.submission_service.submission_events") as mock_events,
+        ):
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        assert mock_submission.status == SubmissionStatus.failed
+        assert mock_submission.pass_fail == SubmissionPassFail.fail
+        assert mock_submission.annotation_status == AnnotationStatus.pending
+        mock_db.query.return_value.filter.return_value.delete.assert_not_called()
+        mock_detection.retry_annotation.assert_called_once_with(
+            mock_submission.id, mock_submission.project_id, mock_submission.image_id, mock_submission.attempt,
+        )
+        mock_detection.trigger_detection.assert_not_called()
+        mock_events.publish_submission.assert_called_once_with(mock_submission)
+
+    def test_update_submission_without_status_change_does_not_publish(self):
+        """Test only status transitions are published."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.failed
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with patch("services.submission_service.submission_events") as mock_events:
+            submission_service.update_submission(
+                mock_db, uuid.uuid4(), uuid.uuid4(), SubmissionUpdate(error_message="note"),
+            )
+
+        mock_events.publish_submission.assert_not_called()
+
     def test_retry_submission_from_queued_raises(self):
         """Test retrying a queued submission raises InvalidStateTransition."""
         mock_submission = MagicMock()
@@ -154,4 +296,65 @@ class TestSubmissionService:
         mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
 
         with pytest.raises(exceptions.InvalidStateTransition):
-            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
\ No newline at end of file
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+    def test_retry_submission_from_cancelled(self):
+        """Test a cancelled submission can be queued again."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.cancelled
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with patch("services.submission_service.detection_service"):
+            submission_service.retry_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        assert mock_submission.status == SubmissionStatus.queued
+        assert mock_submission.annotation_status is None
+
+    def test_cancel_queued_submission(self):
+        """Test cancelling a queued submission frees its handed-off upload and publishes the change."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.queued
+        mock_submission.id = uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with (
+            patch("services.submission_service.detection_service") as mock_detection,
+            patch("services.submission_service.handoff_cache") as mock_handoff,
+            patch("services.submission_service.submission_events") as mock_events,
+        ):
+            submission_service.cancel_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        assert mock_submission.status == SubmissionStatus.cancelled
+        mock_db.refresh.assert_any_call(mock_submission, with_for_update=True)
+        mock_db.commit.assert_called_once()
+        mock_handoff.discard.assert_called_once_with(mock_submission.id)
+        mock_detection.cancel_detection.assert_not_called()
+        mock_events.publish_submission.assert_called_once_with(mock_submission)
+
+    def test_cancel_running_submission_aborts_detection(self):
+        """Test cancelling a running submission signals the worker running it."""
+        mock_submission = MagicMock()
+        mock_submission.status = SubmissionStatus.running
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with patch("services.submission_service.detection_service") as mock_detection:
+            submission_service.cancel_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        assert mock_submission.status == SubmissionStatus.cancelled
+        mock_detection.cancel_detection.assert_called_once_with(mock_submission.id)
+
+    @pytest.mark.parametrize("status", [SubmissionStatus.complete, SubmissionStatus.failed, SubmissionStatus.cancelled])
+    def test_cancel_finished_submission_raises(self, status):
+        """Test only queued or running submissions can be cancelled."""
+        mock_submission = MagicMock()
+        mock_submission.status = status
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = mock_submission
+
+        with pytest.raises(exceptions.InvalidStateTransition):
+            submission_service.cancel_submission(mock_db, uuid.uuid4(), uuid.uuid4())
+
+        mock_db.commit.assert_not_called()
@@ -4,6 +4,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 
 from core import exceptions
+from db.models import User
 from schemas.users import UserCreate, UserUpdate
 from services import user_service
 
@@ -132,4 +133,33 @@ class TestUserService:
         user_service.delete_user(mock_db, uuid.uuid4())
 
         mock_db.delete.assert_called_once_with(mock_user)
-        mock_db.commit.assert_called_once()
\ No newline at end of file
+        mock_db.commit.assert_called_once()
+    def test_get_user_second_lookup_served_from_cache(self):
+        """Test a user is queried once and then served from lookup_cache."""
+        user_id = uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.merge.side_effect = lambda instance, load: instance
+        mock_db.query.return_value.filter.return_value.first.return_value = User(
+            id=user_id, email="a@example.com", password_hash="x",
+        )
+
+        user_service.get_user(mock_db, user_id)
+        result = user_service.get_user(mock_db, user_id)
+
+        assert result.email == "a@example.com"
+        mock_db.query.assert_called_once()
+
+    def test_delete_user_invalidates_user_and_memberships(self):
+        """Test deleting a user drops their cached row and memberships."""
+        user_id = uuid.uuid4()
+        mock_db = MagicMock()
+        mock_db.query.return_value.filter.return_value.first.return_value = MagicMock()
+
+        with patch("services.user_service.lookup_cache") as mock_cache:
+            mock_cache.get.return_value = None
+            user_service.delete_user(mock_db, user_id)
+
+        mock_cache.invalidate.assert_called_once_with(("user", user_id))
+        predicate = mock_cache.invalidate_where.call_args[0][0]
+        assert predicate(("member", uuid.uuid4(), user_id))
+        assert not predicate(("member", uuid.uuid4(), uuid.uuid4()))
@@ -0,0 +1,18 @@
+"""Tests that db/schema.sql and the ORM models declare the same indexes."""
+import re
+from pathlib import Path
+
+import pytest
+
+from db.models import Base
+
+pytestmark = pytest.mark.unit
+
+SCHEMA_SQL = Path(__file__).resolve().parents[2] / "db" / "schema.sql"
+
+
+def test_schema_sql_indexes_match_models():
+    """Test every CREATE INDEX in schema.sql is declared in __table_args__ and vice versa."""
+    in_sql = set(re.findall(r"CREATE INDEX (?:IF NOT EXISTS )?(\w+)", SCHEMA_SQL.read_text(), flags=re.I))
+    in_models = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    assert in_sql == in_models
@@ -0,0 +1,28 @@
+"""Tests for db/session.py — connection pool configuration and metrics."""
+import pytest
+
+from core.config import settings
+from db import session
+
+pytestmark = pytest.mark.unit
+
+
+class TestPool:
+    def test_engine_uses_pool_settings(self):
+        assert session.engine.pool.size() == settings.DB_POOL_SIZE
+        assert session.engine.pool._max_overflow == settings.DB_MAX_OVERFLOW
+        assert session.engine.pool._timeout == settings.DB_POOL_TIMEOUT_SECONDS
+
+    def test_pool_stats_idle(self):
+        stats = session.pool_stats()
+
+        assert stats["checked_out"] == 0
+        assert stats["overflow"] == 0
+        assert stats["utilization"] == 0.0
+        assert stats["pool_size"] == settings.DB_POOL_SIZE
+
+    def test_metrics_endpoint_returns_pool_stats(self, client):
+        response = client.get("/metrics/db-pool")
+
+        assert response.status_code == 200
+        assert set(response.json()) == set(session.pool_stats())
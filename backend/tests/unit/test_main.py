@@ -23,6 +23,10 @@ class TestLifespan:
             patch("main.run_seed_minio_only"),
             patch("main.threading.Thread", side_effect=_FakeThread),
             patch("main.preload_owlv2") as mock_preload,
+            patch("main.start_detection_workers"),
+            patch("main.stop_detection_workers"),
+            patch("main.start_purge_workers"),
+            patch("main.stop_purge_workers"),
         ):
             import main as app_main
             import asyncio
@@ -56,6 +60,10 @@ class TestLifespan:
             patch("main.run_seed_minio_only", side_effect=_seed),
             patch("main.threading.Thread", side_effect=_FakeThread),
             patch("main.preload_owlv2"),
+            patch("main.start_detection_workers"),
+            patch("main.stop_detection_workers"),
+            patch("main.start_purge_workers"),
+            patch("main.stop_purge_workers"),
         ):
             import main as app_main
             import asyncio
@@ -67,3 +75,25 @@ class TestLifespan:
             asyncio.run(_run())
 
         assert call_order == ["seed", "thread_start"]
+
+    def test_lifespan_starts_and_stops_detection_workers(self):
+        """Workers start after the seed/preload and are stopped on shutdown."""
+        call_order = []
+
+        with (
+            patch("main.run_seed_minio_only"),
+            patch("main.threading.Thread"),
+            patch("main.preload_owlv2"),
+            patch("main.start_detection_workers", side_effect=lambda: call_order.append("start")),
+            patch("main.stop_detection_workers", side_effect=lambda: call_order.append("stop")),
+        ):
+            import main as app_main
+            import asyncio
+
+            async def _run():
+                async with app_main.lifespan(app_main.app):
+                    call_order.append("serving")
+
+            asyncio.run(_run())
+
+        assert call_order == ["start", "serving", "stop"]
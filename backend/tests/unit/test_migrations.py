@@ -0,0 +1,78 @@
+"""Tests for the versioned migrations in db/migrations and the migrate.py runner."""
+import re
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import migrate
+
+pytestmark = pytest.mark.unit
+
+SCHEMA_SQL = Path(__file__).resolve().parents[2] / "db" / "schema.sql"
+
+
+def _engine():
+    engine = MagicMock()
+    connection = engine.begin.return_value.__enter__.return_value
+    return engine, connection
+
+
+def test_schema_sql_records_every_migration():
+    """A database created from schema.sql must not have any migration applied to it again."""
+    recorded = re.search(r"INSERT INTO schema_migrations \(version\) VALUES(.*?);", SCHEMA_SQL.read_text(), re.S)
+    assert re.findall(r"'(\w+)'", recorded.group(1)) == [path.stem for path in migrate.migrations()]
+
+
+def test_versions_are_unique_and_numbered_in_order():
+    numbers = [int(path.name[:4]) for path in migrate.migrations()]
+    assert numbers == list(range(1, len(numbers) + 1))
+
+
+def test_sql_migrations_can_rerun_on_a_migrated_schema():
+    """Databases that applied the changes by hand have no schema_migrations rows."""
+    for path in migrate.migrations():
+        if path.suffix != ".sql":
+            continue
+        sql = re.sub(r"--.*", "", path.read_text())
+        assert not re.search(r"ADD COLUMN (?!IF NOT EXISTS)", sql), path.name
+        assert not re.search(r"DROP (COLUMN|CONSTRAINT) (?!IF EXISTS)", sql), path.name
+        assert not re.search(r"CREATE INDEX (?!IF NOT EXISTS)", sql), path.name
+
+
+class TestUpgrade:
+
+    def test_applies_pending_migrations_in_order(self):
+        engine, connection = _engine()
+        versions = [path.stem for path in migrate.migrations()]
+
+        with (
+            patch("migrate.applied_versions", return_value=set(versions[:2])),
+            patch("migrate._run") as mock_run,
+        ):
+            applied = migrate.upgrade(engine)
+
+        assert applied == versions[2:]
+        assert [call.args[1].stem for call in mock_run.call_args_list] == versions[2:]
+        recorded = [call.args[1]["version"] for call in connection.execute.call_args_list]
+        assert recorded == versions[2:]
+
+    def test_up_to_date_database_runs_nothing(self):
+        engine, _ = _engine()
+
+        with (
+            patch("migrate.applied_versions", return_value={path.stem for path in migrate.migrations()}),
+            patch("migrate._run") as mock_run,
+        ):
+            assert migrate.upgrade(engine) == []
+
+        mock_run.assert_not_called()
+
+    def test_python_migration_upgrade_is_called(self):
+        connection = MagicMock()
+        path = next(path for path in migrate.migrations() if path.suffix == ".py")
+        connection.execute.return_value.first.return_value = None  # no annotated_image column left
+
+        migrate._run(connection, path)
+
+        connection.execute.assert_called_once()
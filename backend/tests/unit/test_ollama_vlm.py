@@ -1,22 +1,55 @@
 """Tests for ollama_vlm (VLM detection and response parsing)."""
 import base64
+import io
+import json
+import threading
+
+import httpx
 import pytest
+import requests
 from unittest.mock import MagicMock, patch
-from PIL import Image
+from PIL import ExifTags, Image
+from urllib3.exceptions import ReadTimeoutError
 
 from models.ollama_vlm import (
     _parse_pass_fail,
     _parse_defects_from_response,
     _is_continuation_line,
     _clean_description,
+    DetectionCancelled,
+    OLLAMA_TIMEOUT_SECONDS,
+    IncrementalDefectParser,
     get_mock_detection_response,
     OllamaVLM,
     get_model,
 )
+from utils.image_prep import prepare_image
 
 pytestmark = pytest.mark.unit
 
 
+def _encoded(img: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def _with_transport(vlm: OllamaVLM, handler) -> OllamaVLM:
+    """Route the model's async client through an in-memory httpx transport."""
+    vlm._async_client = httpx.AsyncClient(base_url=vlm.ollama_host, transport=httpx.MockTransport(handler))
+    return vlm
+
+
+def _ollama_handler(generate_body, requests_seen=None, generate_status=200):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests_seen is not None:
+            requests_seen.append(request)
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        return httpx.Response(generate_status, content=generate_body)
+    return handler
+
+
 class TestParsePassFail:
     def test_result_pass_lower(self):
         assert _parse_pass_fail("summary\nRESULT: PASS") == "pass"
@@ -101,7 +134,7 @@ class TestOllamaVLM:
         assert vlm.model_name == "custom:7b"
         assert vlm.ollama_host == "http://host:9999"
 
-    @patch("models.ollama_vlm.requests.get")
+    @patch("models.ollama_vlm.requests.Session.get")
     def test_load_model_success(self, mock_get):
         mock_get.return_value = MagicMock(status_code=200)
         vlm = OllamaVLM(model_name="test")
@@ -109,7 +142,7 @@ class TestOllamaVLM:
         assert result is True
         assert vlm.is_loaded is True
 
-    @patch("models.ollama_vlm.requests.get")
+    @patch("models.ollama_vlm.requests.Session.get")
     def test_load_model_connection_error(self, mock_get):
         import requests
         mock_get.side_effect = requests.exceptions.ConnectionError()
@@ -118,7 +151,7 @@ class TestOllamaVLM:
         assert result is False
         assert vlm.is_loaded is False
 
-    @patch("models.ollama_vlm.requests.get")
+    @patch("models.ollama_vlm.requests.Session.get")
     def test_load_model_non_200(self, mock_get):
         mock_get.return_value = MagicMock(status_code=500)
         vlm = OllamaVLM(model_name="test")
@@ -139,12 +172,56 @@ class TestOllamaVLM:
         assert "Specification" in prompt
 
     def test_image_to_base64(self):
-        vlm = OllamaVLM(model_name="test")
+        vlm = OllamaVLM(model_name="test", image_encoding="png")
         img = Image.new("RGB", (10, 10), color="red")
         b64 = vlm._image_to_base64(img)
         decoded = base64.b64decode(b64)
         assert decoded[:8] == b"\x89PNG\r\n\x1a\n"
 
+    def test_image_to_base64_jpeg(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="jpeg", jpeg_quality=80)
+        img = Image.new("RGB", (10, 10), color="red")
+        decoded = base64.b64decode(vlm._image_to_base64(img))
+        assert decoded[:3] == b"\xff\xd8\xff"
+
+    def test_passthrough_sends_original_bytes_when_unmodified(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="passthrough")
+        source = _encoded(Image.new("RGB", (10, 10), color="red"), "JPEG")
+        img = Image.open(io.BytesIO(source)).convert("RGB")
+        assert vlm._encode_image(img, source) == source
+
+    def test_passthrough_reencodes_resized_image_as_jpeg(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="passthrough")
+        source = _encoded(Image.new("RGB", (20, 20), color="red"), "PNG")
+        resized = Image.new("RGB", (10, 10), color="red")
+        encoded = vlm._encode_image(resized, source)
+        assert encoded != source
+        assert encoded[:3] == b"\xff\xd8\xff"
+
+    def test_passthrough_reencodes_when_mode_changed(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="passthrough")
+        source = _encoded(Image.new("RGBA", (10, 10), color="red"), "PNG")
+        converted = Image.open(io.BytesIO(source)).convert("RGB")
+        assert vlm._encode_image(converted, source) != source
+
+    def test_passthrough_reencodes_when_exif_orientation_applied(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="passthrough")
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = 3  # 180 degrees: same size after preparation
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10), color="red").save(buffer, format="JPEG", exif=exif)
+        source = buffer.getvalue()
+        assert vlm._encode_image(prepare_image(source), source) != source
+
+    def test_passthrough_without_source_bytes_uses_jpeg(self):
+        vlm = OllamaVLM(model_name="test", image_encoding="passthrough")
+        encoded = vlm._encode_image(Image.new("RGB", (10, 10)))
+        assert encoded[:3] == b"\xff\xd8\xff"
+
+    def test_unknown_image_encoding_rejected(self):
+        with pytest.raises(ValueError):
+            OllamaVLM(model_name="test", image_encoding="webp")
+
     def test_get_prompt_for_spec_with_spec(self):
         vlm = OllamaVLM(model_name="test")
         prompt = vlm.get_prompt_for_spec("My spec.")
@@ -157,8 +234,8 @@ class TestOllamaVLM:
         prompt2 = vlm.get_prompt_for_spec("   ")
         assert vlm._default_generic_prompt() == prompt2
 
-    @patch("models.ollama_vlm.requests.get")
-    @patch("models.ollama_vlm.requests.post")
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
     def test_detect_fod_success(self, mock_post, mock_get):
         mock_get.return_value = MagicMock(status_code=200)
         mock_post.return_value = MagicMock(
@@ -172,8 +249,8 @@ class TestOllamaVLM:
         assert resp.model == "test"
         assert resp.inference_time_ms >= 0
 
-    @patch("models.ollama_vlm.requests.get")
-    @patch("models.ollama_vlm.requests.post")
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
     def test_detect_fod_api_error_returns_fail(self, mock_post, mock_get):
         mock_get.return_value = MagicMock(status_code=200)
         mock_post.return_value = MagicMock(status_code=500)
@@ -185,6 +262,284 @@ class TestOllamaVLM:
         assert "500" in resp.response or "Error" in resp.response
 
 
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_detect_fod_reuses_pooled_session(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_post.return_value = MagicMock(status_code=200, json=lambda: {"response": "RESULT: PASS"})
+        vlm = OllamaVLM(model_name="test")
+        img = Image.new("RGB", (8, 8))
+        vlm.detect_fod(img)
+        vlm.detect_fod(img)
+        assert mock_get.call_count == 1
+        assert mock_post.call_count == 2
+        assert mock_post.call_args.kwargs["json"]["stream"] is False
+
+
+class TestCancellableDetectFod:
+
+    def _streaming_response(self, lines, status_code=200):
+        response = MagicMock(status_code=status_code)
+        response.__enter__.return_value = response
+        response.iter_lines.return_value = iter(lines)
+        return response
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_streams_and_assembles_the_answer(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_post.return_value = self._streaming_response([
+            b'{"response": "No defects. ", "done": false}',
+            b"",
+            b'{"response": "RESULT: PASS", "done": true}',
+        ])
+        vlm = OllamaVLM(model_name="test")
+
+        resp = vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=threading.Event())
+
+        assert resp.pass_fail == "pass"
+        assert resp.response == "No defects. RESULT: PASS"
+        assert mock_post.call_args.kwargs["json"]["stream"] is True
+        assert mock_post.call_args.kwargs["stream"] is True
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_cancel_closes_the_request_mid_answer(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        cancel = threading.Event()
+
+        def _lines():
+            yield b'{"response": "Looking", "done": false}'
+            cancel.set()
+            yield b'{"response": "...", "done": false}'
+            raise AssertionError("read past the cancellation")
+
+        response = self._streaming_response([])
+        response.iter_lines.return_value = _lines()
+        mock_post.return_value = response
+        vlm = OllamaVLM(model_name="test")
+
+        with pytest.raises(DetectionCancelled):
+            vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=cancel)
+
+        response.__exit__.assert_called_once()
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_already_cancelled_sends_nothing(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        cancel = threading.Event()
+        cancel.set()
+        vlm = OllamaVLM(model_name="test")
+
+        with pytest.raises(DetectionCancelled):
+            vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=cancel)
+
+        mock_post.assert_not_called()
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_answer_past_the_overall_timeout_raises_timeout(self, mock_post, mock_get):
+        """Tokens that keep coming do not extend the request past OLLAMA_TIMEOUT_SECONDS."""
+        mock_get.return_value = MagicMock(status_code=200)
+        response = self._streaming_response([
+            b'{"response": "Looking", "done": false}',
+            b'{"response": "...", "done": false}',
+        ])
+        mock_post.return_value = response
+        vlm = OllamaVLM(model_name="test")
+
+        clock = iter([0.0, 1.0, OLLAMA_TIMEOUT_SECONDS + 1.0])
+        with (
+            patch("models.ollama_vlm.time.monotonic", side_effect=lambda: next(clock)),
+            pytest.raises(requests.exceptions.Timeout),
+        ):
+            vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=threading.Event())
+
+        response.__exit__.assert_called_once()
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_read_timeout_mid_stream_raises_timeout(self, mock_post, mock_get):
+        """requests wraps a streaming read timeout in ConnectionError; it is reported as a Timeout."""
+        mock_get.return_value = MagicMock(status_code=200)
+
+        def _lines():
+            yield b'{"response": "Looking", "done": false}'
+            raise requests.exceptions.ConnectionError(ReadTimeoutError(None, None, "Read timed out."))
+
+        response = self._streaming_response([])
+        response.iter_lines.return_value = _lines()
+        mock_post.return_value = response
+        vlm = OllamaVLM(model_name="test")
+
+        with pytest.raises(requests.exceptions.Timeout):
+            vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=threading.Event())
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_other_connection_errors_propagate(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+
+        def _lines():
+            raise requests.exceptions.ConnectionError("connection reset")
+            yield  # pragma: no cover
+
+        response = self._streaming_response([])
+        response.iter_lines.return_value = _lines()
+        mock_post.return_value = response
+        vlm = OllamaVLM(model_name="test")
+
+        with pytest.raises(requests.exceptions.ConnectionError) as excinfo:
+            vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=threading.Event())
+        assert not isinstance(excinfo.value, requests.exceptions.Timeout)
+
+    @patch("models.ollama_vlm.requests.Session.get")
+    @patch("models.ollama_vlm.requests.Session.post")
+    def test_http_error_returns_fail(self, mock_post, mock_get):
+        mock_get.return_value = MagicMock(status_code=200)
+        mock_post.return_value = self._streaming_response([], status_code=500)
+        vlm = OllamaVLM(model_name="test")
+
+        resp = vlm.detect_fod(Image.new("RGB", (8, 8)), cancel=threading.Event())
+
+        assert resp.pass_fail == "fail"
+        assert "500" in resp.response
+
+
+class TestAsyncOllamaVLM:
+
+    @pytest.mark.asyncio
+    async def test_adetect_fod_success(self):
+        body = json.dumps({"response": "No defects. RESULT: PASS"}).encode()
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(body))
+        resp = await vlm.adetect_fod(Image.new("RGB", (32, 32), color="white"))
+        assert resp.pass_fail == "pass"
+        assert resp.model == "test"
+        assert vlm.is_loaded is True
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_adetect_fod_api_error_returns_fail(self):
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(b"", generate_status=500))
+        resp = await vlm.adetect_fod(Image.new("RGB", (32, 32)))
+        assert resp.pass_fail == "fail"
+        assert "500" in resp.response
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_adetect_fod_stream_assembles_tokens(self):
+        chunks = [
+            {"response": "FOD DETECTED:\n", "done": False},
+            {"response": "• bolt at (10%, 20%) — loose fastener\n", "done": False},
+            {"response": "RESULT: FAIL", "done": False},
+            {"response": "", "done": True},
+        ]
+        body = "\n".join(json.dumps(c) for c in chunks).encode()
+        seen = []
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(body, seen))
+        resp = await vlm.adetect_fod(Image.new("RGB", (32, 32)), stream=True)
+        assert resp.pass_fail == "fail"
+        assert resp.response.endswith("RESULT: FAIL")
+        assert len(resp.defects) == 1
+        generate = [r for r in seen if r.url.path == "/api/generate"][0]
+        assert json.loads(generate.content)["stream"] is True
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_astream_generate_raises_on_ollama_error(self):
+        body = json.dumps({"error": "model not found"}).encode()
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(body))
+        with pytest.raises(RuntimeError, match="model not found"):
+            async for _ in vlm.astream_generate("prompt", "aW1n"):
+                pass
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aload_model_connection_error(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+        vlm = _with_transport(OllamaVLM(model_name="test"), handler)
+        assert await vlm.aload_model() is False
+        assert vlm.is_loaded is False
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_async_client_is_reused_until_closed(self):
+        vlm = OllamaVLM(model_name="test")
+        client = vlm._get_async_client()
+        assert vlm._get_async_client() is client
+        await vlm.aclose()
+        assert client.is_closed
+        assert vlm._get_async_client() is not client
+        await vlm.aclose()
+
+
+class TestAstreamDetectFod:
+
+    @pytest.mark.asyncio
+    async def test_defect_event_precedes_result_line(self):
+        chunks = ["FOD DETECTED:\n• bo", "lt at (10%, 20%) — loose fastener\n", "RESULT:", " FAIL", ""]
+        body = "\n".join(json.dumps({"response": c, "done": not c}) for c in chunks).encode()
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(body))
+
+        events = [e async for e in vlm.astream_detect_fod(Image.new("RGB", (16, 16)))]
+        kinds = [kind for kind, _ in events]
+
+        assert kinds == ["token", "token", "defect", "token", "token", "result"]
+        assert events[2][1].description.startswith("bolt at (10%, 20%)")
+        result = events[-1][1]
+        assert result.pass_fail == "fail"
+        assert [d.description for d in result.defects] == [events[2][1].description]
+        await vlm.aclose()
+
+    @pytest.mark.asyncio
+    async def test_http_error_yields_failed_result(self):
+        vlm = _with_transport(OllamaVLM(model_name="test"), _ollama_handler(b"", generate_status=503))
+        events = [e async for e in vlm.astream_detect_fod(Image.new("RGB", (16, 16)))]
+        assert [kind for kind, _ in events] == ["result"]
+        assert "503" in events[0][1].response
+        await vlm.aclose()
+
+
+class TestIncrementalDefectParser:
+
+    RESPONSE = (
+        "Summary of the scene.\n"
+        "FOD DETECTED:\n"
+        "• Bolt at (10%, 20%) — loose fastener near intake\n"
+        "  - Location: left side\n"
+        "• Rag at (50%, 60%) — cloth debris on the panel\n"
+        "RESULT: FAIL"
+    )
+
+    def test_matches_batch_parser_for_any_chunking(self):
+        expected = _parse_defects_from_response(self.RESPONSE)
+        for size in (1, 3, 7, len(self.RESPONSE)):
+            parser = IncrementalDefectParser()
+            streamed = []
+            for i in range(0, len(self.RESPONSE), size):
+                streamed += parser.feed(self.RESPONSE[i:i + size])
+            streamed += parser.finish()
+            assert streamed == expected
+
+    def test_defect_emitted_only_when_line_complete(self):
+        parser = IncrementalDefectParser()
+        assert parser.feed("FOD DETECTED:\n• Bolt at (10%, 20%) — loose") == []
+        defects = parser.feed(" fastener\nRESU")
+        assert [d.id for d in defects] == ["DEF-001"]
+        assert defects[0].description.endswith("loose fastener")
+
+    def test_bullets_before_header_are_ignored(self):
+        parser = IncrementalDefectParser()
+        assert parser.feed("• just a note about the scene\n") == []
+
+    def test_finish_flushes_unterminated_bullet(self):
+        parser = IncrementalDefectParser()
+        parser.feed("FOD DETECTED:\n• Washer at (5%, 5%) — loose part")
+        assert [d.id for d in parser.finish()] == ["DEF-001"]
+
+
 class TestIsMetadataLine:
     """_is_continuation_line should detect metadata regardless of bullet prefix."""
 
@@ -12,11 +12,18 @@ from models.owlv2 import (
     build_queries_and_severity_map,
     image_to_base64,
     get_owlv2_detector,
+    get_owlv2_annotator,
     preload_owlv2,
     wait_for_owlv2,
     OWLv2Detector,
+    OWLv2BatchAnnotator,
+    _best_box_per_query,
+    draw_boxes,
     _SEVERITY_COLORS,
     _DEFAULT_COLOR,
+    FOD_FALLBACK_QUERIES,
+    build_fod_vocabulary,
+    match_queries_to_vocabulary,
 )
 from schemas.detection import DefectSchema
 
@@ -342,6 +349,154 @@ class TestOWLv2DetectorAnnotate:
         assert result is not img
 
 
+    def test_detect_batch_runs_one_pass_for_several_images(self):
+        """Two images share one processor/model call; each gets its own result."""
+        detector = _detector_with_mock_model()
+        mock_tensor = MagicMock()
+        mock_tensor.to.return_value = mock_tensor
+        detector._processor.return_value = {"input_ids": mock_tensor}
+        detector._processor.image_processor.post_process_object_detection.return_value = [
+            {
+                "boxes": MagicMock(tolist=lambda: [[1.0, 1.0, 9.0, 9.0]]),
+                "scores": MagicMock(tolist=lambda: [0.5]),
+                "labels": MagicMock(tolist=lambda: [0]),
+            },
+            {
+                "boxes": MagicMock(tolist=lambda: [[2.0, 2.0, 8.0, 8.0]]),
+                "scores": MagicMock(tolist=lambda: [0.7]),
+                "labels": MagicMock(tolist=lambda: [1]),
+            },
+        ]
+        with patch("torch.no_grad"), patch("torch.tensor") as mt:
+            mt.return_value = MagicMock()
+            results = detector.detect_batch(
+                [_rgb_image(), _rgb_image()],
+                [["bolt"], ["screw", "nut"]],
+            )
+
+        detector._processor.assert_called_once()
+        assert detector._processor.call_args.kwargs["text"] == [["bolt"], ["screw", "nut"]]
+        detector._model.assert_called_once()
+        assert results == [{0: (0.5, [1.0, 1.0, 9.0, 9.0])}, {1: (0.7, [2.0, 2.0, 8.0, 8.0])}]
+
+
+class TestBestBoxPerQuery:
+    def _result(self, boxes, scores, labels):
+        return {
+            "boxes": MagicMock(tolist=lambda: boxes),
+            "scores": MagicMock(tolist=lambda: scores),
+            "labels": MagicMock(tolist=lambda: labels),
+        }
+
+    def test_keeps_highest_score_per_label(self):
+        result = self._result([[0, 0, 1, 1], [0, 0, 2, 2]], [0.3, 0.9], [0, 0])
+        assert _best_box_per_query(result, 1) == {0: (0.9, [0, 0, 2, 2])}
+
+    def test_drops_padding_queries(self):
+        """Labels beyond this image's own queries come from batch padding and are ignored."""
+        result = self._result([[0, 0, 1, 1], [0, 0, 2, 2]], [0.8, 0.9], [0, 2])
+        assert _best_box_per_query(result, 1) == {0: (0.8, [0, 0, 1, 1])}
+
+
+class TestDrawBoxes:
+    def test_no_boxes_returns_original(self):
+        img = _rgb_image()
+        assert draw_boxes(img, {}) is img
+
+    def test_boxes_drawn_on_copy(self):
+        img = _rgb_image(50, 50)
+        result = draw_boxes(img, {0: (0.9, [5, 5, 40, 40])}, {0: "fod"})
+        assert result is not img
+        assert result.getpixel((5, 20)) == _SEVERITY_COLORS["fod"]
+        assert img.getpixel((5, 20)) == (200, 200, 200)
+
+
+class TestOWLv2BatchAnnotator:
+    def _detector(self):
+        detector = MagicMock()
+        detector.detect_batch.side_effect = lambda images, queries, threshold: [
+            {0: (0.9, [1, 1, 10, 10])} for _ in images
+        ]
+        return detector
+
+    def test_empty_queries_returns_original_image(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=4, max_wait_ms=10)
+        img = _rgb_image()
+        assert annotator.annotate(img, []) is img
+        detector.detect_batch.assert_not_called()
+
+    def test_batch_size_one_calls_detector_directly(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=1, max_wait_ms=10)
+        img = _rgb_image()
+        annotator.annotate(img, ["bolt"], {0: "fod"})
+        detector.annotate.assert_called_once_with(img, ["bolt"], {0: "fod"}, 0.1)
+
+    def test_concurrent_callers_share_one_forward_pass(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=3, max_wait_ms=2000)
+        images = [_rgb_image(20 + i, 20) for i in range(3)]
+        results = [None] * 3
+
+        def _call(i):
+            results[i] = annotator.annotate(images[i], [f"query {i}"], {0: "fod"})
+
+        threads = [threading.Thread(target=_call, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        detector.detect_batch.assert_called_once()
+        batch_images, batch_queries, _ = detector.detect_batch.call_args.args
+        assert len(batch_images) == 3
+        assert sorted(batch_queries) == [["query 0"], ["query 1"], ["query 2"]]
+        # Each caller gets an annotated copy of its own image
+        assert [r.size for r in results] == [img.size for img in images]
+
+    def test_wait_window_flushes_partial_batch(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=8, max_wait_ms=10)
+        result = annotator.annotate(_rgb_image(), ["bolt"])
+        assert result.size == (100, 100)
+        detector.detect_batch.assert_called_once()
+
+    def test_detector_error_is_raised_to_every_caller(self):
+        detector = MagicMock()
+        detector.detect_batch.side_effect = RuntimeError("oom")
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=2, max_wait_ms=10)
+        with pytest.raises(RuntimeError, match="oom"):
+            annotator.annotate(_rgb_image(), ["bolt"])
+
+    def test_detect_returns_raw_boxes_through_batcher(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=4, max_wait_ms=10)
+        assert annotator.detect(_rgb_image(), ["bolt"]) == {0: (0.9, [1, 1, 10, 10])}
+        detector.detect_batch.assert_called_once()
+
+    def test_detect_with_batch_size_one_calls_detector_directly(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=1, max_wait_ms=10)
+        img = _rgb_image()
+        assert annotator.detect(img, ["bolt"], 0.2) == {0: (0.9, [1, 1, 10, 10])}
+        detector.detect_batch.assert_called_once_with([img], [["bolt"]], 0.2)
+
+    def test_detect_without_queries_skips_model(self):
+        detector = self._detector()
+        annotator = OWLv2BatchAnnotator(detector, max_batch_size=4, max_wait_ms=10)
+        assert annotator.detect(_rgb_image(), []) == {}
+        detector.detect_batch.assert_not_called()
+
+    def test_get_owlv2_annotator_is_singleton(self):
+        owlv2_module._annotator = None
+        try:
+            assert get_owlv2_annotator() is get_owlv2_annotator()
+            assert get_owlv2_annotator().detector is get_owlv2_detector()
+        finally:
+            owlv2_module._annotator = None
+
+
 # ── Severity colour mapping ───────────────────────────────────────────────────
 
 class TestSeverityColors:
@@ -404,3 +559,47 @@ class TestPreloadAndWait:
                 preload_owlv2()
 
         assert cleared_during_load[0] is False  # event was clear while load ran
+
+
+# ── Speculative vocabulary ────────────────────────────────────────────────────
+
+class TestBuildFodVocabulary:
+    def test_past_defects_first_then_spec_terms_then_fallbacks(self):
+        vocabulary = build_fod_vocabulary(
+            "No loose bolts or rags may be left on the apron.",
+            ["Wrench near the wheel (20%, 30%)", "wrench on the tarmac", "Wrench near the wheel"],
+            max_terms=10,
+        )
+        assert vocabulary[0] == "wrench near the wheel"  # most frequent past defect
+        assert vocabulary.index("bolt") < vocabulary.index("foreign object")
+        assert "rag" in vocabulary
+        assert vocabulary[-len(FOD_FALLBACK_QUERIES):] == list(FOD_FALLBACK_QUERIES)
+
+    def test_spec_terms_match_whole_words_only(self):
+        vocabulary = build_fod_vocabulary("Inspect the capacitor and pinout.", [], max_terms=10)
+        assert "cap" not in vocabulary
+        assert "pin" not in vocabulary
+
+    def test_capped_but_keeps_fallbacks(self):
+        past = [f"object number {word}" for word in ("alpha", "bravo", "charlie", "delta", "echo")]
+        vocabulary = build_fod_vocabulary(None, past, max_terms=5)
+        assert len(vocabulary) == 5
+        assert vocabulary[-3:] == list(FOD_FALLBACK_QUERIES)
+
+    def test_no_spec_no_history_is_fallbacks(self):
+        assert build_fod_vocabulary(None, [], max_terms=10) == list(FOD_FALLBACK_QUERIES)
+
+
+class TestMatchQueriesToVocabulary:
+    def test_matches_by_shared_words_and_plurals(self):
+        vocabulary = ["bolt", "safety wire", "foreign object", "debris"]
+        matches = match_queries_to_vocabulary(["Bolts", "cut safety wires", "small metallic object"], vocabulary)
+        assert matches == {0: 0, 1: 1, 2: 2}
+
+    def test_prefers_more_shared_words_then_shorter_term(self):
+        vocabulary = ["wire", "safety wire", "wire near the gear"]
+        assert match_queries_to_vocabulary(["safety wire"], vocabulary) == {0: 1}
+        assert match_queries_to_vocabulary(["loose wire"], vocabulary) == {0: 0}
+
+    def test_stopwords_alone_do_not_match(self):
+        assert match_queries_to_vocabulary(["cable tie on the wing"], ["bolt on the runway"]) == {}
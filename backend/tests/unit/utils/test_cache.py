@@ -0,0 +1,83 @@
+"""Tests for utils.cache."""
+import pytest
+from unittest.mock import patch
+
+from utils.cache import LRUCache
+
+pytestmark = pytest.mark.unit
+
+
+class TestLRUCache:
+    def test_get_missing_returns_default(self):
+        cache = LRUCache(max_size=2)
+        assert cache.get("a") is None
+        assert cache.get("a", "fallback") == "fallback"
+
+    def test_put_then_get(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_size_cap_uses_sizeof(self):
+        cache = LRUCache(max_size=10, sizeof=len)
+        cache.put("a", "xxxxxx")
+        cache.put("b", "yyyyyy")
+        assert "a" not in cache
+        assert cache.size == 6
+
+    def test_value_larger_than_cap_is_not_stored(self):
+        cache = LRUCache(max_size=3, sizeof=len)
+        cache.put("a", "toolong")
+        assert "a" not in cache
+        assert cache.size == 0
+
+    def test_replacing_key_updates_size(self):
+        cache = LRUCache(max_size=10, sizeof=len)
+        cache.put("a", "xxxx")
+        cache.put("a", "yy")
+        assert cache.size == 2
+        assert cache.get("a") == "yy"
+
+    def test_pop_removes_entry(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+        assert len(cache) == 0
+
+    def test_discard_where(self):
+        cache = LRUCache(max_size=10)
+        cache.put(("p1", "x"), 1)
+        cache.put(("p1", "y"), 2)
+        cache.put(("p2", "x"), 3)
+        assert cache.discard_where(lambda key: key[0] == "p1") == 2
+        assert list(cache._entries) == [("p2", "x")]
+
+    def test_hit_and_miss_counters(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_entries_expire_after_ttl(self):
+        cache = LRUCache(max_size=2, ttl_seconds=30)
+        with patch("utils.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with patch("utils.cache.time.monotonic", return_value=129.0):
+            assert cache.get("a") == 1
+        with patch("utils.cache.time.monotonic", return_value=130.0):
+            assert "a" not in cache
+            assert cache.get("a") is None
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (1, 1)
@@ -1,4 +1,6 @@
 """Tests for utils.file_validation."""
+import io
+
 import pytest
 
 from utils.file_validation import (
@@ -11,6 +13,8 @@ from utils.file_validation import (
     is_jpeg,
     is_image,
     is_pdf,
+    SizeLimitedReader,
+    UploadTooLarge,
 )
 
 pytestmark = pytest.mark.unit
@@ -69,3 +73,16 @@ class TestConstants:
 
     def test_max_design_size(self):
         assert MAX_DESIGN_UPLOAD_BYTES == 20 * 1024 * 1024
+
+
+class TestSizeLimitedReader:
+    def test_reads_through_within_limit(self):
+        reader = SizeLimitedReader(io.BytesIO(b"abcdef"), max_bytes=6)
+        assert reader.read(4) + reader.read() == b"abcdef"
+        assert reader.bytes_read == 6
+
+    def test_raises_once_limit_exceeded(self):
+        reader = SizeLimitedReader(io.BytesIO(b"abcdefg"), max_bytes=6)
+        reader.read(4)
+        with pytest.raises(UploadTooLarge):
+            reader.read(4)
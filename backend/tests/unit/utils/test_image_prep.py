@@ -0,0 +1,102 @@
+"""Tests for utils.image_prep."""
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import ExifTags, Image
+
+from utils.image_prep import MAX_DIMENSION, prepare_image, target_size
+
+pytestmark = pytest.mark.unit
+
+
+def _encoded(image: Image.Image, fmt: str, orientation: int | None = None) -> bytes:
+    buffer = io.BytesIO()
+    kwargs = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        kwargs["exif"] = exif
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+class TestTargetSize:
+
+    @pytest.mark.parametrize("size, expected", [
+        ((800, 600), (800, 600)),
+        ((4000, 3000), (1024, 768)),
+        ((3000, 6000), (512, 1024)),
+        ((1024, 1024), (1024, 1024)),
+    ])
+    def test_longest_side_capped(self, size, expected):
+        assert target_size(size) == expected
+
+
+class TestPrepareImage:
+
+    def test_small_image_unchanged_size(self):
+        image = prepare_image(_encoded(Image.new("RGB", (300, 200), "red"), "PNG"))
+        assert image.size == (300, 200)
+        assert image.mode == "RGB"
+
+    def test_large_png_downscaled(self):
+        image = prepare_image(_encoded(Image.new("RGB", (3000, 1500), "blue"), "PNG"))
+        assert image.size == (MAX_DIMENSION, 512)
+
+    def test_converts_to_rgb(self):
+        image = prepare_image(_encoded(Image.new("RGBA", (50, 50), (0, 0, 255, 128)), "PNG"))
+        assert image.mode == "RGB"
+
+    def test_large_jpeg_uses_draft_decoding(self):
+        source = _encoded(Image.new("RGB", (4096, 2048), "green"), "JPEG")
+
+        with patch("PIL.JpegImagePlugin.JpegImageFile.draft", autospec=True, wraps=Image.Image.draft) as draft:
+            image = prepare_image(source)
+
+        draft.assert_called_once()
+        assert draft.call_args.args[1:] == ("RGB", (1024, 512))
+        assert image.size == (1024, 512)
+
+    def test_small_jpeg_is_not_drafted(self):
+        source = _encoded(Image.new("RGB", (640, 480), "green"), "JPEG")
+
+        with patch("PIL.JpegImagePlugin.JpegImageFile.draft") as draft:
+            prepare_image(source)
+
+        draft.assert_not_called()
+
+    def test_draft_decoding_keeps_content(self):
+        left_red = Image.new("RGB", (4000, 2000), "blue")
+        left_red.paste((255, 0, 0), (0, 0, 2000, 2000))
+
+        image = prepare_image(_encoded(left_red, "JPEG"))
+
+        red, _, blue = image.getpixel((100, 256))
+        assert red > 200 and blue < 50
+        red, _, blue = image.getpixel((900, 256))
+        assert blue > 200 and red < 50
+
+    def test_exif_rotation_swaps_dimensions(self):
+        source = _encoded(Image.new("RGB", (4000, 2000), "white"), "JPEG", orientation=6)
+
+        image = prepare_image(source)
+
+        assert image.size == (512, 1024)
+
+    def test_exif_flip_applied_to_small_image(self):
+        top_black = Image.new("RGB", (100, 100), "white")
+        top_black.paste((0, 0, 0), (0, 0, 100, 50))
+
+        image = prepare_image(_encoded(top_black, "JPEG", orientation=3))  # 180 degrees
+
+        assert image.getpixel((50, 10))[0] > 200
+        assert image.getpixel((50, 90))[0] < 50
+
+    def test_accepts_memoryview(self):
+        image = prepare_image(memoryview(_encoded(Image.new("RGB", (20, 10)), "PNG")))
+        assert image.size == (20, 10)
+
+    def test_invalid_bytes_raise(self):
+        with pytest.raises(Exception):
+            prepare_image(b"not an image")
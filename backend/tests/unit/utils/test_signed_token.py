@@ -0,0 +1,38 @@
+"""Tests for utils.signed_token."""
+import pytest
+from unittest.mock import patch
+
+from utils import signed_token
+
+pytestmark = pytest.mark.unit
+
+SECRET = "test-secret"
+
+
+class TestSignedToken:
+    def test_round_trip(self):
+        token = signed_token.sign({"object_name": "images/a.png"}, SECRET, expires_in=60)
+        assert signed_token.verify(token, SECRET)["object_name"] == "images/a.png"
+
+    def test_wrong_secret_rejected(self):
+        token = signed_token.sign({"a": 1}, SECRET, expires_in=60)
+        with pytest.raises(signed_token.InvalidToken):
+            signed_token.verify(token, "other-secret")
+
+    def test_tampered_payload_rejected(self):
+        token = signed_token.sign({"a": 1}, SECRET, expires_in=60)
+        forged = signed_token.sign({"a": 2}, SECRET, expires_in=60).split(".")[0] + "." + token.split(".")[1]
+        with pytest.raises(signed_token.InvalidToken):
+            signed_token.verify(forged, SECRET)
+
+    def test_expired_rejected(self):
+        with patch("utils.signed_token.time.time", return_value=1000.0):
+            token = signed_token.sign({"a": 1}, SECRET, expires_in=60)
+        with patch("utils.signed_token.time.time", return_value=1061.0):
+            with pytest.raises(signed_token.InvalidToken):
+                signed_token.verify(token, SECRET)
+
+    @pytest.mark.parametrize("token", ["", "no-dot", ".abc", "!!!.deadbeef"])
+    def test_malformed_rejected(self, token):
+        with pytest.raises(signed_token.InvalidToken):
+            signed_token.verify(token, SECRET)
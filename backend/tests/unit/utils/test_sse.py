@@ -0,0 +1,25 @@
+"""Tests for utils.sse."""
+import json
+
+import pytest
+
+from schemas.detection import DefectSchema
+from utils.sse import format_sse
+
+pytestmark = pytest.mark.unit
+
+
+class TestFormatSse:
+
+    def test_dict_payload(self):
+        assert format_sse("token", {"text": "hi"}) == 'event: token\ndata: {"text": "hi"}\n\n'
+
+    def test_pydantic_payload_is_dumped(self):
+        message = format_sse("defect", DefectSchema(id="DEF-001", severity="fod", description="bolt"))
+        event, data, *_ = message.split("\n")
+        assert event == "event: defect"
+        assert json.loads(data.removeprefix("data: ")) == {"id": "DEF-001", "severity": "fod", "description": "bolt"}
+
+    def test_newlines_in_text_stay_on_one_data_line(self):
+        message = format_sse("token", {"text": "a\nb"})
+        assert message.count("\n") == 3
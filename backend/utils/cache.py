@@ -0,0 +1,95 @@
+"""In-process caches shared by services (thread-safe, size-capped)."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    Least-recently-used cache capped by total size.
+
+    `sizeof` measures each value (default: every entry counts as 1, so max_size
+    is an entry count). Inserting past the cap evicts the oldest entries first.
+    A single value larger than the whole cap is not stored. With `ttl_seconds`,
+    entries also expire that long after they were stored.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        sizeof: Callable[[Any], int] | None = None,
+        ttl_seconds: float | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof or (lambda _value: 1)
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_size:
+                return
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+            self._entries[key] = (value, size, expires_at)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry[0]
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches predicate. Returns the number removed."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def _remove(self, key: Hashable) -> tuple[Any, int, float] | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+        return entry
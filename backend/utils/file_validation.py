@@ -24,3 +24,26 @@ def is_image(data: bytes) -> bool:
 
 def is_pdf(data: bytes) -> bool:
     return len(data) >= len(PDF_MAGIC) and data[: len(PDF_MAGIC)] == PDF_MAGIC
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class SizeLimitedReader:
+    """
+    Read-only file wrapper that enforces a size limit while the data streams.
+    Raises UploadTooLarge as soon as more than max_bytes have been read.
+    """
+
+    def __init__(self, stream, max_bytes: int):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        if self.bytes_read > self._max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self._max_bytes} bytes")
+        return data
@@ -0,0 +1,39 @@
+"""Compact HMAC-SHA256 signed tokens with an expiry: "<base64url JSON payload>.<hex signature>"."""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Any
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _signature(encoded: str, secret: str) -> str:
+    return hmac.new(secret.encode("utf-8"), encoded.encode("ascii"), hashlib.sha256).hexdigest()
+
+
+def sign(payload: dict[str, Any], secret: str, expires_in: int) -> str:
+    """Sign payload (JSON-serialisable) so it verifies for expires_in seconds."""
+    body = dict(payload, exp=int(time.time()) + expires_in)
+    raw = json.dumps(body, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    encoded = base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    return f"{encoded}.{_signature(encoded, secret)}"
+
+
+def verify(token: str, secret: str) -> dict[str, Any]:
+    """Return the payload of a token signed with secret. Raises InvalidToken if forged or expired."""
+    encoded, _, signature = token.rpartition(".")
+    if not encoded or not hmac.compare_digest(signature, _signature(encoded, secret)):
+        raise InvalidToken("Bad token signature")
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidToken("Malformed token") from exc
+    if not isinstance(payload, dict) or payload.get("exp", 0) < time.time():
+        raise InvalidToken("Token expired")
+    return payload
@@ -0,0 +1,19 @@
+"""Server-Sent Events helpers for streaming endpoints."""
+
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+# Disable proxy buffering and caching so events reach the browser as they are produced.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one SSE message; data is serialised as JSON (pydantic models via model_dump)."""
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
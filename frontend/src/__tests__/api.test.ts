@@ -31,6 +31,7 @@ function mockFetch(body: unknown, ok = true, status = 200): void {
         vi.fn().mockResolvedValue({
             ok,
             status,
+            headers: new Headers(),
             json: () => Promise.resolve(body),
         }),
     );
@@ -209,21 +210,38 @@ describe("getImageUrl", () => {
 // ---------------------------------------------------------------------------
 
 describe("listSubmissions", () => {
-    it("returns array of submissions", async () => {
+    it("returns the first page of submissions", async () => {
         const submissions = [{ id: "s1", project_id: "p1" }];
         mockFetch(submissions);
-        await expect(listSubmissions("p1")).resolves.toEqual(submissions);
+        await expect(listSubmissions("p1")).resolves.toEqual({ submissions, nextCursor: null });
     });
 
     it("returns empty array when response is not an array", async () => {
         mockFetch({});
-        await expect(listSubmissions("p1")).resolves.toEqual([]);
+        await expect(listSubmissions("p1")).resolves.toEqual({ submissions: [], nextCursor: null });
     });
 
     it("throws on non-ok response", async () => {
         mockFetch({ detail: "Project not found" }, false, 404);
         await expect(listSubmissions("missing")).rejects.toThrow("Project not found");
     });
+
+    it("fetches a single page and returns the cursor of the next one", async () => {
+        const fetchMock = vi.fn().mockResolvedValue({
+            ok: true,
+            status: 200,
+            headers: new Headers({ "X-Next-Cursor": "c2" }),
+            json: () => Promise.resolve([{ id: "s3" }]),
+        });
+        vi.stubGlobal("fetch", fetchMock);
+
+        const page = await listSubmissions("p1", "c1");
+
+        expect(page.submissions.map((s) => s.id)).toEqual(["s3"]);
+        expect(page.nextCursor).toBe("c2");
+        expect(fetchMock).toHaveBeenCalledOnce();
+        expect(fetchMock.mock.calls[0][0]).toContain("cursor=c1");
+    });
 });
 
 describe("listAnomalies", () => {
@@ -1,11 +1,12 @@
 import { act, renderHook } from "@testing-library/react";
 import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
 import { useInspectionHistory, SUBMISSION_UPLOADED_EVENT, type StatusChangeEvent } from "@/hooks/useInspectionHistory";
-import type { ApiSubmission } from "@/lib/api";
+import type { ApiSubmission, SubmissionPage } from "@/lib/api";
 
 vi.mock("@/lib/api", () => ({
     listSubmissions: vi.fn(),
     getImageUrl: vi.fn().mockResolvedValue("http://example.com/img.png"),
+    submissionEventsUrl: (projectId: string) => `http://api/projects/${projectId}/submissions/events`,
 }));
 
 import { listSubmissions } from "@/lib/api";
@@ -26,6 +27,11 @@ function makeSubmission(overrides: Partial<ApiSubmission> = {}): ApiSubmission {
     };
 }
 
+/** A page of a project's submissions, as listSubmissions returns it. */
+function page(submissions: ApiSubmission[], nextCursor: string | null = null): SubmissionPage {
+    return { submissions, nextCursor };
+}
+
 /**
  * Flush the first poll: runs all pending timers and awaits their async callbacks.
  * This resolves the initial `refresh()` call triggered by useEffect.
@@ -53,7 +59,7 @@ describe("useInspectionHistory — status transition detection", () => {
 
     it("does NOT fire onStatusChange on the initial load for existing submissions", async () => {
         const onStatusChange = vi.fn();
-        mockListSubmissions.mockResolvedValue([makeSubmission({ status: "complete" })]);
+        mockListSubmissions.mockResolvedValue(page([makeSubmission({ status: "complete" })]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();
@@ -65,8 +71,8 @@ describe("useInspectionHistory — status transition detection", () => {
     it("fires onStatusChange when status transitions running → complete", async () => {
         const onStatusChange = vi.fn();
         mockListSubmissions
-            .mockResolvedValueOnce([makeSubmission({ status: "running" })])
-            .mockResolvedValueOnce([makeSubmission({ status: "complete", pass_fail: "pass" })]);
+            .mockResolvedValueOnce(page([makeSubmission({ status: "running" })]))
+            .mockResolvedValueOnce(page([makeSubmission({ status: "complete", pass_fail: "pass" })]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();  // first poll: status=running, no callback, schedules 3s timer
@@ -82,8 +88,8 @@ describe("useInspectionHistory — status transition detection", () => {
     it("fires onStatusChange when status transitions running → failed", async () => {
         const onStatusChange = vi.fn();
         mockListSubmissions
-            .mockResolvedValueOnce([makeSubmission({ status: "running" })])
-            .mockResolvedValueOnce([makeSubmission({ status: "failed", pass_fail: "fail" })]);
+            .mockResolvedValueOnce(page([makeSubmission({ status: "running" })]))
+            .mockResolvedValueOnce(page([makeSubmission({ status: "failed", pass_fail: "fail" })]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();
@@ -97,8 +103,8 @@ describe("useInspectionHistory — status transition detection", () => {
     it("fires onStatusChange when status transitions running → error", async () => {
         const onStatusChange = vi.fn();
         mockListSubmissions
-            .mockResolvedValueOnce([makeSubmission({ status: "running" })])
-            .mockResolvedValueOnce([makeSubmission({ status: "error" })]);
+            .mockResolvedValueOnce(page([makeSubmission({ status: "running" })]))
+            .mockResolvedValueOnce(page([makeSubmission({ status: "error" })]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();
@@ -112,8 +118,8 @@ describe("useInspectionHistory — status transition detection", () => {
     it("fires onStatusChange when status transitions running → timeout", async () => {
         const onStatusChange = vi.fn();
         mockListSubmissions
-            .mockResolvedValueOnce([makeSubmission({ status: "running" })])
-            .mockResolvedValueOnce([makeSubmission({ status: "timeout" })]);
+            .mockResolvedValueOnce(page([makeSubmission({ status: "running" })]))
+            .mockResolvedValueOnce(page([makeSubmission({ status: "timeout" })]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();
@@ -130,8 +136,8 @@ describe("useInspectionHistory — status transition detection", () => {
         const newSub = makeSubmission({ id: "sub-2", status: "queued" });
 
         mockListSubmissions
-            .mockResolvedValueOnce([existingSub])
-            .mockResolvedValueOnce([existingSub, newSub]);
+            .mockResolvedValueOnce(page([existingSub]))
+            .mockResolvedValueOnce(page([existingSub, newSub]));
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();  // populates prevStatuses with sub-1=running
@@ -149,8 +155,8 @@ describe("useInspectionHistory — status transition detection", () => {
         const onStatusChange = vi.fn();
         const running = makeSubmission({ status: "running" });
         mockListSubmissions
-            .mockResolvedValueOnce([running])
-            .mockResolvedValueOnce([running]); // same status
+            .mockResolvedValueOnce(page([running]))
+            .mockResolvedValueOnce(page([running])); // same status
 
         renderHook(() => useInspectionHistory("proj-1", onStatusChange));
         await flushFirstPoll();
@@ -160,7 +166,7 @@ describe("useInspectionHistory — status transition detection", () => {
     });
 
     it("stops polling when no active submissions remain", async () => {
-        mockListSubmissions.mockResolvedValue([makeSubmission({ status: "complete" })]);
+        mockListSubmissions.mockResolvedValue(page([makeSubmission({ status: "complete" })]));
 
         renderHook(() => useInspectionHistory("proj-1"));
         await flushFirstPoll(); // returns complete, no timer scheduled
@@ -173,7 +179,7 @@ describe("useInspectionHistory — status transition detection", () => {
     });
 
     it("resumes polling when SUBMISSION_UPLOADED_EVENT is dispatched", async () => {
-        mockListSubmissions.mockResolvedValue([makeSubmission({ status: "complete" })]);
+        mockListSubmissions.mockResolvedValue(page([makeSubmission({ status: "complete" })]));
 
         renderHook(() => useInspectionHistory("proj-1"));
         await flushFirstPoll(); // first poll
@@ -187,3 +193,228 @@ describe("useInspectionHistory — status transition detection", () => {
         expect(mockListSubmissions).toHaveBeenCalledTimes(2);
     });
 });
+
+describe("useInspectionHistory — pagination", () => {
+    beforeEach(() => {
+        vi.useFakeTimers();
+        mockListSubmissions.mockReset();
+    });
+
+    afterEach(() => {
+        vi.useRealTimers();
+    });
+
+    const newer = makeSubmission({ id: "sub-2", status: "complete", submitted_at: "2026-01-02T00:00:00Z" });
+    const older = makeSubmission({ id: "sub-1", status: "complete", submitted_at: "2026-01-01T00:00:00Z" });
+
+    it("fetches only the first page", async () => {
+        mockListSubmissions.mockResolvedValue(page([newer], "c1"));
+
+        const { result } = renderHook(() => useInspectionHistory("proj-1"));
+        await flushFirstPoll();
+
+        expect(mockListSubmissions).toHaveBeenCalledOnce();
+        expect(mockListSubmissions).toHaveBeenCalledWith("proj-1");
+        expect(result.current.submissions.map((s) => s.id)).toEqual(["sub-2"]);
+        expect(result.current.hasMore).toBe(true);
+    });
+
+    it("loadMore appends the next page", async () => {
+        mockListSubmissions.mockResolvedValueOnce(page([newer], "c1")).mockResolvedValueOnce(page([older]));
+
+        const { result } = renderHook(() => useInspectionHistory("proj-1"));
+        await flushFirstPoll();
+        await act(async () => {
+            await result.current.loadMore();
+        });
+
+        expect(mockListSubmissions).toHaveBeenLastCalledWith("proj-1", "c1");
+        expect(result.current.submissions.map((s) => s.id)).toEqual(["sub-2", "sub-1"]);
+        expect(result.current.hasMore).toBe(false);
+    });
+
+    it("refresh re-fetches the first page and keeps the older pages loaded", async () => {
+        const newest = makeSubmission({ id: "sub-3", status: "queued", submitted_at: "2026-01-03T00:00:00Z" });
+        const onStatusChange = vi.fn();
+        mockListSubmissions
+            .mockResolvedValueOnce(page([newer], "c1"))
+            .mockResolvedValueOnce(page([older], "c2"))
+            .mockResolvedValueOnce(page([newest], "c3"));
+
+        const { result } = renderHook(() => useInspectionHistory("proj-1", onStatusChange));
+        await flushFirstPoll();
+        await act(async () => {
+            await result.current.loadMore();
+        });
+        await act(async () => {
+            await result.current.refresh();
+        });
+
+        expect(mockListSubmissions).toHaveBeenLastCalledWith("proj-1");
+        expect(result.current.submissions.map((s) => s.id)).toEqual(["sub-3", "sub-2", "sub-1"]);
+        expect(onStatusChange).toHaveBeenCalledOnce();  // only the new submission, not the older pages
+        expect(result.current.hasMore).toBe(true);
+    });
+});
+
+/** Minimal EventSource stand-in: tests emit named events on the latest instance. */
+class FakeEventSource {
+    static latest: FakeEventSource | undefined;
+    listeners: Record<string, ((e: MessageEvent<string>) => void)[]> = {};
+    onerror: (() => void) | null = null;
+    closed = false;
+
+    constructor(public url: string) {
+        FakeEventSource.latest = this;
+    }
+
+    addEventListener(type: string, listener: (e: MessageEvent<string>) => void) {
+        (this.listeners[type] ??= []).push(listener);
+    }
+
+    emit(type: string, data: unknown) {
+        const event = new MessageEvent<string>(type, { data: JSON.stringify(data) });
+        for (const listener of this.listeners[type] ?? []) listener(event);
+    }
+
+    close() {
+        this.closed = true;
+    }
+}
+
+/** Resolve the initial refresh() without firing the 3s poll timer it may schedule. */
+async function flushInitialLoad() {
+    await act(async () => {
+        await vi.advanceTimersByTimeAsync(0);
+    });
+}
+
+describe("useInspectionHistory — submission event stream", () => {
+    beforeEach(() => {
+        vi.useFakeTimers();
+        mockListSubmissions.mockReset();
+        vi.stubGlobal("EventSource", FakeEventSource);
+    });
+
+    afterEach(() => {
+        vi.unstubAllGlobals();
+        vi.useRealTimers();
+    });
+
+    it("subscribes to the project's event stream", async () => {
+        mockListSubmissions.mockResolvedValue(page([]));
+
+        renderHook(() => useInspectionHistory("proj-1"));
+        await flushInitialLoad();
+
+        expect(FakeEventSource.latest?.url).toBe("http://api/projects/proj-1/submissions/events");
+    });
+
+    it("applies pushed status changes without re-fetching the list", async () => {
+        const onStatusChange = vi.fn();
+        mockListSubmissions.mockResolvedValue(page([makeSubmission({ status: "running" })]));
+
+        const { result } = renderHook(() => useInspectionHistory("proj-1", onStatusChange));
+        await flushInitialLoad();
+
+        await act(async () => {
+            FakeEventSource.latest!.emit("ready", { project_id: "proj-1" });
+            FakeEventSource.latest!.emit("submission", {
+                submission_id: "sub-1",
+                project_id: "proj-1",
+                status: "complete",
+                pass_fail: "pass",
+                anomaly_count: 0,
+                error_message: null,
+            });
+        });
+        await flushInitialLoad();  // not runAllTimers: the reconcile timer re-arms itself
+
+        expect(mockListSubmissions).toHaveBeenCalledTimes(1);
+        expect(result.current.submissions[0].status).toBe("complete");
+        const event: StatusChangeEvent = onStatusChange.mock.calls[0][0];
+        expect(event.previousStatus).toBe("running");
+        expect(event.currentStatus).toBe("complete");
+    });
+
+    it("does not poll while the stream is connected", async () => {
+        mockListSubmissions.mockResolvedValue(page([makeSubmission({ status: "running" })]));
+
+        renderHook(() => useInspectionHistory("proj-1"));
+        await flushInitialLoad();
+        await act(async () => {
+            FakeEventSource.latest!.emit("ready", { project_id: "proj-1" });
+        });
+
+        await act(async () => {
+            vi.advanceTimersByTime(10_000);
+        });
+        expect(mockListSubmissions).toHaveBeenCalledTimes(1);
+    });
+
+    it("reconciles with the list every 30 seconds while the stream is connected", async () => {
+        const onStatusChange = vi.fn();
+        mockListSubmissions
+            .mockResolvedValueOnce(page([makeSubmission({ status: "running" })]))
+            .mockResolvedValue(page([makeSubmission({ status: "complete", pass_fail: "pass" })]));
+
+        renderHook(() => useInspectionHistory("proj-1", onStatusChange));
+        await flushInitialLoad();
+        await act(async () => {
+            FakeEventSource.latest!.emit("ready", { project_id: "proj-1" });
+        });
+
+        // Finished on another replica: no event arrives, the reconcile picks it up
+        await act(async () => {
+            await vi.advanceTimersByTimeAsync(30_000);
+        });
+        expect(mockListSubmissions).toHaveBeenCalledTimes(2);
+        expect(onStatusChange.mock.calls[0][0].currentStatus).toBe("complete");
+
+        await act(async () => {
+            await vi.advanceTimersByTimeAsync(30_000);
+        });
+        expect(mockListSubmissions).toHaveBeenCalledTimes(3);
+    });
+
+    it("coalesces refreshes for a burst of unknown submissions", async () => {
+        let resolveList: (value: SubmissionPage) => void = () => {};
+        mockListSubmissions.mockResolvedValueOnce(page([]));
+        mockListSubmissions.mockImplementation(
+            () => new Promise<SubmissionPage>((resolve) => { resolveList = resolve; }),
+        );
+
+        renderHook(() => useInspectionHistory("proj-1"));
+        await flushInitialLoad();
+        await act(async () => {
+            FakeEventSource.latest!.emit("ready", { project_id: "proj-1" });
+            for (let i = 0; i < 500; i++) {
+                FakeEventSource.latest!.emit("submission", {
+                    submission_id: `new-${i}`,
+                    project_id: "proj-1",
+                    status: "queued",
+                    pass_fail: null,
+                    anomaly_count: null,
+                    error_message: null,
+                });
+            }
+        });
+        expect(mockListSubmissions).toHaveBeenCalledTimes(2);  // initial load + one in flight
+
+        await act(async () => {
+            resolveList(page([]));
+            await vi.advanceTimersByTimeAsync(0);
+        });
+        expect(mockListSubmissions).toHaveBeenCalledTimes(3);  // one more for the rest of the burst
+    });
+
+    it("closes the stream on unmount", async () => {
+        mockListSubmissions.mockResolvedValue(page([]));
+
+        const { unmount } = renderHook(() => useInspectionHistory("proj-1"));
+        await flushInitialLoad();
+        unmount();
+
+        expect(FakeEventSource.latest?.closed).toBe(true);
+    });
+});
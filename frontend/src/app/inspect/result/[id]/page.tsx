@@ -76,6 +76,7 @@ function buildResultFromApi(
     anomalies: Awaited<ReturnType<typeof listAnomalies>>,
     currentProject: { id: string; name: string; designSpecs?: string[] },
     imageUrl: string,
+    annotatedImageUrl: string,
 ): InspectionResult {
     const photoName = sub.image_id.split("/").pop() ?? "image.png";
     const defects: Defect[] = anomalies.map((a) => ({
@@ -111,7 +112,7 @@ function buildResultFromApi(
         status: submissionStatus,
         defects,
         analysis: submissionAnalysis,
-        annotatedImage: sub.annotated_image ?? undefined,
+        annotatedImageUrl: annotatedImageUrl || undefined,
     };
     const inspectionResult: InspectionResult = {
         id: `api-${sub.id}`,
@@ -129,6 +130,19 @@ function buildResultFromApi(
     return inspectionResult;
 }
 
+/** Resolve presigned URLs for the source and annotated images, then build the result. */
+async function loadResultFromApi(
+    sub: ApiSubmission,
+    anomalies: Awaited<ReturnType<typeof listAnomalies>>,
+    currentProject: { id: string; name: string; designSpecs?: string[] },
+): Promise<InspectionResult> {
+    const [imageUrl, annotatedImageUrl] = await Promise.all([
+        getImageUrl(sub.image_id).catch(() => ""),
+        sub.annotated_image_key ? getImageUrl(sub.annotated_image_key).catch(() => "") : Promise.resolve(""),
+    ]);
+    return buildResultFromApi(sub, anomalies, currentProject, imageUrl, annotatedImageUrl);
+}
+
 export default function InspectResultPage() {
     const params = useParams();
     const router = useRouter();
@@ -176,13 +190,7 @@ export default function InspectResultPage() {
                         setNotFound(true);
                         return;
                     }
-                    let imageUrl = "";
-                    try {
-                        imageUrl = await getImageUrl(sub.image_id);
-                    } catch {
-                        /* ignore */
-                    }
-                    setResult(buildResultFromApi(sub, anomalies ?? [], currentProject, imageUrl));
+                    setResult(await loadResultFromApi(sub, anomalies ?? [], currentProject));
                 })
                 .catch(() => setNotFound(true));
             return;
@@ -226,25 +234,11 @@ export default function InspectResultPage() {
                 ]);
                 if (!sub || !API_SUBMISSION_RUNNING_STATUSES.has(sub.status)) {
                     if (sub) {
-                        let imageUrl = "";
-                        try {
-                            imageUrl = await getImageUrl(sub.image_id);
-                        } catch {
-                            /* ignore */
-                        }
-                        setResult(
-                            buildResultFromApi(sub, anomalies ?? [], currentProject, imageUrl),
-                        );
+                        setResult(await loadResultFromApi(sub, anomalies ?? [], currentProject));
                     }
                     return true;
                 }
-                let imageUrl = "";
-                try {
-                    imageUrl = await getImageUrl(sub.image_id);
-                } catch {
-                    /* ignore */
-                }
-                setResult(buildResultFromApi(sub, anomalies ?? [], currentProject, imageUrl));
+                setResult(await loadResultFromApi(sub, anomalies ?? [], currentProject));
             } catch {
                 // ignore
             }
@@ -605,11 +599,14 @@ export default function InspectResultPage() {
                                     <h3 className="text-lg font-semibold text-slate-900 dark:text-white mb-4">
                                         Product Image
                                     </h3>
-                                    {submission.annotatedImage ? (
+                                    {submission.annotatedImageUrl || submission.annotatedImage ? (
                                         <div className="space-y-3">
                                             <div className="relative bg-slate-100 dark:bg-zinc-800 rounded-lg overflow-hidden border border-blue-300 dark:border-blue-600 min-w-0 print-report-image">
                                                 <img
-                                                    src={`data:image/png;base64,${submission.annotatedImage}`}
+                                                    src={
+                                                        submission.annotatedImageUrl ??
+                                                        `data:image/png;base64,${submission.annotatedImage}`
+                                                    }
                                                     alt={`Annotated product ${submissionIndex + 1} with bounding boxes`}
                                                     className="w-full max-w-full h-auto object-contain"
                                                 />
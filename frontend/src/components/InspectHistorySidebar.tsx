@@ -75,7 +75,7 @@ export default function InspectHistorySidebar() {
         [addToast],
     );
 
-    const { submissions, imageUrls } = useInspectionHistory(
+    const { submissions, imageUrls, hasMore, loadMore } = useInspectionHistory(
         currentProject?.id ?? undefined,
         handleStatusChange,
     );
@@ -150,6 +150,15 @@ export default function InspectHistorySidebar() {
                         );
                     })
                 )}
+                {hasMore && (
+                    <button
+                        type="button"
+                        onClick={() => void loadMore()}
+                        className="w-full py-2 text-sm text-slate-600 dark:text-zinc-400 hover:text-slate-900 dark:hover:text-white transition-colors"
+                    >
+                        Load more
+                    </button>
+                )}
             </div>
         </aside>
     );
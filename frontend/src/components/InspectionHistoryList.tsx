@@ -21,6 +21,8 @@ type Props = {
     /** Optional: require a project to be selected before showing list (sidebar shows empty when no project). */
     requireProject?: boolean;
     currentProjectId?: string | null;
+    /** Optional: shows a "Load more" button at the end of the list (older pages are fetched on demand). */
+    onLoadMore?: () => void;
 };
 
 export function InspectionHistoryList({
@@ -30,6 +32,7 @@ export function InspectionHistoryList({
     emptyMessage = "No inspections yet",
     requireProject = false,
     currentProjectId = null,
+    onLoadMore,
 }: Readonly<Props>) {
     const showEmpty = requireProject ? !currentProjectId || items.length === 0 : items.length === 0;
 
@@ -102,6 +105,15 @@ export function InspectionHistoryList({
                             </button>
                         ))
                     )}
+                    {onLoadMore && !showEmpty && (
+                        <button
+                            type="button"
+                            onClick={onLoadMore}
+                            className="w-full py-2 text-sm text-slate-600 dark:text-zinc-400 hover:text-slate-900 dark:hover:text-white transition-colors"
+                        >
+                            Load more
+                        </button>
+                    )}
                 </div>
             </div>
         </>
@@ -19,7 +19,7 @@ function submissionToHistoryItem(sub: ApiSubmission, imageUrls: Record<string, s
 export default function Sidebar() {
     const router = useRouter();
     const { currentProject } = useApp();
-    const { submissions, imageUrls } = useInspectionHistory(currentProject?.id ?? undefined);
+    const { submissions, imageUrls, hasMore, loadMore } = useInspectionHistory(currentProject?.id ?? undefined);
     const completedSubs = submissions.filter(s => s.status !== "queued" && s.status !== "running");
     const items = completedSubs.map(s => submissionToHistoryItem(s, imageUrls));
 
@@ -31,6 +31,7 @@ export default function Sidebar() {
                 onViewItem={(id) => router.push(`/inspect/result/${id}`)}
                 requireProject
                 currentProjectId={currentProject?.id}
+                onLoadMore={hasMore ? () => void loadMore() : undefined}
             />
         </aside>
     );
@@ -2,20 +2,40 @@
 
 /**
  * Hook for inspection/submission history, sourced entirely from the backend API.
- * Polls every 3 seconds while any submissions are queued or running.
+ * Only the newest page of submissions is fetched (and re-fetched on refresh); older pages
+ * are loaded on demand with loadMore() and kept across refreshes. Status changes are pushed
+ * over the project's submission event stream (SSE); the list is only re-fetched for
+ * submissions it has not seen yet. While the stream is unavailable it falls back to polling
+ * every 3 seconds while any submissions are queued or running. While it is open the list is
+ * still reconciled every 30 seconds: the stream only carries events published by the server
+ * replica it is connected to, so changes made by other replicas arrive that way.
+ * Refreshes are coalesced: at most one list request is in flight, and any number of refreshes
+ * asked for meanwhile (e.g. events for a large batch of new uploads) result in one more.
  * Dispatching SUBMISSION_UPLOADED_EVENT triggers an immediate refresh.
  *
- * Optional onStatusChange callback fires when a submission's status changes between
- * polls, enabling toast notifications for completed, active, and failed jobs.
+ * Optional onStatusChange callback fires when a submission's status changes,
+ * enabling toast notifications for completed, active, and failed jobs.
  */
 
 import { useCallback, useEffect, useRef, useState } from "react";
-import { listSubmissions, getImageUrl, type ApiSubmission } from "@/lib/api";
+import {
+    listSubmissions,
+    getImageUrl,
+    submissionEventsUrl,
+    type ApiSubmission,
+    type SubmissionStatusEvent,
+} from "@/lib/api";
 
 export const SUBMISSION_UPLOADED_EVENT = "glados:submission-uploaded";
 
 const ACTIVE_STATUSES = new Set(["queued", "running"]);
 const POLL_INTERVAL_MS = 3000;
+const RECONCILE_INTERVAL_MS = 30_000;
+
+type RefreshRun = {
+    done: Promise<void>;
+    again: boolean;
+};
 
 export type StatusChangeEvent = {
     submission: ApiSubmission;
@@ -29,7 +49,16 @@ export function useInspectionHistory(
     onStatusChange?: (event: StatusChangeEvent) => void,
 ) {
     const [submissions, setSubmissions] = useState<ApiSubmission[]>([]);
+    const submissionsRef = useRef<ApiSubmission[]>([]);
     const [imageUrls, setImageUrls] = useState<Record<string, string>>({});
+    // Cursor of the next older page (null once the whole history is loaded)
+    const nextCursorRef = useRef<string | null>(null);
+    const [hasMore, setHasMore] = useState(false);
+    // True once loadMore() has appended older pages, which refreshes then keep
+    const olderLoadedRef = useRef(false);
+    const loadingMoreRef = useRef(false);
+    // The refresh in flight, if any; further refresh() calls only flag it to run once more
+    const refreshRunRef = useRef<RefreshRun | null>(null);
     const pollTimerRef = useRef<ReturnType<typeof setTimeout> | undefined>(undefined);
     const mountedRef = useRef(true);
     const fetchingUrls = useRef<Set<string>>(new Set());
@@ -37,21 +66,56 @@ export function useInspectionHistory(
     // Track previous statuses to detect transitions
     const prevStatuses = useRef<Map<string, string>>(new Map());
     const isInitialized = useRef(false);
+    // True while the status event stream is connected; polling is paused meanwhile
+    const streamOpenRef = useRef(false);
     // Keep latest callback in a ref so refresh() closure never goes stale
     const onStatusChangeRef = useRef(onStatusChange);
     useEffect(() => {
         onStatusChangeRef.current = onStatusChange;
     });
 
-    const refresh = useCallback(async () => {
+    const fetchImageUrls = useCallback((subs: ApiSubmission[]) => {
+        for (const sub of subs) {
+            if (!fetchingUrls.current.has(sub.image_id)) {
+                fetchingUrls.current.add(sub.image_id);
+                getImageUrl(sub.image_id)
+                    .then((url) => {
+                        if (mountedRef.current) {
+                            setImageUrls((prev) => ({ ...prev, [sub.image_id]: url }));
+                        }
+                    })
+                    .catch(() => {
+                        fetchingUrls.current.delete(sub.image_id);
+                    });
+            }
+        }
+    }, []);
+
+    /** Fetch the newest page and merge it in; returns it, or null when nothing was fetched. */
+    const loadFirstPage = useCallback(async (): Promise<ApiSubmission[] | null> => {
         if (!projectId) {
             setSubmissions([]);
-            return;
+            return null;
         }
         try {
-            const subs = await listSubmissions(projectId);
-            if (!mountedRef.current) return;
-            setSubmissions(subs);
+            const page = await listSubmissions(projectId);
+            if (!mountedRef.current) return null;
+            const subs = page.submissions;
+            if (olderLoadedRef.current && page.nextCursor) {
+                // Keep the older pages already loaded; rows within the fresh page's range come from it
+                const ids = new Set(subs.map((s) => s.id));
+                const oldest = Date.parse(subs[subs.length - 1].submitted_at);
+                const older = submissionsRef.current.filter(
+                    (s) => !ids.has(s.id) && Date.parse(s.submitted_at) < oldest,
+                );
+                submissionsRef.current = [...subs, ...older];
+            } else {
+                olderLoadedRef.current = false;
+                nextCursorRef.current = page.nextCursor;
+                setHasMore(page.nextCursor !== null);
+                submissionsRef.current = subs;
+            }
+            setSubmissions(submissionsRef.current);
 
             // Detect status transitions and fire onStatusChange
             const firstRun = !isInitialized.current;
@@ -79,35 +143,79 @@ export function useInspectionHistory(
             if (firstRun) isInitialized.current = true;
 
             // Fetch presigned image URLs for the most recent submissions
-            for (const sub of subs.slice(0, 30)) {
-                if (!fetchingUrls.current.has(sub.image_id)) {
-                    fetchingUrls.current.add(sub.image_id);
-                    getImageUrl(sub.image_id)
-                        .then((url) => {
-                            if (mountedRef.current) {
-                                setImageUrls((prev) => ({ ...prev, [sub.image_id]: url }));
-                            }
-                        })
-                        .catch(() => {
-                            fetchingUrls.current.delete(sub.image_id);
-                        });
+            fetchImageUrls(subs.slice(0, 30));
+            return subs;
+        } catch {
+            // ignore transient fetch errors
+            return null;
+        }
+    }, [projectId, fetchImageUrls]);
+
+    const refresh = useCallback((): Promise<void> => {
+        const running = refreshRunRef.current;
+        if (running) {
+            // Coalesce: however many refreshes are asked for meanwhile, a single one follows
+            running.again = true;
+            return running.done;
+        }
+        const run: RefreshRun = { done: Promise.resolve(), again: false };
+        run.done = (async () => {
+            try {
+                let subs: ApiSubmission[] | null;
+                do {
+                    run.again = false;
+                    subs = await loadFirstPage();
+                } while (run.again && mountedRef.current);
+
+                // Keep polling while submissions are still running; with the event stream open,
+                // only reconcile now and then for changes made on other server replicas
+                clearTimeout(pollTimerRef.current);
+                if (streamOpenRef.current) {
+                    pollTimerRef.current = setTimeout(() => {
+                        refresh();
+                    }, RECONCILE_INTERVAL_MS);
+                } else if (subs?.some((s) => ACTIVE_STATUSES.has(s.status))) {
+                    pollTimerRef.current = setTimeout(() => {
+                        refresh();
+                    }, POLL_INTERVAL_MS);
                 }
+            } finally {
+                if (refreshRunRef.current === run) refreshRunRef.current = null;
             }
+        })();
+        refreshRunRef.current = run;
+        return run.done;
+    }, [loadFirstPage]);
 
-            // Keep polling while submissions are still running
-            clearTimeout(pollTimerRef.current);
-            if (subs.some((s) => ACTIVE_STATUSES.has(s.status))) {
-                pollTimerRef.current = setTimeout(() => {
-                    refresh();
-                }, POLL_INTERVAL_MS);
-            }
+    const loadMore = useCallback(async () => {
+        const cursor = nextCursorRef.current;
+        if (!projectId || !cursor || loadingMoreRef.current) return;
+        loadingMoreRef.current = true;
+        try {
+            const page = await listSubmissions(projectId, cursor);
+            // Dropped if the list was reset meanwhile (project switch, or a refresh moved the first page)
+            if (!mountedRef.current || nextCursorRef.current !== cursor) return;
+            const ids = new Set(submissionsRef.current.map((s) => s.id));
+            const older = page.submissions.filter((s) => !ids.has(s.id));
+            for (const sub of older) prevStatuses.current.set(sub.id, sub.status);
+            olderLoadedRef.current = true;
+            nextCursorRef.current = page.nextCursor;
+            setHasMore(page.nextCursor !== null);
+            submissionsRef.current = [...submissionsRef.current, ...older];
+            setSubmissions(submissionsRef.current);
+            fetchImageUrls(older);
         } catch {
-            // ignore transient fetch errors
+            // ignore transient fetch errors; the caller can try again
+        } finally {
+            loadingMoreRef.current = false;
         }
-    }, [projectId]);
+    }, [projectId, fetchImageUrls]);
 
     useEffect(() => {
         mountedRef.current = true;
+        // A different project starts again from its newest page
+        olderLoadedRef.current = false;
+        nextCursorRef.current = null;
         void refresh();
         const handler = () => {
             refresh();
@@ -115,10 +223,81 @@ export function useInspectionHistory(
         globalThis.addEventListener(SUBMISSION_UPLOADED_EVENT, handler);
         return () => {
             mountedRef.current = false;
+            refreshRunRef.current = null;  // the next project's refresh must not wait on this one
             clearTimeout(pollTimerRef.current);
             globalThis.removeEventListener(SUBMISSION_UPLOADED_EVENT, handler);
         };
     }, [refresh]);
 
-    return { submissions, imageUrls, refresh };
+    const applyStatusEvent = useCallback(
+        (event: SubmissionStatusEvent) => {
+            const current = submissionsRef.current.find((s) => s.id === event.submission_id);
+            if (!current) {
+                // New submission: fetch the list to get its full row
+                void refresh();
+                return;
+            }
+            const updated: ApiSubmission = {
+                ...current,
+                status: event.status,
+                pass_fail: event.pass_fail ?? current.pass_fail,
+                anomaly_count: event.anomaly_count,
+                error_message: event.error_message,
+                annotation_status: event.annotation_status ?? current.annotation_status,
+            };
+            if (updated.annotation_status === "complete" && !current.annotated_image_key) {
+                // Boxes arrived after the verdict; the event does not carry the image key
+                void refresh();
+            }
+            const previousStatus = prevStatuses.current.get(updated.id) ?? current.status;
+            prevStatuses.current.set(updated.id, updated.status);
+            submissionsRef.current = submissionsRef.current.map((s) => (s.id === updated.id ? updated : s));
+            setSubmissions(submissionsRef.current);
+            if (previousStatus !== updated.status) {
+                onStatusChangeRef.current?.({
+                    submission: updated,
+                    previousStatus,
+                    currentStatus: updated.status,
+                });
+            }
+        },
+        [refresh],
+    );
+
+    useEffect(() => {
+        if (!projectId || typeof EventSource === "undefined") return;
+        const source = new EventSource(submissionEventsUrl(projectId));
+        let reconnecting = false;
+        source.addEventListener("ready", () => {
+            streamOpenRef.current = true;
+            clearTimeout(pollTimerRef.current);
+            if (reconnecting) {
+                // Catch up on anything missed while disconnected (this also schedules the reconcile)
+                void refresh();
+            } else {
+                pollTimerRef.current = setTimeout(() => {
+                    refresh();
+                }, RECONCILE_INTERVAL_MS);
+            }
+        });
+        source.addEventListener("submission", (e) => {
+            try {
+                applyStatusEvent(JSON.parse((e as MessageEvent<string>).data));
+            } catch {
+                // ignore malformed events
+            }
+        });
+        source.onerror = () => {
+            // EventSource reconnects by itself; poll in the meantime
+            streamOpenRef.current = false;
+            reconnecting = true;
+            void refresh();
+        };
+        return () => {
+            source.close();
+            streamOpenRef.current = false;
+        };
+    }, [projectId, refresh, applyStatusEvent]);
+
+    return { submissions, imageUrls, refresh, hasMore, loadMore };
 }
@@ -130,8 +130,12 @@ export type ApiSubmission = {
     status: string;
     pass_fail: "pass" | "fail" | "unknown";
     anomaly_count: number | null;
-    error_message: string | null;
-    annotated_image: string | null;
+    /** Only on single-submission responses; list pages omit it */
+    error_message?: string | null;
+    /** Object key of the annotated image (fetch with getImageUrl) */
+    annotated_image_key: string | null;
+    /** Bounding boxes are drawn after the verdict; "pending" until annotated_image_key is set */
+    annotation_status: "pending" | "complete" | "skipped" | "failed" | null;
 };
 
 export type ApiAnomaly = {
@@ -144,12 +148,42 @@ export type ApiAnomaly = {
     created_at: string;
 };
 
-export async function listSubmissions(projectId: string): Promise<ApiSubmission[]> {
+/** One page of a project's submissions; nextCursor is null on the last page. */
+export type SubmissionPage = {
+    submissions: ApiSubmission[];
+    nextCursor: string | null;
+};
+
+/**
+ * One page of a project's submissions, newest first (the API's default page size).
+ * Pass the returned nextCursor (from X-Next-Cursor) to fetch the next, older page.
+ */
+export async function listSubmissions(projectId: string, cursor?: string | null): Promise<SubmissionPage> {
+    const query = cursor ? `?${new URLSearchParams({ cursor })}` : "";
     const res = await fetch(
-        `${API_BASE_URL}/projects/${encodeURIComponent(projectId)}/submissions`,
+        `${API_BASE_URL}/projects/${encodeURIComponent(projectId)}/submissions${query}`,
     );
     const data = await parseJsonResponse<unknown>(res, `Failed to list submissions: ${res.status}`);
-    return Array.isArray(data) ? data : [];
+    return {
+        submissions: Array.isArray(data) ? data : [],
+        nextCursor: res.headers.get("X-Next-Cursor"),
+    };
+}
+
+/** Payload of a "submission" event on the project submission event stream. */
+export type SubmissionStatusEvent = {
+    submission_id: string;
+    project_id: string;
+    status: string;
+    pass_fail: ApiSubmission["pass_fail"] | null;
+    anomaly_count: number | null;
+    error_message: string | null;
+    annotation_status: ApiSubmission["annotation_status"];
+};
+
+/** Server-Sent Events stream of submission status changes for a project (use with EventSource). */
+export function submissionEventsUrl(projectId: string): string {
+    return `${API_BASE_URL}/projects/${encodeURIComponent(projectId)}/submissions/events`;
 }
 
 export async function listAnomalies(submissionId: string): Promise<ApiAnomaly[]> {
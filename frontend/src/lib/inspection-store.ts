@@ -22,6 +22,8 @@ export type InspectionSubmission = {
     inferenceTimeMs?: number;
     /** Base64 PNG with bounding boxes drawn by Qwen2.5-VL grounding (when detected) */
     annotatedImage?: string;
+    /** URL of the stored annotated image (API submissions); preferred over annotatedImage */
+    annotatedImageUrl?: string;
 };
 
 export type InspectionResult = {